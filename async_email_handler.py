@@ -0,0 +1,865 @@
+import asyncio
+import base64
+import email
+import imaplib
+import re
+import smtplib
+import socket
+import ssl
+import time
+import logging
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from database import DatabaseManager
+from email_handler import EmailHandler
+from imap_session import IDLE_RENEW_INTERVAL, is_mailbox_change, parse_fetch_response, reconnect_delay
+from mailbox_sync import CACHE_SEED_SIZE, CACHE_SIZE, LISTING_ITEMS, MailboxSync, summarize_message
+from mime_skeleton import MIMESkeleton
+from smtp_pool import is_disconnect_error, iter_message_chunks, iter_smtp_data
+from send_engine import load_email_settings
+from template_engine import compile_template
+
+CRLF = b"\r\n"
+
+@lru_cache(maxsize=1)
+def _local_hostname() -> str:
+    """Hostname announced in EHLO"""
+    return socket.getfqdn()
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Run a blocking call, such as SQLite or file I/O, off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args, **kwargs))
+
+class AsyncSMTPClient:
+    """Minimal SMTP client on asyncio streams.
+
+    Raises the same exception types as smtplib so callers can share
+    error handling with the blocking transport.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 60,
+                 ssl_context: ssl.SSLContext = None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.reader = None
+        self.writer = None
+        self.features = {}
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None
+
+    async def connect(self):
+        """Open connection and read server greeting"""
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        code, message = await self._read_response()
+        if code != 220:
+            self.close()
+            raise smtplib.SMTPConnectError(code, message)
+        await self.ehlo()
+
+    async def _read_response(self) -> Tuple[int, str]:
+        """Read a possibly multiline SMTP reply"""
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                self.close()
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+            line = line.rstrip(b"\r\n")
+            try:
+                code = int(line[:3])
+            except ValueError:
+                code = -1
+            lines.append(line[4:].decode('utf-8', errors='replace'))
+
+            if line[3:4] != b'-':
+                return code, "\n".join(lines)
+
+    async def _command(self, command: str) -> Tuple[int, str]:
+        """Send a command line and return the reply"""
+        if not self.connected:
+            raise smtplib.SMTPServerDisconnected("please run connect() first")
+        self.writer.write(command.encode('ascii') + CRLF)
+        await self.writer.drain()
+        code, message = await self._read_response()
+        if code == 421:
+            self.close()
+            raise smtplib.SMTPResponseException(code, message)
+        return code, message
+
+    async def ehlo(self):
+        """Send EHLO and record advertised extensions"""
+        code, message = await self._command(f"EHLO {_local_hostname()}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, message)
+
+        self.features = {}
+        for line in message.split("\n")[1:]:
+            keyword, _, params = line.partition(' ')
+            self.features[keyword.upper()] = params
+
+    async def starttls(self):
+        """Upgrade the connection to TLS"""
+        if 'STARTTLS' not in self.features:
+            raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+
+        code, message = await self._command("STARTTLS")
+        if code != 220:
+            raise smtplib.SMTPResponseException(code, message)
+
+        if hasattr(self.writer, 'start_tls'):
+            await self.writer.start_tls(self.ssl_context, server_hostname=self.host)
+        else:
+            # Python < 3.11: swap the transport under the existing stream
+            loop = asyncio.get_running_loop()
+            transport = self.writer.transport
+            tls_transport = await loop.start_tls(
+                transport, transport.get_protocol(), self.ssl_context,
+                server_hostname=self.host
+            )
+            self.writer._transport = tls_transport
+
+        await self.ehlo()
+
+    async def login(self, user: str, password: str):
+        """Authenticate with AUTH PLAIN or AUTH LOGIN"""
+        mechanisms = self.features.get('AUTH', '').upper().split()
+
+        if 'PLAIN' in mechanisms or 'LOGIN' not in mechanisms:
+            token = base64.b64encode(f"\0{user}\0{password}".encode('utf-8')).decode('ascii')
+            code, message = await self._command(f"AUTH PLAIN {token}")
+        else:
+            code, message = await self._command("AUTH LOGIN")
+            if code == 334:
+                code, message = await self._command(
+                    base64.b64encode(user.encode('utf-8')).decode('ascii')
+                )
+            if code == 334:
+                code, message = await self._command(
+                    base64.b64encode(password.encode('utf-8')).decode('ascii')
+                )
+
+        if code not in (235, 503):
+            raise smtplib.SMTPAuthenticationError(code, message)
+
+    async def sendmail(self, from_addr: str, to_addrs, message: Union[str, List]) -> Dict:
+        """Send a message like smtp_pool.send_message_data. Returns refused
+        recipients.
+
+        ``message`` is the message text or a list of segments; attachments
+        streamed from disk are read in the executor.
+        """
+        if isinstance(to_addrs, str):
+            to_addrs = [to_addrs]
+
+        code, response = await self._command(f"MAIL FROM:<{from_addr}>")
+        if code != 250:
+            await self._rset()
+            raise smtplib.SMTPSenderRefused(code, response, from_addr)
+
+        refused = {}
+        for recipient in to_addrs:
+            code, response = await self._command(f"RCPT TO:<{recipient}>")
+            if code not in (250, 251):
+                refused[recipient] = (code, response)
+
+        if len(refused) == len(to_addrs):
+            await self._rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+        code, response = await self._command("DATA")
+        if code != 354:
+            await self._rset()
+            raise smtplib.SMTPDataError(code, response)
+
+        chunks = iter_smtp_data(iter_message_chunks(message))
+        if isinstance(message, str):
+            for data in chunks:
+                self.writer.write(data)
+                await self.writer.drain()
+        else:
+            while True:
+                data = await run_blocking(next, chunks, None)
+                if data is None:
+                    break
+                self.writer.write(data)
+                await self.writer.drain()
+
+        code, response = await self._read_response()
+        if code != 250:
+            if code == 421:
+                self.close()
+            else:
+                await self._rset()
+            raise smtplib.SMTPDataError(code, response)
+
+        return refused
+
+    async def _rset(self):
+        """Reset the transaction, ignoring a dead connection"""
+        try:
+            await self._command("RSET")
+        except smtplib.SMTPServerDisconnected:
+            pass
+
+    async def quit(self):
+        """Send QUIT and close the connection"""
+        try:
+            await self._command("QUIT")
+        except Exception:
+            pass
+        self.close()
+
+    def close(self):
+        """Close the underlying stream"""
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+class AsyncSMTPConnectionPool:
+    """Pool of authenticated async SMTP sessions keyed by account.
+
+    Same recycling rules as SMTPConnectionPool; must be used from a
+    single event loop.
+    """
+
+    def __init__(self, max_messages_per_connection: int = 100,
+                 idle_timeout: float = 60, timeout: float = 60,
+                 ssl_context: ssl.SSLContext = None):
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.logger = logging.getLogger(__name__)
+        self._idle: Dict[Tuple, List[AsyncSMTPClient]] = {}
+
+    def _get_key(self, sender_config: Dict) -> Tuple:
+        """Build pool key for an account"""
+        return (sender_config['smtp_server'], int(sender_config['smtp_port']),
+                sender_config['email'])
+
+    async def _connect(self, sender_config: Dict) -> AsyncSMTPClient:
+        """Open and authenticate a new SMTP session"""
+        client = AsyncSMTPClient(sender_config['smtp_server'], int(sender_config['smtp_port']),
+                                 self.timeout, self.ssl_context)
+        try:
+            await client.connect()
+            await client.starttls()
+            await client.login(sender_config['email'], sender_config['password'])
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    async def acquire(self, sender_config: Dict) -> AsyncSMTPClient:
+        """Check out a session for the account, opening one if none is idle"""
+        idle = self._idle.get(self._get_key(sender_config), [])
+        now = time.monotonic()
+        while idle:
+            client = idle.pop()
+            if now - client.last_used <= self.idle_timeout:
+                return client
+            await client.quit()
+        return await self._connect(sender_config)
+
+    async def release(self, sender_config: Dict, client: AsyncSMTPClient):
+        """Return a healthy session to the pool or recycle it"""
+        client.last_used = time.monotonic()
+        if client.messages_sent >= self.max_messages_per_connection:
+            await client.quit()
+            return
+        self._idle.setdefault(self._get_key(sender_config), []).append(client)
+
+    async def sendmail(self, sender_config: Dict, recipients, message: Union[str, List]) -> Dict:
+        """Send a message, reconnecting once if the session was dropped"""
+        for attempt in range(2):
+            # Other pooled sessions may have been dropped too, so retry on a new one
+            client = await (self.acquire(sender_config) if attempt == 0
+                            else self._connect(sender_config))
+            try:
+                result = await client.sendmail(sender_config['email'], recipients, message)
+            except smtplib.SMTPException as e:
+                if is_disconnect_error(e):
+                    client.close()
+                    if attempt == 0:
+                        self.logger.info(
+                            f"SMTP session for {sender_config['email']} dropped, reconnecting"
+                        )
+                        continue
+                    raise
+                if client.connected:
+                    # The transaction was reset, so the session stays usable
+                    await self.release(sender_config, client)
+                raise
+            except BaseException:
+                client.close()
+                raise
+
+            client.messages_sent += 1
+            await self.release(sender_config, client)
+            return result
+
+    async def close_all(self):
+        """Close every idle session"""
+        clients = [c for idle in self._idle.values() for c in idle]
+        self._idle.clear()
+        await asyncio.gather(*(c.quit() for c in clients), return_exceptions=True)
+
+class AsyncIMAPClient:
+    """Minimal IMAP4rev1 client over an asyncio SSL stream.
+
+    Untagged responses are returned in imaplib's layout, a ``(text,
+    literal)`` tuple per ``{n}`` literal followed by the remaining text,
+    so FETCH data goes through imap_session.parse_fetch_response. Mailbox
+    state from SELECT is kept like IMAPSession does, which lets
+    AsyncMailboxSync share MailboxSync's bookkeeping.
+    """
+
+    def __init__(self, email_config: Dict, mailbox: str = 'INBOX', timeout: float = 60,
+                 ssl_context: ssl.SSLContext = None):
+        self.email_config = email_config
+        self.host = email_config['imap_server']
+        self.port = int(email_config['imap_port'])
+        self.mailbox = mailbox
+        self.timeout = timeout
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.reader = None
+        self.writer = None
+        self.capabilities = set()
+        # Mailbox state reported by SELECT
+        self.exists = 0
+        self.uidvalidity: Optional[int] = None
+        self.uidnext: Optional[int] = None
+        self._tag = 0
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None
+
+    @property
+    def supports_idle(self) -> bool:
+        return 'IDLE' in self.capabilities
+
+    async def connect(self):
+        """Open the connection, log in and select the mailbox"""
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl_context,
+                                    server_hostname=self.host),
+            self.timeout
+        )
+        try:
+            greeting = await self._read_line()
+            if not greeting.startswith((b'* OK', b'* PREAUTH')):
+                raise imaplib.IMAP4.error(greeting.decode('utf-8', errors='replace'))
+
+            await self.command('LOGIN', self.quote(self.email_config['email']),
+                               self.quote(self.email_config['password']))
+            # Servers often advertise more capabilities once logged in
+            for response in await self.command('CAPABILITY'):
+                line = self.first_line(response)
+                if line.startswith(b'* CAPABILITY'):
+                    self.capabilities = set(
+                        line[len(b'* CAPABILITY'):].decode('ascii', errors='ignore').upper().split()
+                    )
+            await self.select()
+        except BaseException:
+            self.close()
+            raise
+
+    async def select(self):
+        """Select the mailbox and record its state"""
+        self.exists = 0
+        self.uidvalidity = self.uidnext = None
+        for response in await self.command('SELECT', self.quote(self.mailbox)):
+            line = self.first_line(response)
+            match = re.match(rb'\* (\d+) EXISTS', line)
+            if match:
+                self.exists = int(match.group(1))
+            match = re.match(rb'\* OK \[(UIDVALIDITY|UIDNEXT) (\d+)\]', line)
+            if match:
+                setattr(self, match.group(1).decode('ascii').lower(), int(match.group(2)))
+
+    async def _read_line(self) -> bytes:
+        """Read one response line"""
+        line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+        if not line:
+            self.close()
+            raise imaplib.IMAP4.abort("Connection unexpectedly closed")
+        return line.rstrip(b"\r\n")
+
+    async def _read_response(self, line: bytes) -> List:
+        """Read the literals that follow a response line"""
+        items = []
+        while True:
+            match = re.search(rb'\{(\d+)\}$', line)
+            if not match:
+                items.append(line)
+                return items
+            literal = await asyncio.wait_for(
+                self.reader.readexactly(int(match.group(1))), self.timeout
+            )
+            items.append((line, literal))
+            line = await self._read_line()
+
+    async def command(self, name: str, *args: str) -> List[List]:
+        """Run a tagged command and collect its untagged responses"""
+        if not self.connected:
+            raise imaplib.IMAP4.abort("Not connected")
+        self._tag += 1
+        tag = f"A{self._tag:04d}".encode('ascii')
+        self.writer.write(b' '.join([tag, name.encode('ascii')] +
+                                    [a.encode('utf-8') for a in args]) + CRLF)
+        await self.writer.drain()
+
+        untagged = []
+        while True:
+            line = await self._read_line()
+            if line.startswith(tag + b' '):
+                status = line[len(tag) + 1:].split(b' ', 1)[0]
+                if status != b'OK':
+                    raise imaplib.IMAP4.error(line.decode('utf-8', errors='replace'))
+                return untagged
+            untagged.append(await self._read_response(line))
+
+    async def fetch(self, message_set: str, items: str, uid: bool = False) -> List:
+        """Run FETCH or UID FETCH, returning data in imaplib's layout"""
+        command = ('UID', 'FETCH') if uid else ('FETCH',)
+        data = []
+        for response in await self.command(*command, message_set, items):
+            # imaplib drops the '* ' and 'FETCH ' around the message number
+            match = re.match(rb'\* (\d+) FETCH ', self.first_line(response))
+            if not match:
+                continue
+            text = match.group(1) + b' ' + self.first_line(response)[match.end():]
+            head = (text, response[0][1]) if isinstance(response[0], tuple) else text
+            data.extend([head] + response[1:])
+        return data
+
+    async def uid_search(self, criteria: str) -> List[int]:
+        """Run UID SEARCH and return the matching UIDs"""
+        uids = []
+        for response in await self.command('UID', 'SEARCH', criteria):
+            line = self.first_line(response)
+            if line.startswith(b'* SEARCH'):
+                uids.extend(int(uid) for uid in line[len(b'* SEARCH'):].split())
+        return sorted(uids)
+
+    async def idle(self, timeout: float) -> bool:
+        """Run one IDLE command until the server reports a change or
+        ``timeout`` runs out. Returns True on a mailbox change."""
+        self._tag += 1
+        tag = f"A{self._tag:04d}".encode('ascii')
+        self.writer.write(tag + b' IDLE' + CRLF)
+        await self.writer.drain()
+
+        changed = False
+        while True:
+            line = await self._read_line()
+            if line.startswith(b'+'):
+                break
+            if line.startswith(tag):
+                raise imaplib.IMAP4.error(line.decode('utf-8', errors='replace'))
+            changed = changed or is_mailbox_change(line)
+
+        deadline = time.monotonic() + timeout
+        while not changed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not line or line.startswith(b'* BYE'):
+                self.close()
+                raise imaplib.IMAP4.abort("Connection closed during IDLE")
+            changed = is_mailbox_change(line)
+
+        self.writer.write(b'DONE' + CRLF)
+        await self.writer.drain()
+        while True:
+            line = await self._read_line()
+            if line.startswith(tag):
+                if line[len(tag):].split(None, 1)[0].upper() != b'OK':
+                    raise imaplib.IMAP4.error(line.decode('utf-8', errors='replace'))
+                return changed
+            changed = changed or is_mailbox_change(line)
+
+    @staticmethod
+    def first_line(response: List) -> bytes:
+        """Text of an untagged response up to its first literal"""
+        return response[0][0] if isinstance(response[0], tuple) else response[0]
+
+    @staticmethod
+    def quote(value: str) -> str:
+        """Quote a string argument"""
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+    async def logout(self):
+        """Send LOGOUT and close the connection"""
+        try:
+            await self.command('LOGOUT')
+        except Exception:
+            pass
+        self.close()
+
+    def close(self):
+        """Close the underlying stream"""
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+class AsyncMailboxSync(MailboxSync):
+    """MailboxSync driven over an AsyncIMAPClient.
+
+    Uses the same checkpoint, pending UIDs and message cache as
+    MailboxSync, so a folder can be watched by either handler without
+    processing a message twice. Flag changes are not tracked: the stored
+    HIGHESTMODSEQ is carried over unchanged for InboxSupervisor to use.
+    SQLite calls run in the executor.
+    """
+
+    async def sync(self, imap: AsyncIMAPClient,
+                   on_message: Callable[[int, List[str], email.message.Message], object]) -> int:
+        """Process messages that arrived since the last sync.
+
+        ``on_message(uid, flags, message)`` is a coroutine function called
+        for each new message in UID order. Returns the number of new
+        messages.
+        """
+        db = self.db_manager
+        state = await run_blocking(db.get_mailbox_sync_state, self.account_email, self.folder)
+        uidvalidity = imap.uidvalidity or 0
+
+        if state is None or state['uidvalidity'] != uidvalidity:
+            if state is not None:
+                self.logger.info(f"{self.account_email}/{self.folder}: UIDVALIDITY changed, resyncing")
+                await run_blocking(db.clear_mailbox_messages, self.account_email, self.folder)
+            await self._seed_cache_async(imap)
+            criteria = f'(UNSEEN SINCE "{datetime.now().strftime("%d-%b-%Y")}")'
+            pending = set(await imap.uid_search(criteria))
+            if imap.uidnext:
+                last_uid = imap.uidnext - 1
+            else:
+                last_uid = max(await imap.uid_search('ALL'), default=0)
+            modseq = None
+            await run_blocking(db.save_mailbox_sync_state, self.account_email, self.folder,
+                               uidvalidity, last_uid, None, pending)
+            new_uids = sorted(pending)
+        else:
+            last_uid = state['last_uid']
+            modseq = state['highest_modseq']
+            pending = set(state['pending_uids'])
+            listed = parse_fetch_response(await imap.fetch(f'{last_uid + 1}:*', '(UID FLAGS)', uid=True))
+            # 'n:*' always matches the last message, even when it is old
+            new_uids = sorted(pending.union(m['uid'] for m in listed
+                                            if m['uid'] is not None and m['uid'] > last_uid))
+
+        for start in range(0, len(new_uids), self.batch_size):
+            batch = new_uids[start:start + self.batch_size]
+            data = await imap.fetch(','.join(map(str, batch)), '(UID FLAGS BODY.PEEK[])', uid=True)
+            messages = [m for m in parse_fetch_response(data)
+                        if m['uid'] is not None and 'BODY[]' in m['sections']]
+            messages.sort(key=lambda m: m['uid'])
+            await run_blocking(self._cache_messages, messages)
+
+            for message in messages:
+                uid = message['uid']
+                try:
+                    replied = await on_message(uid, message['flags'],
+                                               email.message_from_bytes(message['sections']['BODY[]']))
+                    status = 'processed'
+                except Exception as e:
+                    self.logger.error(f"Error processing email {uid}: {e}")
+                    replied, status = False, 'error'
+                try:
+                    await run_blocking(db.set_mailbox_message_status, self.account_email,
+                                       self.folder, uid, status, bool(replied))
+                except Exception as e:
+                    self.logger.error(f"Error caching status of email {uid}: {e}")
+
+                if uid in pending:
+                    pending.discard(uid)
+                else:
+                    last_uid = max(last_uid, uid)
+                await run_blocking(db.save_mailbox_sync_state, self.account_email, self.folder,
+                                   uidvalidity, last_uid, modseq, pending)
+
+            # Pending messages missing from the response were expunged
+            pending.difference_update(batch)
+
+        if new_uids:
+            await run_blocking(db.save_mailbox_sync_state, self.account_email, self.folder,
+                               uidvalidity, last_uid, modseq, pending)
+            await run_blocking(db.prune_mailbox_messages, self.account_email, self.folder, CACHE_SIZE)
+        return len(new_uids)
+
+    async def _seed_cache_async(self, imap: AsyncIMAPClient):
+        """List the newest messages of the folder into the cache"""
+        if not imap.exists:
+            return
+        first = max(1, imap.exists - CACHE_SEED_SIZE + 1)
+        data = await imap.fetch(f'{first}:{imap.exists}', LISTING_ITEMS)
+        await run_blocking(self._cache_messages,
+                           [m for m in parse_fetch_response(data) if m['uid'] is not None])
+
+class AsyncEmailHandler:
+    """Coroutine counterpart of EmailHandler.
+
+    All SMTP and IMAP traffic runs on the event loop, so a single loop can
+    multiplex many sends and several monitored mailboxes. SQLite, settings
+    and attachment file I/O run in the loop's default executor. Message
+    building, personalization and incoming mail processing are shared with
+    EmailHandler.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, ssl_context: ssl.SSLContext = None):
+        self.db_manager = db_manager
+        self.email_handler = EmailHandler(db_manager)
+        self.ssl_context = ssl_context
+        self.logger = logging.getLogger(__name__)
+        self.smtp_pool = AsyncSMTPConnectionPool(ssl_context=ssl_context)
+        self.monitor_tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def monitoring(self) -> bool:
+        """Whether any mailbox is being monitored"""
+        return any(not task.done() for task in self.monitor_tasks.values())
+
+    async def send_email(self, sender_config: Dict, recipient: str, subject: str,
+                         body: str, is_html: bool = False, attachments: List[str] = None,
+                         template_id: int = None, skeleton: MIMESkeleton = None) -> Tuple[bool, str]:
+        """Send email
+
+        ``skeleton`` carries pre-encoded attachments shared across a batch
+        and takes the place of ``attachments``.
+        """
+        try:
+            if skeleton is not None:
+                message = skeleton.render(sender_config['email'], recipient, subject, body, is_html)
+            else:
+                message = None
+            if message is None:
+                message = await run_blocking(self.email_handler._serialize_message,
+                                             sender_config['email'], recipient, subject,
+                                             body, is_html, attachments)
+            await self.smtp_pool.sendmail(sender_config, recipient, message)
+            status, error_msg = 'sent', None
+        except Exception as e:
+            status, error_msg = 'failed', str(e)
+
+        await run_blocking(
+            self.db_manager.add_email_log,
+            sender_email=sender_config['email'],
+            recipient_email=recipient,
+            subject=subject,
+            body=body,
+            status=status,
+            error_message=error_msg,
+            template_id=template_id
+        )
+
+        if error_msg is not None:
+            return False, error_msg
+        return True, "Email sent successfully"
+
+    async def send_batch_emails(self, sender_config: Dict, recipients: Iterable[Dict],
+                                template: Dict, attachments: List[str] = None,
+                                on_result: Callable[[Dict, bool, str], None] = None,
+                                should_stop: Callable[[], bool] = None,
+                                delay: float = None) -> Dict:
+        """Send batch emails with personalization.
+
+        Runs ``max_connections`` sender coroutines per account, paced by the
+        same per-account rate limiter as EmailHandler.send_batch_emails.
+        """
+        results = {'sent': 0, 'failed': 0, 'errors': []}
+
+        settings = await run_blocking(load_email_settings)
+        if delay is None:
+            delay = settings['default_delay']
+        rate_limiter = self.email_handler._get_rate_limiter(
+            sender_config, delay, settings['batch_size']
+        )
+
+        # Parse placeholders and encode attachments once for the whole batch
+        subject_template = compile_template(template['subject'])
+        body_template = compile_template(template['body'])
+        skeleton = await run_blocking(MIMESkeleton, attachments)
+        recipient_iter = iter(recipients)
+
+        async def worker():
+            for recipient in recipient_iter:
+                if should_stop and should_stop():
+                    return
+                if not await rate_limiter.acquire_async(should_stop):
+                    return
+
+                success, message = await self.send_email(
+                    sender_config=sender_config,
+                    recipient=recipient['email'],
+                    subject=subject_template.render(recipient),
+                    body=body_template.render(recipient),
+                    is_html=template['is_html'],
+                    attachments=attachments,
+                    template_id=template.get('id'),
+                    skeleton=skeleton
+                )
+
+                if success:
+                    results['sent'] += 1
+                else:
+                    results['failed'] += 1
+                    results['errors'].append(f"{recipient['email']}: {message}")
+
+                if on_result:
+                    on_result(recipient, success, message)
+
+        workers = max(1, int(sender_config.get('max_connections', 3)))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+    async def get_inbox_emails(self, email_config: Dict, limit: int = 50) -> List[Dict]:
+        """Get recent emails from inbox.
+
+        Lists the newest ``limit`` messages from their headers, size and
+        the first 2 KB of text, like EmailHandler.get_inbox_emails.
+        """
+        emails = []
+        imap = AsyncIMAPClient(email_config, ssl_context=self.ssl_context)
+
+        try:
+            await imap.connect()
+
+            if imap.exists:
+                first = max(1, imap.exists - limit + 1)
+                data = await imap.fetch(f"{first}:{imap.exists}", LISTING_ITEMS)
+
+                messages = []
+                for fetched in parse_fetch_response(data):
+                    try:
+                        messages.append(summarize_message(fetched))
+                    except Exception as e:
+                        # Skip only the message that cannot be decoded
+                        self.logger.error(f"Error reading email {fetched['uid']}: {e}")
+
+                for message in sorted(messages, key=lambda m: m['uid'] or 0, reverse=True):  # Newest first
+                    emails.append({
+                        'id': str(message['uid']),
+                        'from': message['from'],
+                        'subject': message['subject'],
+                        'date': message['date'],
+                        'message_id': message['message_id'],
+                        'size': message['size'],
+                        'flags': message['flags'],
+                        'body': message['snippet'][:200] + '...'  # Preview
+                    })
+
+        except Exception as e:
+            self.logger.error(f"Error getting inbox emails: {e}")
+        finally:
+            await imap.logout()
+
+        return emails
+
+    def start_inbox_monitoring(self, email_config: Dict, check_interval: int = 60) -> asyncio.Task:
+        """Start monitoring a mailbox as a task on the running loop"""
+        task = self.monitor_tasks.get(email_config['email'])
+        if task and not task.done():
+            return task
+
+        task = asyncio.ensure_future(self.monitor_inbox(email_config, check_interval))
+        self.monitor_tasks[email_config['email']] = task
+        self.logger.info(f"Inbox monitoring started for {email_config['email']}")
+        return task
+
+    async def stop_inbox_monitoring(self, account_email: str = None):
+        """Stop monitoring one mailbox, or all of them"""
+        if account_email:
+            tasks = [self.monitor_tasks.pop(account_email)] if account_email in self.monitor_tasks else []
+        else:
+            tasks = list(self.monitor_tasks.values())
+            self.monitor_tasks.clear()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.logger.info("Inbox monitoring stopped")
+
+    async def monitor_inbox(self, email_config: Dict, check_interval: int):
+        """Monitor inbox for new emails and auto-reply.
+
+        Keeps one session open, syncs with AsyncMailboxSync and then waits
+        in IDLE, or ``check_interval`` seconds on servers without it.
+        Reconnects with backoff after a failure.
+        """
+        sync = AsyncMailboxSync(self.db_manager, email_config['email'])
+        imap = AsyncIMAPClient(email_config, ssl_context=self.ssl_context)
+        failures = 0
+
+        async def on_message(uid, flags, message):
+            return await self._process_incoming_email(message, email_config)
+
+        try:
+            while True:
+                try:
+                    if not imap.connected:
+                        await imap.connect()
+                    await sync.sync(imap, on_message)
+                    failures = 0
+
+                    if imap.supports_idle:
+                        await imap.idle(min(check_interval, IDLE_RENEW_INTERVAL))
+                    else:
+                        await asyncio.sleep(check_interval)
+
+                except Exception as e:
+                    failures += 1
+                    self.logger.error(f"Error monitoring {email_config['email']}: {e}")
+                    imap.close()
+                    await asyncio.sleep(reconnect_delay(failures))
+        finally:
+            imap.close()
+
+    async def _process_incoming_email(self, email_message, sender_config: Dict) -> bool:
+        """Process incoming email for auto-reply and attachments.
+
+        Returns True if an auto-reply was sent. Errors propagate to the
+        caller, which records them against the message.
+        """
+        auto_replied = False
+        sender = email_message.get('From', '')
+        subject = email_message.get('Subject', '')
+        body = self.email_handler._extract_email_body(email_message)
+
+        for rule in await run_blocking(self.db_manager.get_auto_reply_rules):
+            if self.email_handler._check_keywords(body + ' ' + subject, rule['keywords']):
+                template = await run_blocking(self.db_manager.get_email_template, rule['template_id'])
+                if template:
+                    auto_replied, _ = await self.send_email(
+                        sender_config=sender_config,
+                        recipient=sender,
+                        subject=f"Re: {subject}",
+                        body=template['body'],
+                        is_html=template['is_html'],
+                        template_id=template['id']
+                    )
+                    self.logger.info(f"Auto-reply sent to {sender} using rule '{rule['name']}'")
+                    break
+
+        await run_blocking(self.email_handler._process_attachments, email_message, sender)
+        return auto_replied
+
+    async def close(self):
+        """Stop monitoring and close pooled SMTP sessions"""
+        await self.stop_inbox_monitoring()
+        await self.smtp_pool.close_all()
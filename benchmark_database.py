@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Database query benchmark for Email Automation Bot
+
+Fills a scratch database with email logs and times the queries used by the
+Logs, Dashboard and Scheduler panels with and without the indexes added by
+the schema migrations.
+
+Usage: python benchmark_database.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import SCHEMA_MIGRATIONS, DatabaseManager
+
+STATUSES = ['sent'] * 9 + ['failed']
+
+QUERIES = {
+    'latest 100 logs': lambda db: db.get_email_logs(100),
+    'latest 100 failed': lambda db: _fetch(db, '''
+        SELECT * FROM email_logs WHERE status = 'failed'
+        ORDER BY sent_at DESC LIMIT 100
+    '''),
+    'logs for recipient': lambda db: _fetch(db, '''
+        SELECT * FROM email_logs WHERE recipient_email = ?
+        ORDER BY sent_at DESC
+    ''', ('user4242@example.com',)),
+    'count for template': lambda db: _fetch(db, '''
+        SELECT COUNT(*) FROM email_logs WHERE template_id = ?
+    ''', (7,)),
+    'failed today': lambda db: _fetch(db, '''
+        SELECT COUNT(*) FROM email_logs WHERE status = 'failed' AND sent_at >= date('now')
+    '''),
+    'active schedules': lambda db: db.get_scheduled_emails(),
+}
+
+def _fetch(db, sql, params=()):
+    conn = db.get_connection()
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+def populate(db, rows, batch=50000):
+    """Insert synthetic templates, schedules and log rows"""
+    conn = db.get_connection()
+    for i in range(20):
+        conn.execute('INSERT INTO email_templates (name, subject, body) VALUES (?, ?, ?)',
+                     (f'Template {i}', f'Subject {i}', 'Hello {name}'))
+    for i in range(2000):
+        conn.execute('''
+            INSERT INTO scheduled_emails (name, template_id, recipients, schedule_type,
+                                          schedule_data, next_run, is_active)
+            VALUES (?, ?, '[]', 'daily', '{}', ?, ?)
+        ''', (f'Schedule {i}', i % 20 + 1,
+              (datetime.now() + timedelta(minutes=i)).isoformat(), i % 10 == 0))
+    conn.commit()
+
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    step = 365 * 24 * 3600 / rows
+    inserted = 0
+    while inserted < rows:
+        count = min(batch, rows - inserted)
+        conn.executemany('''
+            INSERT INTO email_logs (sender_email, recipient_email, subject, body,
+                                    status, template_id, sent_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            ('sender@example.com', f'user{random.randrange(100000)}@example.com',
+             'Subject', 'Body text', random.choice(STATUSES), random.randint(1, 20),
+             (start + timedelta(seconds=(inserted + n) * step)).strftime('%Y-%m-%d %H:%M:%S'))
+            for n in range(count)
+        ))
+        conn.commit()
+        inserted += count
+        print(f"  inserted {inserted:,} / {rows:,}", end='\r')
+    print()
+    conn.execute('ANALYZE')
+    conn.close()
+
+def drop_indexes(db):
+    """Remove the indexes added by the schema migrations"""
+    conn = db.get_connection()
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+    )]
+    for name in names:
+        conn.execute(f'DROP INDEX {name}')
+    conn.commit()
+    conn.close()
+
+def create_indexes(db):
+    """Recreate the indexes dropped by drop_indexes"""
+    conn = db.get_connection()
+    for statement in SCHEMA_MIGRATIONS[0]:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+def time_queries(db, repeat):
+    """Median latency of each query in milliseconds"""
+    results = {}
+    for name, query in QUERIES.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query(db)
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(timings)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark database queries")
+    parser.add_argument('--rows', type=int, default=1000000, help="Number of log rows")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # DatabaseManager keeps its encryption key in the working directory
+        os.chdir(work_dir)
+        db = DatabaseManager(os.path.join(work_dir, 'benchmark.db'))
+
+        print(f"Populating {args.rows:,} log rows...")
+        populate(db, args.rows)
+
+        drop_indexes(db)
+        without_indexes = time_queries(db, args.repeat)
+
+        started = time.perf_counter()
+        create_indexes(db)
+        print(f"Indexes created in {time.perf_counter() - started:.1f}s")
+        with_indexes = time_queries(db, args.repeat)
+
+        db.close()
+
+    print()
+    print(f"{'query':<22}{'no indexes (ms)':>18}{'indexes (ms)':>16}")
+    for name in QUERIES:
+        print(f"{name:<22}{without_indexes[name]:>18.2f}{with_indexes[name]:>16.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import csv
+import io
+import os
+import re
+import logging
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+EMAIL_PATTERN = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+
+# Rows parsed and upserted per executemany; progress is reported per chunk
+IMPORT_CHUNK_SIZE = 5000
+
+# Characters read to detect the delimiter
+SNIFF_SAMPLE_SIZE = 64 * 1024
+
+# Row errors kept for the summary; beyond this they are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Bytes and rows read for the import dialog preview
+PREVIEW_BYTES = 64 * 1024
+PREVIEW_ROWS = 5
+
+def sniff_delimiter(sample: str) -> str:
+    """Detect the delimiter from the start of a file, defaulting to a comma"""
+    # Only look at complete lines so a cut-off row doesn't confuse the sniffer
+    if '\n' in sample:
+        sample = sample[:sample.rindex('\n')]
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+    except csv.Error:
+        return ','
+
+def open_csv(file_path: str):
+    """Open a CSV file as text, skipping a UTF-8 byte order mark"""
+    return open(file_path, 'r', newline='', encoding='utf-8-sig')
+
+def detect_delimiter(csvfile) -> str:
+    """Sniff the delimiter from the start of an open file and rewind it"""
+    sample = csvfile.read(SNIFF_SAMPLE_SIZE)
+    csvfile.seek(0)
+    return sniff_delimiter(sample)
+
+def read_preview(file_path: str, max_bytes: int = PREVIEW_BYTES,
+                 max_rows: int = PREVIEW_ROWS) -> Tuple[List[str], List[List[str]]]:
+    """Read the header and first rows of a CSV file.
+
+    Only the first ``max_bytes`` are read, so previewing is instant however
+    large the file is. Returns the headers and up to ``max_rows`` rows.
+    """
+    with open_csv(file_path) as csvfile:
+        sample = csvfile.read(max_bytes)
+        complete = not csvfile.read(1)
+
+    # Drop a row cut off by the read limit
+    if not complete and '\n' in sample:
+        sample = sample[:sample.rindex('\n') + 1]
+
+    reader = csv.reader(io.StringIO(sample), delimiter=sniff_delimiter(sample))
+    headers = next(reader, [])
+    rows = []
+    for row in reader:
+        if len(rows) >= max_rows:
+            break
+        rows.append(row)
+    return headers, rows
+
+def column_key(header: str) -> str:
+    """Field name used for a CSV column in contact data"""
+    return header.strip().lower().replace(' ', '_')
+
+def find_column(headers: List[str], column: Union[int, str, None]) -> Optional[int]:
+    """Resolve a column given by index or header name (case-insensitive)"""
+    if column is None:
+        return None
+    if isinstance(column, int):
+        return column if 0 <= column < len(headers) else None
+
+    wanted = column.strip().lower()
+    for idx, header in enumerate(headers):
+        if header.strip().lower() == wanted:
+            return idx
+    return None
+
+class ContactImporter:
+    """Streams contacts from a CSV file into the contacts table.
+
+    The file is parsed ``chunk_size`` rows at a time and each chunk is
+    validated and upserted with one executemany, all inside a single
+    transaction, so memory stays bounded and a large list costs one commit
+    instead of one per contact. Progress, row errors and the imported
+    contacts are reported after every chunk.
+    """
+
+    def __init__(self, db_manager, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.db_manager = db_manager
+        self.chunk_size = max(1, int(chunk_size))
+        self.logger = logging.getLogger(__name__)
+
+    def import_file(self, file_path: str, email_column: Union[int, str] = 'email',
+                    name_column: Union[int, str, None] = 'name', require_name: bool = False,
+                    on_progress: Optional[Callable[[int, int, int, List[str]], None]] = None,
+                    on_contacts: Optional[Callable[[List[Dict]], None]] = None,
+                    should_stop: Optional[Callable[[], bool]] = None) -> Tuple[int, List[str]]:
+        """Import contacts from a CSV file.
+
+        Columns are given by index or header name (case-insensitive).
+        ``on_progress(bytes_read, total_bytes, imported, new_errors)`` and
+        ``on_contacts(contacts)`` are called after each chunk is written.
+        Stopping keeps the contacts imported so far. Returns the number of
+        contacts imported and the row errors.
+        """
+        errors: List[str] = []
+        error_count = 0
+
+        try:
+            with open_csv(file_path) as csvfile:
+                total_bytes = os.fstat(csvfile.fileno()).st_size
+                reader = csv.reader(csvfile, delimiter=detect_delimiter(csvfile))
+                headers = next(reader, None)
+                if not headers:
+                    return 0, ["File error: CSV file is empty"]
+
+                email_index = find_column(headers, email_column)
+                if email_index is None:
+                    return 0, [f"File error: No '{email_column}' column"]
+                name_index = find_column(headers, name_column)
+                if name_index is None and require_name:
+                    return 0, [f"File error: No '{name_column}' column"]
+
+                keys = [column_key(header) for header in headers]
+                chunk_contacts: List[Dict] = []
+                chunk_errors: List[str] = []
+
+                def add_error(message):
+                    nonlocal error_count
+                    error_count += 1
+                    if error_count <= MAX_REPORTED_ERRORS:
+                        chunk_errors.append(message)
+
+                def iter_chunks():
+                    rows = []
+                    for row_num, row in enumerate(reader, start=2):
+                        email = row[email_index].strip() if email_index < len(row) else ''
+                        name = ''
+                        if name_index is not None and name_index < len(row):
+                            name = row[name_index].strip()
+
+                        if not email or (require_name and not name):
+                            if any(cell.strip() for cell in row):
+                                add_error(f"Row {row_num}: Missing name or email"
+                                          if require_name else f"Row {row_num}: Missing email")
+                        elif not EMAIL_PATTERN.match(email):
+                            add_error(f"Row {row_num}: Invalid email format: {email}")
+                        else:
+                            # Every column stays available as a placeholder
+                            additional_data = {
+                                keys[idx]: cell.strip() for idx, cell in enumerate(row)
+                                if idx < len(keys) and cell.strip()
+                            }
+                            rows.append((name, email, additional_data))
+                            if on_contacts:
+                                chunk_contacts.append({**additional_data, 'email': email, 'name': name})
+
+                        if (row_num - 1) % self.chunk_size == 0:
+                            yield rows
+                            rows = []
+                            if should_stop and should_stop():
+                                return
+                    yield rows
+
+                def report(imported):
+                    if on_progress:
+                        # The binary buffer position stays readable while
+                        # the text layer is being iterated
+                        on_progress(min(csvfile.buffer.tell(), total_bytes), total_bytes,
+                                    imported, list(chunk_errors))
+                    if on_contacts and chunk_contacts:
+                        on_contacts(list(chunk_contacts))
+                    errors.extend(chunk_errors)
+                    chunk_errors.clear()
+                    chunk_contacts.clear()
+
+                imported = self.db_manager.upsert_contacts(iter_chunks(), on_chunk=report)
+
+        except Exception as e:
+            self.logger.error(f"Error importing contacts from {file_path}: {e}")
+            errors.append(f"File error: {str(e)}")
+            return 0, errors
+
+        if error_count > len(errors):
+            errors.append(f"... and {error_count - len(errors)} more errors")
+        return imported, errors
+
+def scan_contacts_file(file_path: str, email_column: int, chunk_size: int = IMPORT_CHUNK_SIZE,
+                       on_progress: Optional[Callable[[Dict, List[str]], None]] = None,
+                       should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+    """Count rows, duplicate and invalid addresses in a CSV file.
+
+    Reads the whole file without touching the database.
+    ``on_progress(stats, new_errors)`` is called every ``chunk_size`` rows
+    with the running totals. Duplicates are detected by case-insensitive
+    email hash, so memory stays small even for very large files.
+    Returns the final stats: rows, valid, duplicates, invalid, missing,
+    bytes_read, total_bytes and complete.
+    """
+    stats = {'rows': 0, 'valid': 0, 'duplicates': 0, 'invalid': 0, 'missing': 0,
+             'bytes_read': 0, 'total_bytes': 0, 'complete': False}
+    seen = set()
+    new_errors: List[str] = []
+    error_count = 0
+
+    def report():
+        stats['bytes_read'] = min(csvfile.buffer.tell(), stats['total_bytes'])
+        if on_progress:
+            on_progress(dict(stats), list(new_errors))
+        new_errors.clear()
+
+    with open_csv(file_path) as csvfile:
+        stats['total_bytes'] = os.fstat(csvfile.fileno()).st_size
+        reader = csv.reader(csvfile, delimiter=detect_delimiter(csvfile))
+        next(reader, None)
+
+        for row_num, row in enumerate(reader, start=2):
+            stats['rows'] += 1
+            email = row[email_column].strip() if email_column < len(row) else ''
+
+            problem = None
+            if not email:
+                stats['missing'] += 1
+                if any(cell.strip() for cell in row):
+                    problem = f"Row {row_num}: Missing email"
+            elif not EMAIL_PATTERN.match(email):
+                stats['invalid'] += 1
+                problem = f"Row {row_num}: Invalid email format: {email}"
+            else:
+                key = hash(email.lower())
+                if key in seen:
+                    stats['duplicates'] += 1
+                    problem = f"Row {row_num}: Duplicate email: {email}"
+                else:
+                    seen.add(key)
+                    stats['valid'] += 1
+
+            if problem:
+                error_count += 1
+                if error_count <= MAX_REPORTED_ERRORS:
+                    new_errors.append(problem)
+
+            if stats['rows'] % chunk_size == 0:
+                report()
+                if should_stop and should_stop():
+                    return stats
+
+        stats['complete'] = True
+        report()
+
+    return stats
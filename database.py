@@ -1,14 +1,273 @@
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime, time, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from cryptography.fernet import Fernet
 import base64
 import os
 
+from log_writer import EmailLogWriter
+
+# Schema changes applied on top of the tables created by init_database.
+# Migration N brings the database to PRAGMA user_version N; append new
+# entries, never edit applied ones.
+SCHEMA_MIGRATIONS: List[List[str]] = [
+    # 1: indexes for log listing/filtering and schedule lookups
+    [
+        'CREATE INDEX IF NOT EXISTS idx_email_logs_sent_at ON email_logs (sent_at)',
+        'CREATE INDEX IF NOT EXISTS idx_email_logs_status_sent_at ON email_logs (status, sent_at)',
+        'CREATE INDEX IF NOT EXISTS idx_email_logs_recipient ON email_logs (recipient_email)',
+        'CREATE INDEX IF NOT EXISTS idx_email_logs_template ON email_logs (template_id)',
+        'CREATE INDEX IF NOT EXISTS idx_scheduled_emails_active_next_run ON scheduled_emails (is_active, next_run)',
+        'CREATE INDEX IF NOT EXISTS idx_auto_reply_rules_active ON auto_reply_rules (is_active)',
+    ],
+    # 2: email_stats, hourly send counters kept in step with email_logs
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS email_stats (
+            hour TEXT NOT NULL,
+            status TEXT NOT NULL,
+            template_id INTEGER NOT NULL DEFAULT 0,
+            sender_email TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, status, template_id, sender_email)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_logs_stats_insert AFTER INSERT ON email_logs
+        BEGIN
+            INSERT INTO email_stats (hour, status, template_id, sender_email, count)
+            VALUES (strftime('%Y-%m-%d %H:00:00', NEW.sent_at), NEW.status,
+                    COALESCE(NEW.template_id, 0), NEW.sender_email, 1)
+            ON CONFLICT (hour, status, template_id, sender_email)
+            DO UPDATE SET count = count + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_logs_stats_delete AFTER DELETE ON email_logs
+        BEGIN
+            UPDATE email_stats SET count = count - 1
+            WHERE hour = strftime('%Y-%m-%d %H:00:00', OLD.sent_at) AND status = OLD.status
+              AND template_id = COALESCE(OLD.template_id, 0) AND sender_email = OLD.sender_email;
+            DELETE FROM email_stats
+            WHERE hour = strftime('%Y-%m-%d %H:00:00', OLD.sent_at) AND status = OLD.status
+              AND template_id = COALESCE(OLD.template_id, 0) AND sender_email = OLD.sender_email
+              AND count <= 0;
+        END
+        ''',
+        '''
+        INSERT INTO email_stats (hour, status, template_id, sender_email, count)
+        SELECT strftime('%Y-%m-%d %H:00:00', sent_at), status, COALESCE(template_id, 0),
+               sender_email, COUNT(*)
+        FROM email_logs
+        WHERE true
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (hour, status, template_id, sender_email)
+        DO UPDATE SET count = excluded.count
+        ''',
+    ],
+    # 3: full-text index over email logs, kept in sync by triggers
+    [
+        '''
+        CREATE VIEW IF NOT EXISTS email_logs_search AS
+        SELECT el.id, el.subject, el.body, el.recipient_email, et.name AS template_name
+        FROM email_logs el
+        LEFT JOIN email_templates et ON el.template_id = et.id
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS email_logs_fts USING fts5 (
+            subject, body, recipient_email, template_name,
+            content='email_logs_search', content_rowid='id', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_logs_fts_insert AFTER INSERT ON email_logs
+        BEGIN
+            INSERT INTO email_logs_fts (rowid, subject, body, recipient_email, template_name)
+            VALUES (NEW.id, NEW.subject, NEW.body, NEW.recipient_email,
+                    (SELECT name FROM email_templates WHERE id = NEW.template_id));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_logs_fts_delete AFTER DELETE ON email_logs
+        BEGIN
+            INSERT INTO email_logs_fts (email_logs_fts, rowid, subject, body, recipient_email, template_name)
+            VALUES ('delete', OLD.id, OLD.subject, OLD.body, OLD.recipient_email,
+                    (SELECT name FROM email_templates WHERE id = OLD.template_id));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_logs_fts_update AFTER UPDATE ON email_logs
+        BEGIN
+            INSERT INTO email_logs_fts (email_logs_fts, rowid, subject, body, recipient_email, template_name)
+            VALUES ('delete', OLD.id, OLD.subject, OLD.body, OLD.recipient_email,
+                    (SELECT name FROM email_templates WHERE id = OLD.template_id));
+            INSERT INTO email_logs_fts (rowid, subject, body, recipient_email, template_name)
+            VALUES (NEW.id, NEW.subject, NEW.body, NEW.recipient_email,
+                    (SELECT name FROM email_templates WHERE id = NEW.template_id));
+        END
+        ''',
+        # Template renames and deletes change the indexed name of their logs
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_templates_fts_rename AFTER UPDATE OF name ON email_templates
+        WHEN OLD.name IS NOT NEW.name
+        BEGIN
+            INSERT INTO email_logs_fts (email_logs_fts, rowid, subject, body, recipient_email, template_name)
+            SELECT 'delete', id, subject, body, recipient_email, OLD.name
+            FROM email_logs WHERE template_id = OLD.id;
+            INSERT INTO email_logs_fts (rowid, subject, body, recipient_email, template_name)
+            SELECT id, subject, body, recipient_email, NEW.name
+            FROM email_logs WHERE template_id = NEW.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_templates_fts_delete AFTER DELETE ON email_templates
+        BEGIN
+            INSERT INTO email_logs_fts (email_logs_fts, rowid, subject, body, recipient_email, template_name)
+            SELECT 'delete', id, subject, body, recipient_email, OLD.name
+            FROM email_logs WHERE template_id = OLD.id;
+            INSERT INTO email_logs_fts (rowid, subject, body, recipient_email, template_name)
+            SELECT id, subject, body, recipient_email, NULL
+            FROM email_logs WHERE template_id = OLD.id;
+        END
+        ''',
+        "INSERT INTO email_logs_fts (email_logs_fts) VALUES ('rebuild')",
+    ],
+    # 4: full-text index over email templates
+    [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS email_templates_fts USING fts5 (
+            name, subject, body,
+            content='email_templates', content_rowid='id', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_templates_fts_insert AFTER INSERT ON email_templates
+        BEGIN
+            INSERT INTO email_templates_fts (rowid, name, subject, body)
+            VALUES (NEW.id, NEW.name, NEW.subject, NEW.body);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_templates_fts_remove AFTER DELETE ON email_templates
+        BEGIN
+            INSERT INTO email_templates_fts (email_templates_fts, rowid, name, subject, body)
+            VALUES ('delete', OLD.id, OLD.name, OLD.subject, OLD.body);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS email_templates_fts_update AFTER UPDATE ON email_templates
+        BEGIN
+            INSERT INTO email_templates_fts (email_templates_fts, rowid, name, subject, body)
+            VALUES ('delete', OLD.id, OLD.name, OLD.subject, OLD.body);
+            INSERT INTO email_templates_fts (rowid, name, subject, body)
+            VALUES (NEW.id, NEW.name, NEW.subject, NEW.body);
+        END
+        ''',
+        "INSERT INTO email_templates_fts (email_templates_fts) VALUES ('rebuild')",
+    ],
+    # 5: per-folder IMAP sync checkpoints
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS mailbox_sync_state (
+            account_email TEXT NOT NULL,
+            folder TEXT NOT NULL,
+            uidvalidity INTEGER NOT NULL,
+            last_uid INTEGER NOT NULL DEFAULT 0,
+            highest_modseq INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (account_email, folder)
+        ) WITHOUT ROWID
+        ''',
+    ],
+    # 6: local cache of synced message metadata for the inbox view
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS mailbox_messages (
+            account_email TEXT NOT NULL,
+            folder TEXT NOT NULL,
+            uid INTEGER NOT NULL,
+            message_id TEXT,
+            sender TEXT,
+            subject TEXT,
+            sent_at TEXT,
+            size INTEGER,
+            flags TEXT,
+            snippet TEXT,
+            status TEXT NOT NULL DEFAULT 'received',
+            auto_reply_sent BOOLEAN NOT NULL DEFAULT 0,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (account_email, folder, uid)
+        ) WITHOUT ROWID
+        ''',
+    ],
+    # 7: UIDs below the sync checkpoint that are still to be processed
+    [
+        'ALTER TABLE mailbox_sync_state ADD COLUMN pending_uids TEXT',
+    ],
+]
+
+# Search terms whose template matches are kept in memory
+TEMPLATE_TERM_CACHE_SIZE = 256
+
+# Page cache per connection in KiB (negative cache_size means KiB, not pages)
+CACHE_SIZE_KB = 16 * 1024
+
+def _to_utc(value: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC, the format of stored timestamps"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _on_utc_hour(value: Optional[datetime]) -> bool:
+    """Check whether a range bound falls on a UTC hour, as email_stats does"""
+    if value is None:
+        return True
+    value = _to_utc(value)
+    return (value.minute, value.second, value.microsecond) == (0, 0, 0)
+
+def _fts_query(text: str) -> str:
+    """Build an FTS5 query matching every search term as a prefix.
+    
+    Terms are quoted so user input is never parsed as FTS5 syntax.
+    """
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+class ThreadConnection(sqlite3.Connection):
+    """Connection kept open for the lifetime of its thread.
+
+    Callers still follow the open/commit/close pattern, so ``close`` only
+    rolls back a transaction left unfinished by the outermost caller; a
+    helper called while its caller has uncommitted writes leaves them
+    alone. ``DatabaseManager.close`` really closes the connection.
+    """
+
+    # Callers currently using the connection, counted by get_connection
+    depth = 0
+
+    def close(self):
+        self.depth = max(0, self.depth - 1)
+        if self.depth == 0 and self.in_transaction:
+            self.rollback()
+
+    def close_connection(self):
+        """Close the underlying SQLite connection"""
+        sqlite3.Connection.close(self)
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "email_bot.db"):
+    def __init__(self, db_path: str = "email_bot.db", cache_size_kb: int = CACHE_SIZE_KB):
         self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self._connections: Dict[int, Tuple[weakref.ref, ThreadConnection]] = {}
+        self._connections_lock = threading.Lock()
+        self.log_writer = EmailLogWriter(self)
+        self._template_terms: OrderedDict = OrderedDict()
+        self._template_terms_generation = 0
+        self._template_terms_lock = threading.Lock()
         self.encryption_key = self._get_or_create_key()
         self.cipher_suite = Fernet(self.encryption_key)
         self.init_database()
@@ -34,10 +293,73 @@ class DatabaseManager:
         return self.cipher_suite.decrypt(encrypted_data.encode()).decode()
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+        """Get the calling thread's database connection.
+
+        Each thread reuses one connection in WAL mode, so UI readers don't
+        block writers in the send path and no call pays the connect cost.
+        """
+        thread = threading.current_thread()
+        with self._connections_lock:
+            entry = self._connections.get(thread.ident)
+            if entry and entry[0]() is thread:
+                conn = entry[1]
+                if conn.in_transaction:
+                    # Nested in a caller with uncommitted writes, keep them
+                    conn.depth += 1
+                else:
+                    # Nothing pending, so no caller is mid-transaction
+                    conn.depth = 1
+                return conn
+
+            stale = self._prune_connections()
+            conn = self._open_connection()
+            conn.depth = 1
+            self._connections[thread.ident] = (weakref.ref(thread), conn)
+
+        for old in stale:
+            old.close_connection()
+        return conn
+
+    def _open_connection(self) -> ThreadConnection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(self.db_path, timeout=30, factory=ThreadConnection,
+                               check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
         return conn
+
+    def _prune_connections(self) -> List[ThreadConnection]:
+        """Forget connections of finished threads. Caller holds the lock."""
+        stale = []
+        for ident, (thread_ref, conn) in list(self._connections.items()):
+            thread = thread_ref()
+            if thread is None or not thread.is_alive():
+                stale.append(conn)
+                del self._connections[ident]
+        return stale
+
+    def close(self):
+        """Write pending email logs and close every open connection"""
+        self.log_writer.close()
+
+        with self._connections_lock:
+            connections = [conn for _, conn in self._connections.values()]
+            self._connections.clear()
+
+        for conn in connections:
+            try:
+                conn.close_connection()
+            except sqlite3.Error:
+                pass
+
+    def connect(self):
+        """Reopen the database after close(), e.g. when a backup was restored"""
+        self.init_database()
+        self.log_writer = EmailLogWriter(self)
+        self._invalidate_template_search()
     
     def init_database(self):
         """Initialize database tables"""
@@ -143,8 +465,25 @@ class DatabaseManager:
         ''')
         
         conn.commit()
+        self._migrate(conn)
         conn.close()
     
+    def _migrate(self, conn: sqlite3.Connection):
+        """Apply schema migrations newer than the database's user_version"""
+        cursor = conn.cursor()
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        
+        for target in range(version + 1, len(SCHEMA_MIGRATIONS) + 1):
+            cursor.execute('BEGIN')
+            try:
+                for statement in SCHEMA_MIGRATIONS[target - 1]:
+                    cursor.execute(statement)
+                cursor.execute(f'PRAGMA user_version = {target}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    
     # Email Accounts Methods
     def add_email_account(self, name: str, email: str, smtp_server: str, smtp_port: int,
                          imap_server: str, imap_port: int, password: str) -> int:
@@ -152,16 +491,21 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        encrypted_password = self.encrypt_data(password)
-        
-        cursor.execute('''
-            INSERT INTO email_accounts (name, email, smtp_server, smtp_port, imap_server, imap_port, password)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (name, email, smtp_server, smtp_port, imap_server, imap_port, encrypted_password))
-        
-        account_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            encrypted_password = self.encrypt_data(password)
+            
+            cursor.execute('''
+                INSERT INTO email_accounts (name, email, smtp_server, smtp_port, imap_server, imap_port, password)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (name, email, smtp_server, smtp_port, imap_server, imap_port, encrypted_password))
+            
+            account_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         return account_id
     
     def get_email_accounts(self) -> List[Dict]:
@@ -190,14 +534,20 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO email_templates (name, subject, body, is_html)
-            VALUES (?, ?, ?, ?)
-        ''', (name, subject, body, is_html))
-        
-        template_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute('''
+                INSERT INTO email_templates (name, subject, body, is_html)
+                VALUES (?, ?, ?, ?)
+            ''', (name, subject, body, is_html))
+            
+            template_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._invalidate_template_search()
         return template_id
     
     def get_email_templates(self) -> List[Dict]:
@@ -227,41 +577,124 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            UPDATE email_templates 
-            SET name = ?, subject = ?, body = ?, is_html = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (name, subject, body, is_html, template_id))
-        
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute('''
+                UPDATE email_templates 
+                SET name = ?, subject = ?, body = ?, is_html = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (name, subject, body, is_html, template_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._invalidate_template_search()
     
     def delete_email_template(self, template_id: int):
         """Delete email template"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('DELETE FROM email_templates WHERE id = ?', (template_id,))
+        try:
+            cursor.execute('DELETE FROM email_templates WHERE id = ?', (template_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._invalidate_template_search()
+    
+    def search_email_templates(self, query: str) -> List[int]:
+        """Get ids of templates matching every search term, best matches first.
         
-        conn.commit()
-        conn.close()
+        Terms match word prefixes in name, subject and body. Matches per
+        term come from the FTS index and stay cached in memory until a
+        template changes, so refining a query while typing only looks up
+        the term being edited.
+        """
+        scores = None
+        for term in query.split():
+            matches = self._template_term_matches(term.lower())
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {template_id: score + matches[template_id]
+                          for template_id, score in scores.items() if template_id in matches}
+            if not scores:
+                return []
+        
+        if scores is None:
+            return []
+        # bm25 scores are negative, lower is better
+        return sorted(scores, key=lambda template_id: (scores[template_id], template_id))
     
-    # Email Logs Methods
-    def add_email_log(self, sender_email: str, recipient_email: str, subject: str, 
-                     body: str, status: str, error_message: str = None, template_id: int = None) -> int:
-        """Add email log entry"""
+    def _template_term_matches(self, term: str) -> Dict[int, float]:
+        """Get bm25 score per template matching one search term"""
+        with self._template_terms_lock:
+            matches = self._template_terms.get(term)
+            if matches is not None:
+                self._template_terms.move_to_end(term)
+                return matches
+            generation = self._template_terms_generation
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Name matches weigh most, then subject, then body
         cursor.execute('''
-            INSERT INTO email_logs (sender_email, recipient_email, subject, body, status, error_message, template_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (sender_email, recipient_email, subject, body, status, error_message, template_id))
+            SELECT rowid, bm25(email_templates_fts, 10.0, 5.0, 1.0)
+            FROM email_templates_fts
+            WHERE email_templates_fts MATCH ?
+        ''', (_fts_query(term),))
+        matches = dict(cursor.fetchall())
         
-        log_id = cursor.lastrowid
-        conn.commit()
         conn.close()
-        return log_id
+        
+        with self._template_terms_lock:
+            if generation != self._template_terms_generation:
+                # Templates changed during the query, don't cache
+                return matches
+            self._template_terms[term] = matches
+            while len(self._template_terms) > TEMPLATE_TERM_CACHE_SIZE:
+                self._template_terms.popitem(last=False)
+        return matches
+    
+    def _invalidate_template_search(self):
+        """Forget cached template search terms after templates change"""
+        with self._template_terms_lock:
+            self._template_terms.clear()
+            self._template_terms_generation += 1
+    
+    # Email Logs Methods
+    def add_email_log(self, sender_email: str, recipient_email: str, subject: str, 
+                     body: str, status: str, error_message: str = None, template_id: int = None):
+        """Queue email log entry, written in a batch by the log writer"""
+        sent_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.log_writer.add((sender_email, recipient_email, subject, body, status,
+                             error_message, template_id, sent_at))
+    
+    def add_email_logs(self, rows: List[Tuple]):
+        """Insert email log rows in a single transaction"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                INSERT INTO email_logs (sender_email, recipient_email, subject, body, status, error_message, template_id, sent_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def flush_email_logs(self, timeout: float = None) -> bool:
+        """Wait until queued email logs are written"""
+        return self.log_writer.flush(timeout)
     
     def get_email_logs(self, limit: int = 100) -> List[Dict]:
         """Get email logs"""
@@ -281,24 +714,320 @@ class DatabaseManager:
         conn.close()
         return logs
     
-    # Contacts Methods
-    def add_contact(self, name: str, email: str, additional_data: Dict = None) -> int:
-        """Add new contact"""
+    def get_email_stats(self, interval: str = 'day', since: datetime = None, until: datetime = None,
+                        status: str = None, template_id: int = None,
+                        sender_email: str = None) -> List[Dict]:
+        """Get email counts per hour or day from the email_stats counters.
+        
+        Periods are UTC, formatted 'YYYY-MM-DD HH:00:00' for hours and
+        'YYYY-MM-DD' for days. ``since``/``until`` are aware datetimes or
+        naive UTC ones, rounded down to the hour.
+        """
+        period = 'hour' if interval == 'hour' else 'substr(hour, 1, 10)'
+        where, params = self._email_stats_filters(since, until, status, template_id, sender_email)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {period} AS period, status, SUM(count) AS count
+            FROM email_stats
+            {where}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        ''', params)
+        series = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        return series
+    
+    def get_email_stats_totals(self, since: datetime = None, until: datetime = None,
+                               template_id: int = None, sender_email: str = None) -> Dict[str, int]:
+        """Get email counts per status from the email_stats counters"""
+        where, params = self._email_stats_filters(since, until, None, template_id, sender_email)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        additional_json = json.dumps(additional_data) if additional_data else None
+        cursor.execute(f'SELECT status, SUM(count) FROM email_stats {where} GROUP BY status', params)
+        totals = dict(cursor.fetchall())
+        
+        conn.close()
+        return totals
+    
+    def _email_stats_filters(self, since, until, status, template_id, sender_email) -> Tuple[str, List]:
+        """Build the WHERE clause shared by the email_stats queries"""
+        conditions = []
+        params = []
+        
+        for value, condition in ((since, 'hour >= ?'), (until, 'hour < ?')):
+            if value is not None:
+                conditions.append(condition)
+                params.append(_to_utc(value).strftime('%Y-%m-%d %H:00:00'))
+        if status is not None:
+            conditions.append('status = ?')
+            params.append(status)
+        if template_id is not None:
+            conditions.append('template_id = ?')
+            params.append(template_id)
+        if sender_email is not None:
+            conditions.append('sender_email = ?')
+            params.append(sender_email)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return where, params
+    
+    def get_dashboard_stats(self) -> Dict:
+        """Get dashboard counters from email_stats and table counts"""
+        # The dashboard's "today" starts at local midnight, which is not on
+        # a UTC hour in half-hour zones; count_email_logs handles both
+        today_start = datetime.combine(datetime.now().date(), time()).astimezone(timezone.utc)
+        totals = self.get_email_stats_totals()
+        today = self.count_email_logs({'since': today_start})
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT OR REPLACE INTO contacts (name, email, additional_data)
-            VALUES (?, ?, ?)
-        ''', (name, email, additional_json))
+            SELECT
+                (SELECT COUNT(*) FROM email_templates),
+                (SELECT COUNT(*) FROM scheduled_emails WHERE is_active = 1),
+                (SELECT COUNT(*) FROM contacts)
+        ''')
+        templates, active_schedules, contacts = cursor.fetchone()
+        
+        conn.close()
+        return {
+            'total_emails': sum(totals.values()),
+            'sent_today': today.get('sent', 0),
+            'failed_today': today.get('failed', 0),
+            'templates': templates,
+            'active_schedules': active_schedules,
+            'contacts': contacts,
+        }
+    
+    def query_email_logs(self, filters: Dict = None, after_cursor: Tuple = None,
+                         limit: int = 100, include_body: bool = False) -> Tuple[List[Dict], Optional[Tuple]]:
+        """Get one page of email logs, newest first.
+        
+        ``filters`` may hold status, template_id, sender_email, since and
+        until (aware or naive UTC datetimes) and search text. Returns the
+        rows and the cursor to pass as ``after_cursor`` for the next page,
+        or None after the last page.
+        """
+        conditions, params = self._email_log_filters(filters)
+        if after_cursor is not None:
+            conditions.append('(el.sent_at, el.id) < (?, ?)')
+            params.extend(after_cursor)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        body = ', el.body' if include_body else ''
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT el.id, el.sender_email, el.recipient_email, el.subject, el.status,
+                   el.error_message, el.sent_at, el.template_id, et.name as template_name{body}
+            FROM email_logs el
+            LEFT JOIN email_templates et ON el.template_id = et.id
+            {where}
+            ORDER BY el.sent_at DESC, el.id DESC
+            LIMIT ?
+        ''', params + [limit])
+        
+        logs = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        next_cursor = (logs[-1]['sent_at'], logs[-1]['id']) if len(logs) == limit else None
+        return logs, next_cursor
+    
+    def search_email_logs(self, query: str, filters: Dict = None, after_cursor: Tuple = None,
+                          limit: int = 100) -> Tuple[List[Dict], Optional[Tuple]]:
+        """Full-text search email logs, best matches first.
+        
+        Matches subject, body, recipient and template name by word prefix
+        and ranks with bm25. Other ``filters`` apply as in
+        query_email_logs, as does the returned cursor. An empty query
+        is no search and pages like query_email_logs.
+        """
+        filters = dict(filters or {})
+        filters.pop('search', None)
+        if not query or not query.strip():
+            return self.query_email_logs(filters, after_cursor, limit)
+        conditions, params = self._email_log_filters(filters)
+        if after_cursor is not None:
+            conditions.append('(f.rank, el.id) > (?, ?)')
+            params.extend(after_cursor)
+        where = f"AND {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT el.id, el.sender_email, el.recipient_email, el.subject, el.status,
+                   el.error_message, el.sent_at, el.template_id, et.name as template_name,
+                   f.rank
+            FROM (SELECT rowid, rank FROM email_logs_fts WHERE email_logs_fts MATCH ?) f
+            JOIN email_logs el ON el.id = f.rowid
+            LEFT JOIN email_templates et ON el.template_id = et.id
+            WHERE 1 {where}
+            ORDER BY f.rank, el.id
+            LIMIT ?
+        ''', [_fts_query(query)] + params + [limit])
+        
+        logs = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        next_cursor = (logs[-1]['rank'], logs[-1]['id']) if len(logs) == limit else None
+        return logs, next_cursor
+    
+    def count_email_logs(self, filters: Dict = None) -> Dict[str, int]:
+        """Count email logs matching query_email_logs filters, per status"""
+        filters = filters or {}
+        since = filters.get('since')
+        until = filters.get('until')
+        
+        # Without text search the hourly counters answer exactly, as long
+        # as the date range falls on UTC hour boundaries
+        if not (filters.get('search') or '').strip() and _on_utc_hour(since) and _on_utc_hour(until):
+            totals = self.get_email_stats_totals(since, until, filters.get('template_id'),
+                                                 filters.get('sender_email'))
+            if filters.get('status'):
+                return {filters['status']: totals.get(filters['status'], 0)}
+            return totals
+        
+        conditions, params = self._email_log_filters(filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT el.status, COUNT(*)
+            FROM email_logs el
+            LEFT JOIN email_templates et ON el.template_id = et.id
+            {where}
+            GROUP BY el.status
+        ''', params)
+        counts = dict(cursor.fetchall())
+        
+        conn.close()
+        return counts
+    
+    def _email_log_filters(self, filters: Dict) -> Tuple[List[str], List]:
+        """Build the conditions shared by query_email_logs and count_email_logs"""
+        filters = filters or {}
+        conditions = []
+        params = []
+        
+        if filters.get('status'):
+            conditions.append('el.status = ?')
+            params.append(filters['status'])
+        if filters.get('template_id') is not None:
+            conditions.append('el.template_id = ?')
+            params.append(filters['template_id'])
+        if filters.get('sender_email'):
+            conditions.append('el.sender_email = ?')
+            params.append(filters['sender_email'])
+        if filters.get('since') is not None:
+            conditions.append('el.sent_at >= ?')
+            params.append(_to_utc(filters['since']).strftime('%Y-%m-%d %H:%M:%S'))
+        if filters.get('until') is not None:
+            conditions.append('el.sent_at < ?')
+            params.append(_to_utc(filters['until']).strftime('%Y-%m-%d %H:%M:%S'))
+        if filters.get('search') and filters['search'].strip():
+            conditions.append('el.id IN (SELECT rowid FROM email_logs_fts WHERE email_logs_fts MATCH ?)')
+            params.append(_fts_query(filters['search']))
+        
+        return conditions, params
+    
+    def get_email_log(self, log_id: int) -> Optional[Dict]:
+        """Get specific email log including its body"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT el.*, et.name as template_name
+            FROM email_logs el
+            LEFT JOIN email_templates et ON el.template_id = et.id
+            WHERE el.id = ?
+        ''', (log_id,))
+        row = cursor.fetchone()
         
-        contact_id = cursor.lastrowid
-        conn.commit()
         conn.close()
+        return dict(row) if row else None
+    
+    def get_email_log_senders(self) -> List[str]:
+        """Get sender addresses that appear in the email logs"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT DISTINCT sender_email FROM email_stats ORDER BY sender_email')
+        senders = [row[0] for row in cursor.fetchall()]
+        
+        conn.close()
+        return senders
+    
+    # Contacts Methods
+    def add_contact(self, name: str, email: str, additional_data: Dict = None) -> int:
+        """Add new contact"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            additional_json = json.dumps(additional_data) if additional_data else None
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO contacts (name, email, additional_data)
+                VALUES (?, ?, ?)
+            ''', (name, email, additional_json))
+            
+            contact_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         return contact_id
     
+    def upsert_contacts(self, chunks: Iterable[List[Tuple]],
+                        on_chunk: Optional[Callable[[int], None]] = None) -> int:
+        """Insert or update contacts by email in a single transaction.
+        
+        ``chunks`` yields lists of (name, email, additional_data) rows, each
+        written with one executemany; ``on_chunk`` gets the running total
+        after every chunk. Nothing is committed if a chunk fails.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        total = 0
+        
+        try:
+            for rows in chunks:
+                if rows:
+                    cursor.executemany('''
+                        INSERT INTO contacts (name, email, additional_data)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT(email) DO UPDATE SET
+                            name = excluded.name,
+                            additional_data = excluded.additional_data
+                    ''', [
+                        (name, email, json.dumps(additional_data) if additional_data else None)
+                        for name, email, additional_data in rows
+                    ])
+                    total += len(rows)
+                if on_chunk:
+                    on_chunk(total)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        return total
+    
     def get_contacts(self) -> List[Dict]:
         """Get all contacts"""
         conn = self.get_connection()
@@ -322,17 +1051,22 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        recipients_json = json.dumps(recipients)
-        schedule_data_json = json.dumps(schedule_data)
-        
-        cursor.execute('''
-            INSERT INTO scheduled_emails (name, template_id, recipients, schedule_type, schedule_data, next_run)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (name, template_id, recipients_json, schedule_type, schedule_data_json, next_run))
-        
-        schedule_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            recipients_json = json.dumps(recipients)
+            schedule_data_json = json.dumps(schedule_data)
+            
+            cursor.execute('''
+                INSERT INTO scheduled_emails (name, template_id, recipients, schedule_type, schedule_data, next_run)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (name, template_id, recipients_json, schedule_type, schedule_data_json, next_run))
+            
+            schedule_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         return schedule_id
     
     def get_scheduled_emails(self) -> List[Dict]:
@@ -364,16 +1098,21 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        keywords_json = json.dumps(keywords)
-        
-        cursor.execute('''
-            INSERT INTO auto_reply_rules (name, keywords, template_id)
-            VALUES (?, ?, ?)
-        ''', (name, keywords_json, template_id))
-        
-        rule_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            keywords_json = json.dumps(keywords)
+            
+            cursor.execute('''
+                INSERT INTO auto_reply_rules (name, keywords, template_id)
+                VALUES (?, ?, ?)
+            ''', (name, keywords_json, template_id))
+            
+            rule_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         return rule_id
     
     def get_auto_reply_rules(self) -> List[Dict]:
@@ -404,14 +1143,19 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO attachments (filename, file_path, sender_email, file_size, mime_type)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (filename, file_path, sender_email, file_size, mime_type))
-        
-        attachment_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute('''
+                INSERT INTO attachments (filename, file_path, sender_email, file_size, mime_type)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (filename, file_path, sender_email, file_size, mime_type))
+            
+            attachment_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         return attachment_id
     
     def get_attachments(self, limit: int = 100) -> List[Dict]:
@@ -428,4 +1172,186 @@ class DatabaseManager:
         attachments = [dict(row) for row in cursor.fetchall()]
         
         conn.close()
-        return attachments
\ No newline at end of file
+        return attachments
+    
+    # Mailbox Sync Methods
+    def get_mailbox_sync_state(self, account_email: str, folder: str) -> Optional[Dict]:
+        """Get the sync checkpoint of a mailbox folder"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM mailbox_sync_state WHERE account_email = ? AND folder = ?
+        ''', (account_email, folder))
+        
+        row = cursor.fetchone()
+        conn.close()
+        if not row:
+            return None
+        
+        state = dict(row)
+        state['pending_uids'] = [int(uid) for uid in (state['pending_uids'] or '').split()]
+        return state
+    
+    def save_mailbox_sync_state(self, account_email: str, folder: str, uidvalidity: int,
+                                last_uid: int, highest_modseq: int = None,
+                                pending_uids: Iterable[int] = ()):
+        """Store the sync checkpoint of a mailbox folder"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT INTO mailbox_sync_state (account_email, folder, uidvalidity, last_uid,
+                                                highest_modseq, pending_uids, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(account_email, folder) DO UPDATE SET
+                    uidvalidity = excluded.uidvalidity,
+                    last_uid = excluded.last_uid,
+                    highest_modseq = excluded.highest_modseq,
+                    pending_uids = excluded.pending_uids,
+                    updated_at = excluded.updated_at
+            ''', (account_email, folder, uidvalidity, last_uid, highest_modseq,
+                  ' '.join(map(str, sorted(pending_uids))) or None))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    # Mailbox Cache Methods
+    def save_mailbox_messages(self, account_email: str, folder: str, messages: List[Dict]):
+        """Insert or update cached message metadata, keeping processing state.
+        
+        Each message has uid, message_id, from, subject, sent_at, size,
+        flags and snippet.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                INSERT INTO mailbox_messages (account_email, folder, uid, message_id, sender,
+                                              subject, sent_at, size, flags, snippet)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(account_email, folder, uid) DO UPDATE SET
+                    message_id = excluded.message_id,
+                    sender = excluded.sender,
+                    subject = excluded.subject,
+                    sent_at = excluded.sent_at,
+                    size = excluded.size,
+                    flags = excluded.flags,
+                    snippet = excluded.snippet,
+                    synced_at = CURRENT_TIMESTAMP
+            ''', [
+                (account_email, folder, message['uid'], message['message_id'], message['from'],
+                 message['subject'], message['sent_at'], message['size'],
+                 ' '.join(message['flags']), message['snippet'])
+                for message in messages
+            ])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def set_mailbox_message_status(self, account_email: str, folder: str, uid: int,
+                                   status: str, auto_reply_sent: bool = False):
+        """Record how a cached message was processed"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE mailbox_messages SET status = ?, auto_reply_sent = ?
+                WHERE account_email = ? AND folder = ? AND uid = ?
+            ''', (status, auto_reply_sent, account_email, folder, uid))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def update_mailbox_message_flags(self, account_email: str, folder: str, uid: int,
+                                     flags: List[str]):
+        """Update the flags of a cached message"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE mailbox_messages SET flags = ?
+                WHERE account_email = ? AND folder = ? AND uid = ?
+            ''', (' '.join(flags), account_email, folder, uid))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def clear_mailbox_messages(self, account_email: str, folder: str):
+        """Drop the cached messages of a folder"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                DELETE FROM mailbox_messages WHERE account_email = ? AND folder = ?
+            ''', (account_email, folder))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def prune_mailbox_messages(self, account_email: str, folder: str, keep: int):
+        """Keep only the ``keep`` newest cached messages of a folder"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                DELETE FROM mailbox_messages
+                WHERE account_email = ? AND folder = ? AND uid <= (
+                    SELECT uid FROM mailbox_messages
+                    WHERE account_email = ? AND folder = ?
+                    ORDER BY uid DESC LIMIT 1 OFFSET ?
+                )
+            ''', (account_email, folder, account_email, folder, keep))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def get_mailbox_messages(self, account_email: str, folder: str = 'INBOX',
+                             limit: int = 50) -> List[Dict]:
+        """Get the newest cached messages of a folder, newest first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # Walks the primary key backwards, no sort needed
+        cursor.execute('''
+            SELECT uid AS id, message_id, sender AS "from", subject, sent_at AS date, size,
+                   flags, snippet AS body, status, auto_reply_sent
+            FROM mailbox_messages
+            WHERE account_email = ? AND folder = ?
+            ORDER BY uid DESC
+            LIMIT ?
+        ''', (account_email, folder, limit))
+        
+        messages = []
+        for row in cursor.fetchall():
+            message = dict(row)
+            message['flags'] = message['flags'].split() if message['flags'] else []
+            message['auto_reply_sent'] = bool(message['auto_reply_sent'])
+            messages.append(message)
+        
+        conn.close()
+        return messages
@@ -1,27 +1,38 @@
 import smtplib
 import imaplib
-import email
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-import ssl
 import os
+import binascii
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterable, Optional, Tuple, Callable, Union
 from datetime import datetime
 import logging
 from database import DatabaseManager
+from smtp_pool import SMTPConnectionPool
+from send_engine import TokenBucket, load_email_settings, send_concurrently
+from template_engine import compile_template
+from mime_skeleton import MIMESkeleton, build_attachment_part
+from contact_import import ContactImporter
+from imap_session import IMAPSession, parse_fetch_response
+from mailbox_sync import LISTING_ITEMS, summarize_message
+from inbox_supervisor import InboxSupervisor
 import threading
-import time
 
 class EmailHandler:
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
         self.logger = logging.getLogger(__name__)
-        self.monitoring = False
-        self.monitor_thread = None
+        self.inbox_supervisor = None
+        self.smtp_pool = SMTPConnectionPool()
+        self._rate_limiters = {}
+        self._rate_limiters_lock = threading.Lock()
         
+    @property
+    def monitoring(self) -> bool:
+        """Whether the inbox supervisor is running; False once it has failed"""
+        return self.inbox_supervisor is not None and self.inbox_supervisor.running
+    
     def test_connection(self, email_config: Dict) -> Tuple[bool, str]:
         """Test SMTP and IMAP connections"""
         try:
@@ -42,43 +53,18 @@ class EmailHandler:
     
     def send_email(self, sender_config: Dict, recipient: str, subject: str, 
                    body: str, is_html: bool = False, attachments: List[str] = None,
-                   template_id: int = None) -> Tuple[bool, str]:
-        """Send email"""
+                   template_id: int = None, skeleton: MIMESkeleton = None) -> Tuple[bool, str]:
+        """Send email
+        
+        ``skeleton`` carries pre-encoded attachments shared across a batch
+        and takes the place of ``attachments``.
+        """
         try:
-            # Create message
-            msg = MIMEMultipart()
-            msg['From'] = sender_config['email']
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            
-            # Add body
-            if is_html:
-                msg.attach(MIMEText(body, 'html'))
-            else:
-                msg.attach(MIMEText(body, 'plain'))
-            
-            # Add attachments
-            if attachments:
-                for file_path in attachments:
-                    if os.path.isfile(file_path):
-                        with open(file_path, "rb") as attachment:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(attachment.read())
-                        
-                        encoders.encode_base64(part)
-                        part.add_header(
-                            'Content-Disposition',
-                            f'attachment; filename= {os.path.basename(file_path)}'
-                        )
-                        msg.attach(part)
+            text = self._serialize_message(sender_config['email'], recipient, subject,
+                                           body, is_html, attachments, skeleton)
             
-            # Send email
-            server = smtplib.SMTP(sender_config['smtp_server'], sender_config['smtp_port'])
-            server.starttls()
-            server.login(sender_config['email'], sender_config['password'])
-            text = msg.as_string()
-            server.sendmail(sender_config['email'], recipient, text)
-            server.quit()
+            # Send email over a pooled session
+            self.smtp_pool.sendmail(sender_config, recipient, text)
             
             # Log success
             self.db_manager.add_email_log(
@@ -107,147 +93,195 @@ class EmailHandler:
             
             return False, error_msg
     
-    def send_batch_emails(self, sender_config: Dict, recipients: List[Dict], 
-                         template: Dict, attachments: List[str] = None) -> Dict:
-        """Send batch emails with personalization"""
+    def _serialize_message(self, sender_email: str, recipient: str, subject: str,
+                           body: str, is_html: bool = False, attachments: List[str] = None,
+                           skeleton: MIMESkeleton = None) -> Union[str, List]:
+        """Serialize message as segments that stream large attachments from disk"""
+        if skeleton is None:
+            skeleton = MIMESkeleton(attachments)
+        
+        segments = skeleton.render(sender_email, recipient, subject, body, is_html)
+        if segments is not None:
+            return segments
+        
+        return self._build_message(sender_email, recipient, subject,
+                                   body, is_html, attachments).as_string()
+    
+    def _build_message(self, sender_email: str, recipient: str, subject: str,
+                       body: str, is_html: bool = False,
+                       attachments: List[str] = None) -> MIMEMultipart:
+        """Build MIME message with body and attachments"""
+        # Create message
+        msg = MIMEMultipart()
+        msg['From'] = sender_email
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        
+        # Add body
+        if is_html:
+            msg.attach(MIMEText(body, 'html'))
+        else:
+            msg.attach(MIMEText(body, 'plain'))
+        
+        # Add attachments
+        if attachments:
+            for file_path in attachments:
+                if os.path.isfile(file_path):
+                    msg.attach(build_attachment_part(file_path))
+        
+        return msg
+    
+    def send_batch_emails(self, sender_config: Dict, recipients: Iterable[Dict], 
+                         template: Dict, attachments: List[str] = None,
+                         on_result: Callable[[Dict, bool, str], None] = None,
+                         should_stop: Callable[[], bool] = None,
+                         delay: float = None) -> Dict:
+        """Send batch emails with personalization over concurrent SMTP sessions.
+        
+        ``recipients`` is consumed lazily, so it can be a
+        recipient_source.CSVRecipientSource streaming a file too large to
+        load. ``on_result(recipient, success, message)`` is called for every
+        recipient as its send completes.
+        """
         results = {'sent': 0, 'failed': 0, 'errors': []}
         
-        for recipient in recipients:
-            try:
-                # Personalize subject and body
-                personalized_subject = self._personalize_text(template['subject'], recipient)
-                personalized_body = self._personalize_text(template['body'], recipient)
-                
-                success, message = self.send_email(
-                    sender_config=sender_config,
-                    recipient=recipient['email'],
-                    subject=personalized_subject,
-                    body=personalized_body,
-                    is_html=template['is_html'],
-                    attachments=attachments,
-                    template_id=template['id']
-                )
-                
-                if success:
-                    results['sent'] += 1
-                else:
-                    results['failed'] += 1
-                    results['errors'].append(f"{recipient['email']}: {message}")
-                    
-            except Exception as e:
+        settings = load_email_settings()
+        if delay is None:
+            delay = settings['default_delay']
+        rate_limiter = self._get_rate_limiter(sender_config, delay, settings['batch_size'])
+        
+        # Parse placeholders and encode attachments once for the whole batch
+        subject_template = compile_template(template['subject'])
+        body_template = compile_template(template['body'])
+        skeleton = MIMESkeleton(attachments)
+        
+        def send_one(recipient):
+            # Personalize subject and body
+            personalized_subject = subject_template.render(recipient)
+            personalized_body = body_template.render(recipient)
+            
+            return self.send_email(
+                sender_config=sender_config,
+                recipient=recipient['email'],
+                subject=personalized_subject,
+                body=personalized_body,
+                is_html=template['is_html'],
+                attachments=attachments,
+                template_id=template.get('id'),
+                skeleton=skeleton
+            )
+        
+        for recipient, success, message in send_concurrently(
+                send_one, recipients, sender_config.get('max_connections', 3),
+                rate_limiter, should_stop):
+            if success:
+                results['sent'] += 1
+            else:
                 results['failed'] += 1
-                results['errors'].append(f"{recipient['email']}: {str(e)}")
+                results['errors'].append(f"{recipient['email']}: {message}")
+            
+            if on_result:
+                on_result(recipient, success, message)
         
         return results
     
+    def _get_rate_limiter(self, sender_config: Dict, delay: float, batch_size: int) -> TokenBucket:
+        """Get the shared rate limiter for an account"""
+        rate = 1.0 / delay if delay and delay > 0 else 0
+        with self._rate_limiters_lock:
+            rate_limiter = self._rate_limiters.get(sender_config['email'])
+            if rate_limiter is None:
+                rate_limiter = TokenBucket(rate, batch_size)
+                self._rate_limiters[sender_config['email']] = rate_limiter
+            else:
+                rate_limiter.configure(rate, batch_size)
+        return rate_limiter
+    
+    def close_smtp_connections(self):
+        """Close pooled SMTP sessions"""
+        self.smtp_pool.close_all()
+    
     def _personalize_text(self, text: str, recipient: Dict) -> str:
         """Replace placeholders with recipient data"""
-        personalized = text
-        
-        # Replace common placeholders
-        for key, value in recipient.items():
-            placeholder = f"{{{key}}}"
-            personalized = personalized.replace(placeholder, str(value))
-        
-        return personalized
+        return compile_template(text).render(recipient)
     
-    def start_inbox_monitoring(self, email_config: Dict, check_interval: int = 60):
-        """Start monitoring inbox for new emails"""
+    def start_inbox_monitoring(self, email_config: Dict = None, check_interval: int = 60):
+        """Start monitoring the inbox of every active account.
+        
+        All accounts are served by one InboxSupervisor, which keeps an IDLE
+        session per account without a thread per account. ``email_config``
+        is watched too when it is not a stored account. Each message is
+        processed once, tracked by MailboxSync, which also keeps the local
+        mailbox cache read by the inbox view.
+        """
         if self.monitoring:
             return
+        if self.inbox_supervisor and not self.inbox_supervisor.stopped:
+            raise RuntimeError("Inbox monitoring is still stopping, try again shortly")
         
-        self.monitoring = True
-        self.monitor_thread = threading.Thread(
-            target=self._monitor_inbox,
-            args=(email_config, check_interval),
-            daemon=True
+        accounts = self.db_manager.get_email_accounts()
+        if email_config and all(a['email'] != email_config['email'] for a in accounts):
+            accounts.append(email_config)
+        
+        self.inbox_supervisor = InboxSupervisor(
+            self.db_manager,
+            lambda config, uid, flags, message: self._process_incoming_email(message, config),
+            check_interval
         )
-        self.monitor_thread.start()
-        self.logger.info("Inbox monitoring started")
+        self.inbox_supervisor.start(accounts)
+        self.logger.info(f"Inbox monitoring started for {len(accounts)} account(s)")
     
     def stop_inbox_monitoring(self):
         """Stop monitoring inbox"""
-        self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        if self.inbox_supervisor and not self.inbox_supervisor.stop(timeout=5):
+            self.logger.warning("Inbox monitoring is still finishing running syncs")
+            return
         self.logger.info("Inbox monitoring stopped")
     
-    def _monitor_inbox(self, email_config: Dict, check_interval: int):
-        """Monitor inbox for new emails and auto-reply"""
-        last_check = datetime.now()
-        
-        while self.monitoring:
-            try:
-                # Connect to IMAP
-                imap = imaplib.IMAP4_SSL(email_config['imap_server'], email_config['imap_port'])
-                imap.login(email_config['email'], email_config['password'])
-                imap.select('INBOX')
-                
-                # Search for unread emails since last check
-                search_criteria = f'(UNSEEN SINCE "{last_check.strftime("%d-%b-%Y")}")'
-                status, messages = imap.search(None, search_criteria)
-                
-                if status == 'OK' and messages[0]:
-                    email_ids = messages[0].split()
-                    
-                    for email_id in email_ids:
-                        try:
-                            # Fetch email
-                            status, msg_data = imap.fetch(email_id, '(RFC822)')
-                            if status == 'OK':
-                                email_message = email.message_from_bytes(msg_data[0][1])
-                                
-                                # Process email
-                                self._process_incoming_email(email_message, email_config)
-                                
-                        except Exception as e:
-                            self.logger.error(f"Error processing email {email_id}: {e}")
-                
-                imap.logout()
-                last_check = datetime.now()
-                
-            except Exception as e:
-                self.logger.error(f"Error monitoring inbox: {e}")
-            
-            # Wait before next check
-            time.sleep(check_interval)
+    def get_monitoring_status(self) -> List[Dict]:
+        """Per-account state and metrics of inbox monitoring"""
+        return self.inbox_supervisor.status() if self.inbox_supervisor else []
     
-    def _process_incoming_email(self, email_message, sender_config: Dict):
-        """Process incoming email for auto-reply and attachments"""
-        try:
-            # Extract email details
-            sender = email_message.get('From', '')
-            subject = email_message.get('Subject', '')
-            
-            # Get email body
-            body = self._extract_email_body(email_message)
-            
-            # Check for auto-reply rules
-            auto_reply_rules = self.db_manager.get_auto_reply_rules()
-            
-            for rule in auto_reply_rules:
-                if self._check_keywords(body + ' ' + subject, rule['keywords']):
-                    # Get template
-                    template = self.db_manager.get_email_template(rule['template_id'])
-                    if template:
-                        # Send auto-reply
-                        reply_subject = f"Re: {subject}"
-                        self.send_email(
-                            sender_config=sender_config,
-                            recipient=sender,
-                            subject=reply_subject,
-                            body=template['body'],
-                            is_html=template['is_html'],
-                            template_id=template['id']
-                        )
-                        self.logger.info(f"Auto-reply sent to {sender} using rule '{rule['name']}'")
-                        break
-            
-            # Process attachments
-            self._process_attachments(email_message, sender)
-            
-        except Exception as e:
-            self.logger.error(f"Error processing incoming email: {e}")
+    def _process_incoming_email(self, email_message, sender_config: Dict) -> bool:
+        """Process incoming email for auto-reply and attachments.
+        
+        Returns True if an auto-reply was sent. Errors propagate to the
+        caller, which records them against the message.
+        """
+        auto_replied = False
+        
+        # Extract email details
+        sender = email_message.get('From', '')
+        subject = email_message.get('Subject', '')
+        
+        # Get email body
+        body = self._extract_email_body(email_message)
+        
+        # Check for auto-reply rules
+        auto_reply_rules = self.db_manager.get_auto_reply_rules()
+        
+        for rule in auto_reply_rules:
+            if self._check_keywords(body + ' ' + subject, rule['keywords']):
+                # Get template
+                template = self.db_manager.get_email_template(rule['template_id'])
+                if template:
+                    # Send auto-reply
+                    reply_subject = f"Re: {subject}"
+                    auto_replied, _ = self.send_email(
+                        sender_config=sender_config,
+                        recipient=sender,
+                        subject=reply_subject,
+                        body=template['body'],
+                        is_html=template['is_html'],
+                        template_id=template['id']
+                    )
+                    self.logger.info(f"Auto-reply sent to {sender} using rule '{rule['name']}'")
+                    break
+        
+        # Process attachments
+        self._process_attachments(email_message, sender)
+        
+        return auto_replied
     
     def _extract_email_body(self, email_message) -> str:
         """Extract text body from email message"""
@@ -285,8 +319,7 @@ class EmailHandler:
                     file_path = os.path.join(attachments_dir, unique_filename)
                     
                     # Save attachment
-                    with open(file_path, 'wb') as f:
-                        f.write(part.get_payload(decode=True))
+                    self._write_attachment(part, file_path)
                     
                     # Get file info
                     file_size = os.path.getsize(file_path)
@@ -303,89 +336,77 @@ class EmailHandler:
                     
                     self.logger.info(f"Attachment saved: {filename} from {sender}")
     
+    def _write_attachment(self, part, file_path: str, chunk_size: int = 1024 * 1024):
+        """Decode an attachment part to disk chunk by chunk"""
+        with open(file_path, 'wb') as f:
+            if part.get('Content-Transfer-Encoding', '').strip().lower() != 'base64':
+                f.write(part.get_payload(decode=True) or b'')
+                return
+            
+            payload = part.get_payload()
+            leftover = ''
+            for start in range(0, len(payload), chunk_size):
+                data = leftover + ''.join(payload[start:start + chunk_size].split())
+                usable = len(data) - len(data) % 4
+                leftover = data[usable:]
+                if usable:
+                    f.write(binascii.a2b_base64(data[:usable]))
+            
+            if leftover:
+                f.write(binascii.a2b_base64(leftover + '=' * (-len(leftover) % 4)))
+    
     def get_inbox_emails(self, email_config: Dict, limit: int = 50) -> List[Dict]:
-        """Get recent emails from inbox"""
+        """Get recent emails from inbox.
+        
+        The newest ``limit`` messages are listed with a single FETCH of
+        their headers, size and the first 2 KB of text, instead of
+        downloading every message.
+        """
         emails = []
+        session = IMAPSession(email_config)
         
         try:
-            # Connect to IMAP
-            imap = imaplib.IMAP4_SSL(email_config['imap_server'], email_config['imap_port'])
-            imap.login(email_config['email'], email_config['password'])
-            imap.select('INBOX')
-            
-            # Search for recent emails
-            status, messages = imap.search(None, 'ALL')
+            session.connect()
             
-            if status == 'OK' and messages[0]:
-                email_ids = messages[0].split()[-limit:]  # Get last N emails
+            if session.exists:
+                first = max(1, session.exists - limit + 1)
+                status, data = session.imap.fetch(f"{first}:{session.exists}", LISTING_ITEMS)
+                if status != 'OK':
+                    raise session.imap.error(f"FETCH failed: {data}")
                 
-                for email_id in reversed(email_ids):  # Newest first
+                messages = []
+                for fetched in parse_fetch_response(data):
                     try:
-                        status, msg_data = imap.fetch(email_id, '(RFC822)')
-                        if status == 'OK':
-                            email_message = email.message_from_bytes(msg_data[0][1])
-                            
-                            emails.append({
-                                'id': email_id.decode(),
-                                'from': email_message.get('From', ''),
-                                'subject': email_message.get('Subject', ''),
-                                'date': email_message.get('Date', ''),
-                                'body': self._extract_email_body(email_message)[:200] + '...'  # Preview
-                            })
-                            
+                        messages.append(summarize_message(fetched))
                     except Exception as e:
-                        self.logger.error(f"Error fetching email {email_id}: {e}")
-            
-            imap.logout()
+                        # Skip only the message that cannot be decoded
+                        self.logger.error(f"Error reading email {fetched['uid']}: {e}")
+                
+                for message in sorted(messages, key=lambda m: m['uid'] or 0, reverse=True):  # Newest first
+                    emails.append({
+                        'id': str(message['uid']),
+                        'from': message['from'],
+                        'subject': message['subject'],
+                        'date': message['date'],
+                        'message_id': message['message_id'],
+                        'size': message['size'],
+                        'flags': message['flags'],
+                        'body': message['snippet'][:200] + '...'  # Preview
+                    })
             
         except Exception as e:
             self.logger.error(f"Error getting inbox emails: {e}")
+        finally:
+            session.close()
         
         return emails
     
-    def import_contacts_from_csv(self, csv_file_path: str) -> Tuple[int, List[str]]:
-        """Import contacts from CSV file"""
-        import csv
-        
-        imported_count = 0
-        errors = []
-        
-        try:
-            with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
-                # Detect delimiter
-                sample = csvfile.read(1024)
-                csvfile.seek(0)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-                
-                reader = csv.DictReader(csvfile, delimiter=delimiter)
-                
-                for row_num, row in enumerate(reader, start=2):
-                    try:
-                        # Required fields
-                        name = row.get('name', '').strip()
-                        email = row.get('email', '').strip()
-                        
-                        if not name or not email:
-                            errors.append(f"Row {row_num}: Missing name or email")
-                            continue
-                        
-                        # Validate email format
-                        if not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email):
-                            errors.append(f"Row {row_num}: Invalid email format: {email}")
-                            continue
-                        
-                        # Additional data
-                        additional_data = {k: v for k, v in row.items() if k not in ['name', 'email']}
-                        
-                        # Add to database
-                        self.db_manager.add_contact(name, email, additional_data)
-                        imported_count += 1
-                        
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-        
-        except Exception as e:
-            errors.append(f"File error: {str(e)}")
-        
-        return imported_count, errors
\ No newline at end of file
+    def import_contacts_from_csv(self, csv_file_path: str,
+                                 on_progress: Optional[Callable[[int, int, int, List[str]], None]] = None,
+                                 should_stop: Optional[Callable[[], bool]] = None) -> Tuple[int, List[str]]:
+        """Import contacts from a CSV file with name and email columns"""
+        importer = ContactImporter(self.db_manager)
+        return importer.import_file(
+            csv_file_path, email_column='email', name_column='name', require_name=True,
+            on_progress=on_progress, should_stop=should_stop
+        )
\ No newline at end of file
@@ -0,0 +1,304 @@
+import imaplib
+import re
+import select
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+# Servers may drop a client that idles for 30 minutes (RFC 2177), so IDLE
+# is ended and re-issued before that
+IDLE_RENEW_INTERVAL = 28 * 60
+
+# How often a wait checks whether it should stop
+WAIT_SLICE = 1.0
+
+# Delay before reconnecting after a failure, doubled per consecutive failure
+RECONNECT_DELAY = 5
+MAX_RECONNECT_DELAY = 300
+
+def reconnect_delay(failures: int) -> float:
+    """Backoff before the next connection attempt"""
+    return min(MAX_RECONNECT_DELAY, RECONNECT_DELAY * 2 ** max(0, failures - 1))
+
+def is_mailbox_change(line: bytes) -> bool:
+    """Check whether an untagged response announces new or removed mail"""
+    parts = line.split(None, 3)
+    return (len(parts) >= 3 and parts[0] == b'*' and parts[1].isdigit()
+            and parts[2].upper() in (b'EXISTS', b'EXPUNGE'))
+
+FETCH_START = re.compile(rb'^(\d+) \(')
+FETCH_UID = re.compile(rb'\bUID (\d+)')
+FETCH_FLAGS = re.compile(rb'\bFLAGS \(([^)]*)\)')
+FETCH_MODSEQ = re.compile(rb'\bMODSEQ \((\d+)\)')
+FETCH_SIZE = re.compile(rb'\bRFC822\.SIZE (\d+)')
+FETCH_SECTION = re.compile(rb'((?:BODY|BINARY)\[[^\]]*\](?:<\d+>)?|RFC822(?:\.HEADER|\.TEXT)?) \{\d+\}$')
+
+def parse_fetch_response(data: List) -> List[Dict]:
+    """Split an imaplib FETCH response into one dict per message.
+
+    Each dict has ``uid``, ``flags``, ``modseq`` and ``size`` when the
+    server sent them, and ``sections`` mapping each literal item such as
+    ``BODY[]`` or ``BODY[TEXT]<0>`` to its bytes.
+    """
+    messages = []
+    current = None
+
+    for item in data:
+        if item is None:
+            continue
+        text, literal = (item[0], item[1]) if isinstance(item, tuple) else (item, None)
+
+        if FETCH_START.match(text):
+            current = {'meta': b'', 'sections': {}}
+            messages.append(current)
+        if current is None:
+            continue
+
+        current['meta'] += text
+        if literal is not None:
+            match = FETCH_SECTION.search(text)
+            if match:
+                current['sections'][match.group(1).decode('ascii').upper()] = literal
+
+    for message in messages:
+        meta = message.pop('meta')
+        uid = FETCH_UID.search(meta)
+        flags = FETCH_FLAGS.search(meta)
+        modseq = FETCH_MODSEQ.search(meta)
+        size = FETCH_SIZE.search(meta)
+        message['uid'] = int(uid.group(1)) if uid else None
+        message['flags'] = flags.group(1).decode('ascii', errors='ignore').split() if flags else []
+        message['modseq'] = int(modseq.group(1)) if modseq else None
+        message['size'] = int(size.group(1)) if size else None
+
+    return messages
+
+class SocketReader:
+    """Buffered reader over the IMAP socket.
+
+    Replaces the socket's makefile() reader so a waiting session can tell
+    whether a response is already buffered before blocking on the socket.
+    """
+
+    def __init__(self, sock, chunk_size: int = 64 * 1024):
+        self.sock = sock
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def _fill(self):
+        data = self.sock.recv(self.chunk_size)
+        if not data:
+            raise imaplib.IMAP4.abort("Connection unexpectedly closed")
+        self._buffer += data
+
+    def readline(self, limit: int = -1) -> bytes:
+        """Read up to and including the next LF, or ``limit`` bytes"""
+        while True:
+            end = self._buffer.find(b'\n')
+            if end != -1:
+                end += 1
+                break
+            if 0 <= limit <= len(self._buffer):
+                end = limit
+                break
+            self._fill()
+
+        if 0 <= limit < end:
+            end = limit
+        line = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        return line
+
+    def read(self, size: int) -> bytes:
+        """Read exactly ``size`` bytes"""
+        while len(self._buffer) < size:
+            self._fill()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def has_data(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for data to read"""
+        if self._buffer:
+            return True
+        pending = getattr(self.sock, 'pending', None)
+        if pending and pending():
+            return True
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        return bool(readable)
+
+    def close(self):
+        self._buffer.clear()
+
+class MonitorIMAP4_SSL(imaplib.IMAP4_SSL):
+    """IMAP4_SSL whose reader can be polled while the session idles"""
+
+    def open(self, host='', port=imaplib.IMAP4_SSL_PORT, timeout=None):
+        super().open(host, port, timeout)
+        self.file.close()
+        self.file = SocketReader(self.sock)
+
+class IMAPSession:
+    """Authenticated IMAP session on one mailbox, kept open between checks.
+
+    ``wait_for_changes`` blocks until the server reports new mail. With the
+    IDLE capability the server pushes EXISTS as soon as mail arrives and
+    IDLE is re-issued every ``IDLE_RENEW_INTERVAL``; without it the session
+    just waits for the poll interval.
+    """
+
+    def __init__(self, email_config: Dict, mailbox: str = 'INBOX', timeout: float = 60):
+        self.email_config = email_config
+        self.mailbox = mailbox
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self.imap: Optional[MonitorIMAP4_SSL] = None
+        self.capabilities: Set[str] = set()
+        # Mailbox state reported by SELECT
+        self.exists = 0
+        self.uidvalidity: Optional[int] = None
+        self.uidnext: Optional[int] = None
+        self.highest_modseq: Optional[int] = None
+        self._idle_tags = 0
+        self._idle_tag: Optional[bytes] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.imap is not None
+
+    @property
+    def supports_idle(self) -> bool:
+        return 'IDLE' in self.capabilities
+
+    @property
+    def supports_condstore(self) -> bool:
+        return 'CONDSTORE' in self.capabilities
+
+    @property
+    def idling(self) -> bool:
+        return self._idle_tag is not None
+
+    def fileno(self) -> int:
+        """Socket descriptor, for waiting on several sessions at once"""
+        return self.imap.sock.fileno()
+
+    def connect(self):
+        """Open the connection, log in and select the mailbox"""
+        imap = MonitorIMAP4_SSL(self.email_config['imap_server'],
+                                int(self.email_config['imap_port']), timeout=self.timeout)
+        try:
+            imap.login(self.email_config['email'], self.email_config['password'])
+            # Servers often advertise more capabilities once logged in
+            status, data = imap.capability()
+            if status == 'OK' and data and data[0]:
+                self.capabilities = set(data[0].decode('ascii', errors='ignore').upper().split())
+            else:
+                self.capabilities = {c.upper() for c in imap.capabilities}
+            status, data = imap.select(self.mailbox)
+            if status != 'OK':
+                raise imap.error(f"Cannot select {self.mailbox}: {data}")
+            self.exists = int(data[0]) if data and data[0] else 0
+            self.uidvalidity = self._select_value(imap, 'UIDVALIDITY')
+            self.uidnext = self._select_value(imap, 'UIDNEXT')
+            self.highest_modseq = self._select_value(imap, 'HIGHESTMODSEQ')
+        except Exception:
+            self._shutdown(imap)
+            raise
+        self.imap = imap
+
+    def _select_value(self, imap, code: str) -> Optional[int]:
+        """Numeric response code from the last SELECT, e.g. UIDVALIDITY"""
+        _, data = imap.response(code)
+        try:
+            return int(data[-1])
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    def close(self):
+        """Log out and drop the connection"""
+        imap, self.imap = self.imap, None
+        self._idle_tag = None
+        if imap is None:
+            return
+        try:
+            imap.logout()
+        except Exception:
+            self._shutdown(imap)
+
+    def _shutdown(self, imap):
+        try:
+            imap.shutdown()
+        except Exception:
+            pass
+
+    def wait_for_changes(self, poll_interval: float,
+                         should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """Wait for new mail. Returns True if the server reported a change,
+        False when the wait ran out or was stopped."""
+        if self.supports_idle:
+            return self._idle(should_stop)
+
+        deadline = time.monotonic() + poll_interval
+        while time.monotonic() < deadline:
+            if should_stop and should_stop():
+                break
+            time.sleep(min(WAIT_SLICE, max(0.0, deadline - time.monotonic())))
+        return False
+
+    def _idle(self, should_stop: Optional[Callable[[], bool]]) -> bool:
+        """Run one IDLE command until a change, a stop request or renewal"""
+        changed = self.start_idle()
+        deadline = time.monotonic() + IDLE_RENEW_INTERVAL
+        while not changed and time.monotonic() < deadline:
+            if should_stop and should_stop():
+                break
+            changed = self.read_idle(WAIT_SLICE)
+        return self.end_idle() or changed
+
+    def start_idle(self) -> bool:
+        """Send IDLE and wait for the server to accept it. Returns True if
+        a change was reported meanwhile."""
+        imap = self.imap
+        self._idle_tags += 1
+        tag = f"IDLE{self._idle_tags}".encode('ascii')
+        imap.send(tag + b' IDLE\r\n')
+
+        changed = False
+        while True:
+            line = imap.readline()
+            if line.startswith(b'+'):
+                break
+            if line.startswith(tag):
+                raise imap.error(line.decode('utf-8', errors='replace').strip())
+            changed = changed or is_mailbox_change(line)
+        self._idle_tag = tag
+        return changed
+
+    def read_idle(self, timeout: float) -> bool:
+        """Read what the server sent during IDLE, waiting up to ``timeout``
+        seconds for the first line. Returns True on a mailbox change."""
+        imap = self.imap
+        changed = False
+        while imap.file.has_data(timeout):
+            line = imap.readline()
+            if line.startswith(b'* BYE'):
+                raise imap.abort(line.decode('utf-8', errors='replace').strip())
+            changed = changed or is_mailbox_change(line)
+            timeout = 0
+        return changed
+
+    def end_idle(self) -> bool:
+        """Send DONE and read up to the IDLE completion. Returns True if a
+        change was reported meanwhile."""
+        imap = self.imap
+        tag, self._idle_tag = self._idle_tag, None
+        imap.send(b'DONE\r\n')
+
+        changed = False
+        while True:
+            line = imap.readline()
+            if line.startswith(tag):
+                if line[len(tag):].split(None, 1)[0].upper() != b'OK':
+                    raise imap.error(line.decode('utf-8', errors='replace').strip())
+                return changed
+            changed = changed or is_mailbox_change(line)
@@ -0,0 +1,312 @@
+import logging
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from imap_session import IDLE_RENEW_INTERVAL, IMAPSession, reconnect_delay
+from mailbox_sync import MailboxSync
+
+# Sync cycles run at once, however many accounts are watched
+MAX_SYNC_WORKERS = 8
+
+# Longest the supervisor sleeps without checking its schedule
+MAX_WAIT = 60.0
+
+# Consecutive loop failures after which the supervisor gives up
+MAX_LOOP_ERRORS = 5
+
+class AccountMonitor:
+    """Session, sync checkpoint and metrics of one watched account.
+
+    ``state`` is one of connecting, syncing, idle (waiting for the server
+    to push changes), polling (waiting for the next check), backoff or
+    stopped.
+    """
+
+    def __init__(self, db_manager, email_config: Dict):
+        self.email_config = email_config
+        self.account_email = email_config['email']
+        self.session = IMAPSession(email_config)
+        self.sync = MailboxSync(db_manager, self.account_email)
+        self.state = 'connecting'
+        # Monotonic time of the next scheduled cycle or IDLE renewal
+        self.due = 0.0
+        self.fd: Optional[int] = None
+        self.failures = 0
+        self.last_error = ''
+        self.last_sync: Optional[datetime] = None
+        self.last_sync_ms = 0.0
+        self.syncs = 0
+        self.messages = 0
+        self.connects = 0
+
+    def status(self) -> Dict:
+        """Snapshot of the account's state and metrics"""
+        retry_in = max(0.0, self.due - time.monotonic()) if self.state == 'backoff' else 0.0
+        return {
+            'account': self.account_email,
+            'state': self.state,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_sync': self.last_sync,
+            'last_sync_ms': self.last_sync_ms,
+            'syncs': self.syncs,
+            'messages': self.messages,
+            'connects': self.connects,
+            'retry_in': retry_in,
+        }
+
+class InboxSupervisor:
+    """Watches many mailboxes with one thread and a bounded worker pool.
+
+    Idling sessions are not given a thread each: the supervisor thread
+    waits on all of their sockets with a selector and hands an account to
+    the pool only when its server reports something, its IDLE is due for
+    renewal, its poll interval ran out or its backoff ended. The pool then
+    syncs the account and puts it back into IDLE. A slow or failing
+    account only ever holds one worker, so the others keep being served.
+
+    ``on_message(email_config, uid, flags, message)`` handles each new
+    message and returns whether an auto-reply was sent.
+    """
+
+    def __init__(self, db_manager,
+                 on_message: Callable[[Dict, int, List[str], object], bool],
+                 check_interval: float = 60, max_workers: int = MAX_SYNC_WORKERS):
+        self.db_manager = db_manager
+        self.on_message = on_message
+        self.check_interval = check_interval
+        self.max_workers = max(1, int(max_workers))
+        self.logger = logging.getLogger(__name__)
+        self._monitors: Dict[str, AccountMonitor] = {}
+        self._lock = threading.Lock()
+        self._ready: List[AccountMonitor] = []
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the supervisor thread and all of its workers have exited"""
+        return self._thread is None or not self._thread.is_alive()
+
+    def start(self, accounts: List[Dict]):
+        """Start watching the given accounts"""
+        if self._running or not self.stopped:
+            return
+        self._running = True
+        self._monitors = {account['email']: AccountMonitor(self.db_manager, account)
+                          for account in accounts}
+        self._ready = list(self._monitors.values())
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ)
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix='inbox-sync')
+
+        self._thread = threading.Thread(target=self._run, name='inbox-supervisor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Stop watching and log out of every account.
+
+        Waits for running cycles to finish, at most ``timeout`` seconds,
+        and returns whether everything has exited.
+        """
+        if self._running:
+            self._running = False
+            self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.stopped
+
+    def status(self) -> List[Dict]:
+        """Per-account state and metrics"""
+        return [monitor.status() for monitor in list(self._monitors.values())]
+
+    def _wake(self):
+        """Interrupt the supervisor's wait"""
+        try:
+            self._wake_writer.send(b'\0')
+        except OSError:
+            pass  # Already has a wake-up pending
+
+    def _run(self):
+        """Supervisor loop: dispatch accounts whose socket or timer fired"""
+        waiting: List[AccountMonitor] = []
+        errors = 0
+        try:
+            while self._running:
+                try:
+                    self._step(waiting)
+                    errors = 0
+                except Exception as e:
+                    errors += 1
+                    self.logger.error(f"Inbox supervisor error: {e}")
+                    if errors >= MAX_LOOP_ERRORS:
+                        raise
+                    time.sleep(reconnect_delay(errors))
+        except Exception as e:
+            self.logger.error(f"Inbox supervisor failed, monitoring stopped: {e}")
+        finally:
+            self._running = False
+            self._shutdown(waiting)
+
+    def _step(self, waiting: List[AccountMonitor]):
+        """One pass of the loop: wait for sockets and timers, dispatch accounts"""
+        self._collect_ready(waiting)
+
+        now = time.monotonic()
+        for monitor in [m for m in waiting if m.due <= now]:
+            self._dispatch(monitor, waiting, readable=False)
+
+        timeout = min([m.due for m in waiting], default=now + MAX_WAIT) - now
+        for key, _ in self._selector.select(min(MAX_WAIT, max(0.0, timeout))):
+            if key.data is None:
+                self._drain_wake()
+            elif key.data in waiting:
+                self._dispatch(key.data, waiting, readable=True)
+
+    def _collect_ready(self, waiting: List[AccountMonitor]):
+        """Take back accounts whose cycle finished, watching idle sockets"""
+        with self._lock:
+            ready, self._ready = self._ready, []
+        for monitor in ready:
+            if monitor.state == 'idle':
+                try:
+                    fd = monitor.session.fileno()
+                    self._selector.register(fd, selectors.EVENT_READ, monitor)
+                    monitor.fd = fd
+                except Exception as e:
+                    # The worker reconnects it once the backoff ends
+                    self._fail(monitor, e)
+            waiting.append(monitor)
+
+    def _dispatch(self, monitor: AccountMonitor, waiting: List[AccountMonitor], readable: bool):
+        """Hand an account to the worker pool"""
+        waiting.remove(monitor)
+        self._unregister(monitor)
+        self._pool.submit(self._work, monitor, readable)
+
+    def _unregister(self, monitor: AccountMonitor):
+        if monitor.fd is not None:
+            try:
+                self._selector.unregister(monitor.fd)
+            except (KeyError, ValueError, OSError):
+                pass  # Socket already gone
+            monitor.fd = None
+
+    def _drain_wake(self):
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _work(self, monitor: AccountMonitor, readable: bool):
+        """Worker: react to an account's event and leave it waiting again"""
+        session = monitor.session
+        try:
+            if monitor.state == 'backoff':
+                self._close(monitor)
+            elif session.idling:
+                changed = session.read_idle(0) if readable else False
+                if not changed and readable and time.monotonic() < monitor.due:
+                    # Keepalive or other untagged noise, keep idling
+                    self._hand_back(monitor)
+                    return
+                session.end_idle()
+            if self._running:
+                self._cycle(monitor)
+
+        except Exception as e:
+            self._close(monitor)
+            self._fail(monitor, e)
+
+        self._hand_back(monitor)
+
+    def _fail(self, monitor: AccountMonitor, error: Exception):
+        """Put an account into backoff after an error"""
+        monitor.failures += 1
+        monitor.last_error = str(error)
+        monitor.state = 'backoff'
+        monitor.due = time.monotonic() + reconnect_delay(monitor.failures)
+        self.logger.error(f"Error monitoring {monitor.account_email}: {error}")
+
+    def _cycle(self, monitor: AccountMonitor):
+        """Connect if needed, sync new mail and wait for the next change"""
+        session = monitor.session
+        while True:
+            if not session.connected:
+                monitor.state = 'connecting'
+                session.connect()
+                monitor.connects += 1
+                if not session.supports_idle:
+                    self.logger.info(f"{monitor.account_email}: IDLE not supported, polling")
+
+            monitor.state = 'syncing'
+            started = time.monotonic()
+            monitor.messages += monitor.sync.sync(
+                session, lambda uid, flags, message:
+                self.on_message(monitor.email_config, uid, flags, message))
+            monitor.syncs += 1
+            monitor.last_sync = datetime.now()
+            monitor.last_sync_ms = (time.monotonic() - started) * 1000
+            monitor.failures = 0
+            monitor.last_error = ''
+
+            if not self._running:
+                return
+            if not session.supports_idle:
+                monitor.state = 'polling'
+                monitor.due = time.monotonic() + self.check_interval
+                return
+
+            # Buffered responses never wake the selector, so read them now
+            if session.start_idle() or session.read_idle(0):
+                session.end_idle()
+                continue
+            monitor.state = 'idle'
+            monitor.due = time.monotonic() + IDLE_RENEW_INTERVAL
+            return
+
+    def _hand_back(self, monitor: AccountMonitor):
+        with self._lock:
+            self._ready.append(monitor)
+        self._wake()
+
+    def _shutdown(self, waiting: List[AccountMonitor]):
+        """Finish running cycles and log out of every account"""
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            waiting.extend(self._ready)
+            self._ready = []
+        for monitor in waiting:
+            self._unregister(monitor)
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix='inbox-close') as pool:
+            list(pool.map(self._close, waiting))
+
+        self._selector.close()
+        self._wake_reader.close()
+        self._wake_writer.close()
+
+    def _close(self, monitor: AccountMonitor):
+        """Leave IDLE and log out"""
+        session = monitor.session
+        try:
+            if session.idling:
+                session.end_idle()
+        except Exception:
+            pass
+        session.close()
+        monitor.state = 'stopped'
@@ -0,0 +1,115 @@
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from typing import List, Tuple
+
+_STOP = object()
+
+class EmailLogWriter:
+    """Background writer grouping email log inserts into transactions.
+
+    Rows are queued by ``add`` and written by a single thread in one
+    transaction every ``batch_size`` rows or ``flush_interval`` seconds,
+    whichever comes first. ``close`` writes everything still queued; rows
+    added after that are written synchronously so nothing is dropped.
+    """
+
+    def __init__(self, db_manager, batch_size: int = 200, flush_interval: float = 0.25):
+        self.db_manager = db_manager
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def add(self, row: Tuple):
+        """Queue one email_logs row"""
+        with self._lock:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="EmailLogWriter", daemon=True
+                    )
+                    self._thread.start()
+                self._queue.put(row)
+
+        if closed:
+            self._write([row])
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every row queued so far is committed"""
+        with self._lock:
+            if self._thread is None:
+                return True
+            done = threading.Event()
+            self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write all queued rows and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        """Collect rows into batches and write them"""
+        batch: List[Tuple] = []
+        waiters: List[threading.Event] = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None and not stop:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if batch and (stop or waiters or due or len(batch) >= self.batch_size):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+            if stop:
+                return
+
+    def _write(self, rows: List[Tuple], attempts: int = 3):
+        """Insert rows in one transaction, retrying while the database is busy"""
+        for attempt in range(attempts):
+            try:
+                self.db_manager.add_email_logs(rows)
+                return
+            except sqlite3.OperationalError as e:
+                if attempt == attempts - 1:
+                    self.logger.error(f"Failed to write {len(rows)} email logs: {e}")
+                else:
+                    time.sleep(0.1 * (attempt + 1))
+            except Exception as e:
+                self.logger.error(f"Failed to write {len(rows)} email logs: {e}")
+                return
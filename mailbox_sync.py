@@ -0,0 +1,313 @@
+import binascii
+import email
+import email.policy
+import html
+import quopri
+import re
+import email.utils
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from imap_session import IMAPSession, parse_fetch_response
+
+# Messages downloaded per UID FETCH command
+FETCH_BATCH_SIZE = 25
+
+# Bytes of body text fetched to build a message preview
+PREVIEW_BYTES = 2048
+
+# Characters of preview text kept in the mailbox cache
+SNIPPET_LENGTH = 500
+
+# Newest messages listed into the cache on a folder's first sync, and the
+# most kept per folder afterwards
+CACHE_SEED_SIZE = 50
+CACHE_SIZE = 1000
+
+# Header fields fetched for listings; the content headers locate the text
+# part inside the partial body
+LISTING_HEADER_FIELDS = 'FROM SUBJECT DATE MESSAGE-ID CONTENT-TYPE CONTENT-TRANSFER-ENCODING'
+
+# FETCH items listing messages without downloading them
+LISTING_ITEMS = (f'(UID FLAGS RFC822.SIZE BODY.PEEK[HEADER.FIELDS ({LISTING_HEADER_FIELDS})] '
+                 f'BODY.PEEK[TEXT]<0.{PREVIEW_BYTES}>)')
+
+HTML_TAG = re.compile(r'<[^>]*>|<[^>]*$')
+WHITESPACE = re.compile(r'\s+')
+
+def preview_text(headers: email.message.Message, data: bytes) -> str:
+    """Readable text from the start of a message body.
+
+    ``data`` may be cut off anywhere. Multipart bodies are walked by
+    boundary to the first text part; HTML is reduced to its text.
+    """
+    if headers.get_content_maintype() == 'multipart':
+        boundary = headers.get_param('boundary')
+        if not boundary:
+            return ''
+        for part in data.split(b'--' + boundary.encode('ascii', errors='ignore'))[1:]:
+            if part.startswith(b'--'):
+                break
+            part = part.lstrip(b'\r\n')
+            head, separator, body = part.partition(b'\r\n\r\n')
+            if not separator:
+                head, separator, body = part.partition(b'\n\n')
+            if not separator:
+                continue
+            text = preview_text(email.message_from_bytes(head + b'\r\n\r\n'), body)
+            if text:
+                return text
+        return ''
+
+    if headers.get_content_maintype() != 'text':
+        return ''
+
+    encoding = headers.get('Content-Transfer-Encoding', '').strip().lower()
+    try:
+        if encoding == 'base64':
+            data = b''.join(data.split())
+            data = binascii.a2b_base64(data[:len(data) - len(data) % 4])
+        elif encoding == 'quoted-printable':
+            data = quopri.decodestring(data)
+    except (binascii.Error, ValueError):
+        return ''
+
+    try:
+        text = data.decode(headers.get_content_charset() or 'utf-8', errors='ignore')
+    except (LookupError, UnicodeError):
+        # Unknown charsets such as unknown-8bit
+        text = data.decode('utf-8', errors='replace')
+    if headers.get_content_subtype() == 'html':
+        text = html.unescape(HTML_TAG.sub(' ', text))
+    return WHITESPACE.sub(' ', text).strip()
+
+def summarize_message(message: Dict) -> Dict:
+    """Listing fields of a message fetched with LISTING_ITEMS"""
+    header_bytes = b''
+    text = b''
+    size = message['size']
+    for name, section in message['sections'].items():
+        if name.startswith('BODY[HEADER.FIELDS'):
+            header_bytes = section
+        elif name.startswith('BODY[TEXT]'):
+            text = section
+        elif name == 'BODY[]':
+            header_bytes, _, text = section.partition(b'\r\n\r\n')
+            text = text[:PREVIEW_BYTES]
+            size = size or len(section)
+
+    headers = email.message_from_bytes(header_bytes, policy=email.policy.default)
+    return {
+        'uid': message['uid'],
+        'from': str(headers.get('From', '')),
+        'subject': str(headers.get('Subject', '')),
+        'date': str(headers.get('Date', '')),
+        'message_id': str(headers.get('Message-ID', '')),
+        'size': size,
+        'flags': message['flags'],
+        'snippet': preview_text(headers, text),
+    }
+
+def cache_entry(message: Dict) -> Dict:
+    """Mailbox cache row for a message fetched with LISTING_ITEMS or BODY[]"""
+    entry = summarize_message(message)
+    entry['snippet'] = entry['snippet'][:SNIPPET_LENGTH]
+    try:
+        # Local time, as shown in the inbox view
+        entry['sent_at'] = email.utils.parsedate_to_datetime(entry['date']).astimezone().isoformat()
+    except (TypeError, ValueError):
+        entry['sent_at'] = None
+    return entry
+
+class MailboxSync:
+    """Incremental sync of one mailbox folder by UID.
+
+    The folder's UIDVALIDITY and the highest processed UID are stored in
+    mailbox_sync_state, so each cycle only lists ``UID last+1:*`` and work
+    is proportional to new mail instead of the day's backlog. On servers
+    with CONDSTORE the listing uses CHANGEDSINCE against the stored
+    HIGHESTMODSEQ, which also reports flag changes on older messages.
+
+    The first sync of a folder, or one after its UIDVALIDITY changed,
+    processes the day's unread mail like the previous search did and then
+    only what arrives after it.
+
+    Metadata of synced messages and how they were processed is cached in
+    mailbox_messages, so the inbox view reads SQLite instead of the server.
+    """
+
+    def __init__(self, db_manager, account_email: str, folder: str = 'INBOX',
+                 batch_size: int = FETCH_BATCH_SIZE):
+        self.db_manager = db_manager
+        self.account_email = account_email
+        self.folder = folder
+        self.batch_size = max(1, int(batch_size))
+        self.logger = logging.getLogger(__name__)
+
+    def sync(self, session: IMAPSession,
+             on_message: Callable[[int, List[str], email.message.Message], None],
+             on_flags: Optional[Callable[[int, List[str]], None]] = None) -> int:
+        """Process messages that arrived since the last sync.
+
+        ``on_message(uid, flags, message)`` is called for each new message
+        in UID order, and the checkpoint advances past it once it returns.
+        A true return value is cached as an auto-reply sent, an exception
+        as a processing error. ``on_flags(uid, flags)`` receives flag
+        changes on already synced messages when the server supports
+        CONDSTORE. Returns the number of new messages.
+
+        The new HIGHESTMODSEQ is only stored once every listed message was
+        handled, and the first sync's unread messages are kept as pending
+        until processed, so a dropped connection never skips mail.
+        """
+        imap = session.imap
+        state = self.db_manager.get_mailbox_sync_state(self.account_email, self.folder)
+        uidvalidity = session.uidvalidity or 0
+
+        if state is None or state['uidvalidity'] != uidvalidity:
+            if state is not None:
+                self.logger.info(f"{self.account_email}/{self.folder}: UIDVALIDITY changed, resyncing")
+                self.db_manager.clear_mailbox_messages(self.account_email, self.folder)
+            self._seed_cache(session)
+            pending = set(self._initial_uids(imap))
+            last_uid = self._last_uid(session)
+            stored_modseq = None
+            modseq = session.highest_modseq if session.supports_condstore else None
+            self.db_manager.save_mailbox_sync_state(self.account_email, self.folder,
+                                                    uidvalidity, last_uid, None, pending)
+            new_uids = sorted(pending)
+            flags = {}
+        else:
+            last_uid = state['last_uid']
+            stored_modseq = state['highest_modseq']
+            pending = set(state['pending_uids'])
+            listed, flags, modseq = self._list_changes(session, last_uid, stored_modseq, on_flags)
+            new_uids = sorted(pending.union(listed))
+
+        for start in range(0, len(new_uids), self.batch_size):
+            batch = new_uids[start:start + self.batch_size]
+            status, data = imap.uid('FETCH', ','.join(map(str, batch)), '(UID FLAGS BODY.PEEK[])')
+            if status != 'OK':
+                raise imap.error(f"UID FETCH failed: {data}")
+
+            messages = [m for m in parse_fetch_response(data)
+                        if m['uid'] is not None and 'BODY[]' in m['sections']]
+            messages.sort(key=lambda m: m['uid'])
+            self._cache_messages(messages)
+
+            for message in messages:
+                uid = message['uid']
+                try:
+                    replied = on_message(uid, message['flags'] or flags.get(uid, []),
+                                         email.message_from_bytes(message['sections']['BODY[]']))
+                    status = 'processed'
+                except Exception as e:
+                    self.logger.error(f"Error processing email {uid}: {e}")
+                    replied, status = False, 'error'
+                try:
+                    self.db_manager.set_mailbox_message_status(self.account_email, self.folder,
+                                                               uid, status, bool(replied))
+                except Exception as e:
+                    self.logger.error(f"Error caching status of email {uid}: {e}")
+
+                if uid in pending:
+                    pending.discard(uid)
+                else:
+                    last_uid = max(last_uid, uid)
+                # The stored modseq stays until the whole listing is handled
+                self.db_manager.save_mailbox_sync_state(self.account_email, self.folder,
+                                                        uidvalidity, last_uid, stored_modseq,
+                                                        pending)
+
+            # Pending messages missing from the response were expunged
+            pending.difference_update(batch)
+
+        if new_uids or modseq != stored_modseq:
+            self.db_manager.save_mailbox_sync_state(self.account_email, self.folder,
+                                                    uidvalidity, last_uid, modseq, pending)
+        if new_uids:
+            self.db_manager.prune_mailbox_messages(self.account_email, self.folder, CACHE_SIZE)
+        return len(new_uids)
+
+    def _seed_cache(self, session: IMAPSession):
+        """List the newest messages of the folder into the cache"""
+        if not session.exists:
+            return
+        first = max(1, session.exists - CACHE_SEED_SIZE + 1)
+        status, data = session.imap.fetch(f'{first}:{session.exists}', LISTING_ITEMS)
+        if status != 'OK':
+            raise session.imap.error(f"FETCH failed: {data}")
+        self._cache_messages([m for m in parse_fetch_response(data) if m['uid'] is not None])
+
+    def _cache_messages(self, messages: List[Dict]):
+        """Write fetched messages to the mailbox cache.
+
+        The cache only feeds the inbox view, so a message that cannot be
+        summarized is cached with its bare UID and a failed write is
+        logged; neither may hold up processing or the checkpoint.
+        """
+        entries = []
+        for message in messages:
+            try:
+                entries.append(cache_entry(message))
+            except Exception as e:
+                self.logger.warning(f"Cannot summarize email {message['uid']}: {e}")
+                entries.append({'uid': message['uid'], 'message_id': '', 'from': '',
+                                'subject': '', 'sent_at': None, 'size': message['size'],
+                                'flags': message['flags'], 'snippet': ''})
+        try:
+            self.db_manager.save_mailbox_messages(self.account_email, self.folder, entries)
+        except Exception as e:
+            self.logger.error(f"Error caching emails for {self.account_email}: {e}")
+
+    def _list_changes(self, session: IMAPSession, last_uid: int, modseq: Optional[int],
+                      on_flags: Optional[Callable[[int, List[str]], None]]):
+        """List new UIDs, their flags and the new HIGHESTMODSEQ"""
+        imap = session.imap
+        if session.supports_condstore and modseq:
+            status, data = imap.uid('FETCH', '1:*', f'(UID FLAGS) (CHANGEDSINCE {modseq})')
+        elif session.supports_condstore:
+            status, data = imap.uid('FETCH', f'{last_uid + 1}:*', '(UID FLAGS MODSEQ)')
+        else:
+            status, data = imap.uid('FETCH', f'{last_uid + 1}:*', '(UID FLAGS)')
+        if status != 'OK':
+            raise imap.error(f"UID FETCH failed: {data}")
+
+        new_uids = []
+        flags = {}
+        for message in parse_fetch_response(data):
+            uid = message['uid']
+            if uid is None:
+                continue
+            if message['modseq'] is not None:
+                modseq = max(modseq or 0, message['modseq'])
+            # 'n:*' always matches the last message, even when it is old
+            if uid > last_uid:
+                new_uids.append(uid)
+                flags[uid] = message['flags']
+            else:
+                self.db_manager.update_mailbox_message_flags(self.account_email, self.folder,
+                                                             uid, message['flags'])
+                if on_flags:
+                    on_flags(uid, message['flags'])
+
+        return sorted(new_uids), flags, modseq
+
+    def _initial_uids(self, imap) -> List[int]:
+        """UIDs of today's unread mail, processed on the first sync"""
+        criteria = f'(UNSEEN SINCE "{datetime.now().strftime("%d-%b-%Y")}")'
+        status, data = imap.uid('SEARCH', None, criteria)
+        if status != 'OK' or not data or not data[0]:
+            return []
+        return sorted(int(uid) for uid in data[0].split())
+
+    def _last_uid(self, session: IMAPSession) -> int:
+        """Highest UID currently in the folder"""
+        if session.uidnext:
+            return session.uidnext - 1
+
+        status, data = session.imap.uid('SEARCH', None, 'ALL')
+        if status != 'OK' or not data or not data[0]:
+            return 0
+        return max(int(uid) for uid in data[0].split())
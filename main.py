@@ -283,14 +283,14 @@ class EmailAutomationBot:
             if self.logger:
                 self.logger.info("Application shutting down...")
             
-            # Close database connection
-            if self.db_manager:
-                self.db_manager.close()
-            
             # Close main window
             if self.main_window:
                 self.main_window.close()
             
+            # Write pending email logs and close database connections
+            if self.db_manager:
+                self.db_manager.close()
+            
             if self.logger:
                 self.logger.info("Application shutdown complete")
                 
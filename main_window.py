@@ -573,6 +573,7 @@ class EmailBotMainWindow(QMainWindow):
             # Stop monitoring and scheduler
             if self.email_handler:
                 self.email_handler.stop_inbox_monitoring()
+                self.email_handler.close_smtp_connections()
             
             if self.email_scheduler:
                 self.email_scheduler.shutdown()
@@ -633,6 +634,7 @@ class EmailBotMainWindow(QMainWindow):
             # Stop services
             if self.email_handler:
                 self.email_handler.stop_inbox_monitoring()
+                self.email_handler.close_smtp_connections()
             
             if self.email_scheduler:
                 self.email_scheduler.shutdown()
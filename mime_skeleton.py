@@ -0,0 +1,111 @@
+import os
+import base64
+import secrets
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.mime.base import MIMEBase
+from email import encoders
+from typing import Iterator, List, Optional
+
+# Attachments up to this size are encoded once and kept in memory for the
+# batch; larger ones are streamed from disk for every message.
+CACHED_ATTACHMENT_LIMIT = 10 * 1024 * 1024
+
+# Multiple of 57 bytes so each chunk encodes to whole 76 character lines
+STREAM_CHUNK_SIZE = 57 * 1024
+
+def build_attachment_part(file_path: str) -> MIMEBase:
+    """Read and base64-encode a file as an attachment part"""
+    with open(file_path, "rb") as attachment:
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(attachment.read())
+
+    encoders.encode_base64(part)
+    part.add_header(
+        'Content-Disposition',
+        f'attachment; filename= {os.path.basename(file_path)}'
+    )
+    return part
+
+class StreamedAttachment:
+    """Attachment part encoded chunk by chunk straight from disk.
+
+    ``iter_chunks`` produces the same text as
+    ``build_attachment_part(file_path).as_string()`` while holding at most
+    one chunk in memory.
+    """
+
+    def __init__(self, file_path: str, chunk_size: int = STREAM_CHUNK_SIZE):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+
+        part = MIMEBase('application', 'octet-stream')
+        part['Content-Transfer-Encoding'] = 'base64'
+        part.add_header(
+            'Content-Disposition',
+            f'attachment; filename= {os.path.basename(file_path)}'
+        )
+        part.set_payload('')
+        self.headers = part.as_string()
+
+    def iter_chunks(self) -> Iterator[str]:
+        """Yield the part headers followed by base64 encoded chunks"""
+        yield self.headers
+        with open(self.file_path, "rb") as attachment:
+            while True:
+                chunk = attachment.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield base64.encodebytes(chunk).decode('ascii')
+
+class MIMESkeleton:
+    """Pre-serialized multipart message shared by every recipient of a batch.
+
+    Attachments are read, encoded and serialized once, except those larger
+    than ``cache_limit`` which are streamed from disk for every message to
+    keep memory bounded. Rendering a message only serializes the
+    recipient's headers and body part. The rendered segments concatenate
+    to the same text as ``MIMEMultipart.as_string()``.
+    """
+
+    def __init__(self, attachments: List[str] = None, cache_limit: int = CACHED_ATTACHMENT_LIMIT):
+        self.boundary = f"{'=' * 15}{secrets.token_hex(10)}=="
+        self._tail = []
+
+        text = ''
+        for file_path in attachments or []:
+            if not os.path.isfile(file_path):
+                continue
+
+            text += f'\n--{self.boundary}\n'
+            if os.path.getsize(file_path) <= cache_limit:
+                text += build_attachment_part(file_path).as_string()
+            else:
+                self._tail.extend([text, StreamedAttachment(file_path)])
+                text = ''
+
+        self._tail.append(text + f'\n--{self.boundary}--\n')
+
+    def render(self, sender_email: str, recipient: str, subject: str,
+               body: str, is_html: bool = False) -> Optional[List]:
+        """Build the message segments for one recipient.
+
+        Segments are strings or StreamedAttachment objects, see
+        ``smtp_pool.iter_message_chunks``. Returns None in the unlikely case
+        the body contains the boundary, so the caller can fall back to
+        building the full message.
+        """
+        outer = MIMEMultipart(boundary=self.boundary)
+        outer['From'] = sender_email
+        outer['To'] = recipient
+        outer['Subject'] = subject
+
+        # An empty multipart serializes as its headers plus bare delimiters
+        headers = outer.as_string()
+        headers = headers[:headers.index('\n\n') + 2]
+
+        body_part = MIMEText(body, 'html' if is_html else 'plain').as_string()
+        if self.boundary in body_part:
+            return None
+
+        return [f'{headers}--{self.boundary}\n{body_part}'] + self._tail
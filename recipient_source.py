@@ -0,0 +1,187 @@
+import csv
+import mmap
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from contact_import import EMAIL_PATTERN, SNIFF_SAMPLE_SIZE, column_key, find_column, sniff_delimiter
+
+# Rows between offsets kept in the index
+INDEX_INTERVAL = 1024
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+class CSVRecipientSource:
+    """Recipients read lazily from a memory-mapped CSV file.
+
+    Iterating yields one recipient dict per row with an email address,
+    keyed like imported contacts, so ``send_batch_emails`` can stream a
+    campaign straight from disk. Only a sparse index of row offsets, one
+    per ``index_interval`` rows, is kept in memory; it is filled in while
+    iterating and lets ``iter_from`` resume at any row and ``__getitem__``
+    reach any row without scanning from the start.
+
+    Rows without a valid email address are skipped like the contact
+    importer skips them; ``invalid_count`` tells how many once the file
+    has been counted. Rows are numbered from 0 for the first data row.
+    Iterators are independent, so several threads can read the same source.
+    """
+
+    def __init__(self, file_path: str, email_column: Union[int, str] = 'email',
+                 name_column: Union[int, str, None] = 'name',
+                 index_interval: int = INDEX_INTERVAL):
+        self.file_path = file_path
+        self.index_interval = max(1, int(index_interval))
+        self._lock = threading.Lock()
+        self._row_count: Optional[int] = None
+        self._recipient_count: Optional[int] = None
+        self._invalid_count: Optional[int] = None
+
+        self._file = open(file_path, 'rb')
+        try:
+            self._size = self._file.seek(0, 2)
+            if not self._size:
+                raise ValueError("CSV file is empty")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        start = len(UTF8_BOM) if self._mm[:len(UTF8_BOM)] == UTF8_BOM else 0
+        sample = self._mm[start:start + SNIFF_SAMPLE_SIZE].decode('utf-8', errors='ignore')
+        self.delimiter = sniff_delimiter(sample)
+
+        records = self._records(start)
+        _, headers = next(records, (start, []))
+        following = next(records, None)
+        self.headers = headers
+        self.email_index = find_column(headers, email_column)
+        if self.email_index is None:
+            self.close()
+            raise ValueError(f"No '{email_column}' column in {file_path}")
+        self.name_index = find_column(headers, name_column)
+        self._keys = [column_key(header) for header in headers]
+
+        # Offsets of rows 0, interval, 2 * interval, ...
+        self._index = array('Q', [following[0] if following else self._size])
+
+    def close(self):
+        """Unmap and close the file"""
+        self._mm.close()
+        self._file.close()
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_from(0)
+
+    def __len__(self) -> int:
+        """Number of recipients, counted with one pass on first use"""
+        if self._recipient_count is None:
+            recipients = 0
+            invalid = 0
+            for _, row in self._rows_from(0):
+                if self._is_recipient(row):
+                    recipients += 1
+                elif any(cell.strip() for cell in row):
+                    invalid += 1
+            self._recipient_count = recipients
+            self._invalid_count = invalid
+        return self._recipient_count
+
+    def __getitem__(self, row_number: int) -> Dict:
+        """Recipient data for a row, including rows without an email"""
+        for _, row in self._rows_from(row_number):
+            return self._to_recipient(row)
+        raise IndexError(f"Row {row_number} is out of range")
+
+    @property
+    def invalid_count(self) -> Optional[int]:
+        """Rows skipped for a missing or invalid email, known once counted"""
+        return self._invalid_count
+
+    @property
+    def row_count(self) -> Optional[int]:
+        """Number of data rows, known once the file has been read to the end"""
+        return self._row_count
+
+    def iter_from(self, row_number: int) -> Iterator[Dict]:
+        """Yield recipients from a row onwards, skipping rows without a valid email"""
+        for _, row in self._rows_from(row_number):
+            if self._is_recipient(row):
+                yield self._to_recipient(row)
+
+    def _rows_from(self, row_number: int) -> Iterator[Tuple[int, List[str]]]:
+        """Yield (row number, cells) from a row onwards, extending the index"""
+        if row_number < 0:
+            raise IndexError(f"Row {row_number} is out of range")
+
+        with self._lock:
+            block = min(row_number // self.index_interval, len(self._index) - 1)
+            offset = self._index[block]
+        current = block * self.index_interval
+
+        for start, row in self._records(offset):
+            if current % self.index_interval == 0:
+                self._add_index_entry(current, start)
+            if current >= row_number:
+                yield current, row
+            current += 1
+
+        with self._lock:
+            self._row_count = current
+
+    def _add_index_entry(self, row_number: int, offset: int):
+        """Record the offset of a row on an index boundary"""
+        with self._lock:
+            if row_number // self.index_interval == len(self._index):
+                self._index.append(offset)
+
+    def _records(self, offset: int) -> Iterator[Tuple[int, List[str]]]:
+        """Parse CSV records from a byte offset, yielding (offset, cells).
+
+        Lines are sliced straight out of the mapping and fed to csv.reader
+        one at a time, so quoted fields spanning lines are handled and the
+        offset before each record is exact.
+        """
+        mm = self._mm
+        size = self._size
+        position = offset
+
+        def lines():
+            nonlocal position
+            while position < size:
+                end = mm.find(b'\n', position)
+                end = size if end == -1 else end + 1
+                line = mm[position:end]
+                position = end
+                yield line.decode('utf-8', errors='replace')
+
+        reader = csv.reader(lines(), delimiter=self.delimiter)
+        while True:
+            start = position
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            yield start, row
+
+    def _email(self, row: List[str]) -> str:
+        """Email address of a row, empty if missing"""
+        return row[self.email_index].strip() if self.email_index < len(row) else ''
+
+    def _is_recipient(self, row: List[str]) -> bool:
+        """Check whether a row has a valid email address"""
+        return bool(EMAIL_PATTERN.match(self._email(row)))
+
+    def _to_recipient(self, row: List[str]) -> Dict:
+        """Build recipient data like ContactImporter does for contacts"""
+        # Every column stays available as a placeholder
+        recipient = {
+            self._keys[idx]: cell.strip() for idx, cell in enumerate(row)
+            if idx < len(self._keys) and cell.strip()
+        }
+        recipient['email'] = self._email(row)
+        name = ''
+        if self.name_index is not None and self.name_index < len(row):
+            name = row[self.name_index].strip()
+        recipient['name'] = name
+        return recipient
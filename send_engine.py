@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+def load_email_settings(settings_file: str = "app_settings.json") -> Dict:
+    """Load sending settings saved by the Settings panel"""
+    settings = {'default_delay': 1, 'batch_size': 50}
+    try:
+        if os.path.exists(settings_file):
+            with open(settings_file, 'r') as f:
+                settings.update(json.load(f).get('email', {}))
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Error loading email settings: {e}")
+    return settings
+
+class TokenBucket:
+    """Thread-safe token bucket limiting send rate per account.
+
+    ``rate`` is in messages per second; a rate of 0 disables limiting.
+    ``capacity`` is the number of messages allowed to go out back to back.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self._lock = threading.Lock()
+        self.tokens = float(max(1, int(capacity)))
+        self.configure(rate, capacity)
+
+    def configure(self, rate: float, capacity: int):
+        """Update rate and burst size"""
+        with self._lock:
+            self.rate = max(0.0, float(rate))
+            self.capacity = max(1, int(capacity))
+            self.tokens = min(self.tokens, self.capacity)
+            self.updated = time.monotonic()
+
+    def _take(self) -> float:
+        """Take a token if available. Returns seconds to wait otherwise."""
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """Block until a token is available. Returns False if stopped."""
+        while True:
+            wait_time = self._take()
+            if wait_time == 0:
+                return True
+            if should_stop and should_stop():
+                return False
+            time.sleep(min(wait_time, 0.5))
+
+    async def acquire_async(self, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """Wait for a token without blocking the event loop"""
+        while True:
+            wait_time = self._take()
+            if wait_time == 0:
+                return True
+            if should_stop and should_stop():
+                return False
+            await asyncio.sleep(min(wait_time, 0.5))
+
+class ResultBatcher:
+    """Collects per-recipient results and hands them on in batches.
+
+    ``emit`` receives the results gathered since its previous call, at most
+    ``max_rate`` times per second, so a fast send loop doesn't flood the
+    UI thread with one event per message. Results queued while sending
+    stalls, e.g. on the rate limiter or a slow server, are emitted by a
+    timer once the interval ends, so they never lag by more than it.
+    ``flush`` emits whatever is left and must be called once sending ends.
+    Batches are emitted one at a time and in order, whichever thread
+    emits them, so ``emit`` needs no locking of its own.
+    """
+
+    def __init__(self, emit: Callable[[List], None], max_rate: float = 10):
+        self.emit = emit
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._lock = threading.Lock()
+        # Held across taking a batch and emitting it
+        self._emit_lock = threading.Lock()
+        self._pending: List[Any] = []
+        self._last_emit = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, result: Any):
+        """Queue a result, emitting the batch if the interval has passed"""
+        with self._lock:
+            self._pending.append(result)
+            wait = self._last_emit + self.interval - time.monotonic()
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self._on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self._emit_pending()
+
+    def flush(self):
+        """Emit all queued results once a pending timer has finished"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+            timer.join()
+        self._emit_pending()
+
+    def _on_timer(self):
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+        self._emit_pending()
+
+    def _emit_pending(self):
+        with self._emit_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._last_emit = time.monotonic()
+            if batch:
+                self.emit(batch)
+
+def send_concurrently(send_one: Callable[[Dict], Tuple[bool, str]], recipients: Iterable[Dict],
+                      max_workers: int, rate_limiter: TokenBucket,
+                      should_stop: Optional[Callable[[], bool]] = None
+                      ) -> Iterator[Tuple[Dict, bool, str]]:
+    """Send to recipients over ``max_workers`` concurrent sessions.
+
+    Yields ``(recipient, success, message)`` in completion order. At most
+    ``2 * max_workers`` sends are in flight, so ``recipients`` may be a
+    lazy iterator.
+    """
+    max_workers = max(1, int(max_workers))
+
+    def task(recipient):
+        if not rate_limiter.acquire(should_stop):
+            return None
+        try:
+            return send_one(recipient)
+        except Exception as e:
+            return False, str(e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        recipient_iter = iter(recipients)
+        exhausted = False
+
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_workers * 2:
+                if should_stop and should_stop():
+                    exhausted = True
+                    break
+                try:
+                    recipient = next(recipient_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(task, recipient)] = recipient
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                recipient = pending.pop(future)
+                outcome = future.result()
+                if outcome is not None:
+                    yield recipient, outcome[0], outcome[1]
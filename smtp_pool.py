@@ -0,0 +1,257 @@
+import re
+import smtplib
+import threading
+import time
+import logging
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+EOL_PATTERN = re.compile(r'(?:\r\n|\n|\r(?!\n))')
+
+def is_disconnect_error(error: Exception) -> bool:
+    """Check whether an SMTP error means the server dropped the session"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421:
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # A 421 to RCPT closes the session too
+        return any(code == 421 for code, _ in error.recipients.values())
+    return False
+
+def iter_message_chunks(message: Union[str, List]) -> Iterator[str]:
+    """Flatten a message into text chunks.
+
+    ``message`` is either the full message text or a list of segments, each
+    a string or an object with ``iter_chunks()`` such as
+    mime_skeleton.StreamedAttachment. Lists can be replayed on retry.
+    """
+    if isinstance(message, str):
+        yield message
+        return
+
+    for segment in message:
+        if isinstance(segment, str):
+            yield segment
+        else:
+            yield from segment.iter_chunks()
+
+def iter_smtp_data(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Encode message chunks for the DATA phase.
+
+    Normalizes line endings to CRLF, dot-stuffs lines starting with '.'
+    across chunk boundaries and ends with the terminating '.' line.
+    """
+    at_line_start = True
+    pending_cr = ''
+
+    for chunk in chunks:
+        text = pending_cr + chunk
+        pending_cr = ''
+        if text.endswith('\r'):
+            # Hold back a trailing CR until we know whether LF follows
+            pending_cr = '\r'
+            text = text[:-1]
+        if not text:
+            continue
+
+        data = EOL_PATTERN.sub('\r\n', text)
+
+        if at_line_start and data.startswith('.'):
+            data = '.' + data
+        data = data.replace('\r\n.', '\r\n..')
+        at_line_start = data.endswith('\n')
+
+        yield data.encode('ascii')
+
+    if pending_cr or not at_line_start:
+        yield b'\r\n'
+    yield b'.\r\n'
+
+def send_message_data(server: smtplib.SMTP, from_addr: str, to_addrs,
+                      message: Union[str, List]) -> Dict:
+    """Send a message without materializing it, like SMTP.sendmail.
+
+    Returns refused recipients, raising the same exceptions as sendmail.
+    """
+    if isinstance(to_addrs, str):
+        to_addrs = [to_addrs]
+
+    server.ehlo_or_helo_if_needed()
+
+    code, response = server.mail(from_addr)
+    if code != 250:
+        if code == 421:
+            server.close()
+        else:
+            server.rset()
+        raise smtplib.SMTPSenderRefused(code, response, from_addr)
+
+    refused = {}
+    for recipient in to_addrs:
+        code, response = server.rcpt(recipient)
+        if code not in (250, 251):
+            refused[recipient] = (code, response)
+        if code == 421:
+            server.close()
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+    if len(refused) == len(to_addrs):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    code, response = server.docmd('data')
+    if code != 354:
+        if code == 421:
+            server.close()
+        else:
+            server.rset()
+        raise smtplib.SMTPDataError(code, response)
+
+    for data in iter_smtp_data(iter_message_chunks(message)):
+        server.send(data)
+
+    code, response = server.getreply()
+    if code != 250:
+        if code == 421:
+            server.close()
+        else:
+            server.rset()
+        raise smtplib.SMTPDataError(code, response)
+
+    return refused
+
+class PooledSMTPConnection:
+    """Authenticated SMTP session tracked by the pool"""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        """Close the session, ignoring errors from an already dead socket"""
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP sessions keyed by account.
+
+    Sessions are reused across messages and recycled after
+    ``max_messages_per_connection`` messages or ``idle_timeout`` seconds
+    of inactivity. A session dropped by the server (421 or
+    SMTPServerDisconnected) is replaced transparently.
+    """
+
+    def __init__(self, max_messages_per_connection: int = 100,
+                 idle_timeout: float = 60, timeout: float = 60):
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple, List[PooledSMTPConnection]] = {}
+
+    def _get_key(self, sender_config: Dict) -> Tuple:
+        """Build pool key for an account"""
+        return (sender_config['smtp_server'], int(sender_config['smtp_port']),
+                sender_config['email'])
+
+    def _connect(self, sender_config: Dict) -> PooledSMTPConnection:
+        """Open and authenticate a new SMTP session"""
+        server = smtplib.SMTP(sender_config['smtp_server'], sender_config['smtp_port'],
+                              timeout=self.timeout)
+        try:
+            server.starttls()
+            server.login(sender_config['email'], sender_config['password'])
+        except Exception:
+            server.close()
+            raise
+        return PooledSMTPConnection(server)
+
+    def acquire(self, sender_config: Dict) -> PooledSMTPConnection:
+        """Check out a session for the account, opening one if none is idle"""
+        key = self._get_key(sender_config)
+        expired = []
+        connection = None
+
+        with self._lock:
+            idle = self._idle.get(key, [])
+            now = time.monotonic()
+            while idle:
+                candidate = idle.pop()
+                if now - candidate.last_used > self.idle_timeout:
+                    expired.append(candidate)
+                else:
+                    connection = candidate
+                    break
+
+        for stale in expired:
+            stale.close()
+
+        if connection is None:
+            connection = self._connect(sender_config)
+        return connection
+
+    def release(self, sender_config: Dict, connection: PooledSMTPConnection):
+        """Return a healthy session to the pool or recycle it"""
+        connection.last_used = time.monotonic()
+        if connection.messages_sent >= self.max_messages_per_connection:
+            connection.close()
+            return
+
+        with self._lock:
+            self._idle.setdefault(self._get_key(sender_config), []).append(connection)
+
+    def discard(self, connection: PooledSMTPConnection):
+        """Drop a broken session without returning it to the pool"""
+        connection.close()
+
+    def sendmail(self, sender_config: Dict, recipients, message: Union[str, List]):
+        """Send a message over a pooled session.
+
+        ``message`` is the message text or a list of segments streamed with
+        send_message_data. Retries once on a fresh session if the pooled one
+        was dropped.
+        """
+        for attempt in range(2):
+            connection = self.acquire(sender_config)
+            try:
+                result = send_message_data(connection.server, sender_config['email'],
+                                           recipients, message)
+            except smtplib.SMTPException as e:
+                if is_disconnect_error(e):
+                    self.discard(connection)
+                    if attempt == 0:
+                        self.logger.info(
+                            f"SMTP session for {sender_config['email']} dropped, reconnecting"
+                        )
+                        continue
+                    raise
+                if connection.server.sock is None:
+                    # Closed by send_message_data, never hand it out again
+                    self.discard(connection)
+                    raise
+                # The transaction was reset, so the session stays usable
+                self.release(sender_config, connection)
+                raise
+            except Exception:
+                self.discard(connection)
+                raise
+
+            connection.messages_sent += 1
+            self.release(sender_config, connection)
+            return result
+
+    def close_all(self):
+        """Close every idle session"""
+        with self._lock:
+            connections = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+
+        for connection in connections:
+            connection.close()
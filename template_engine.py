@@ -0,0 +1,47 @@
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+PLACEHOLDER_PATTERN = re.compile(r'\{([^{}]+)\}')
+
+class CompiledTemplate:
+    """Template text parsed once into literal and placeholder segments.
+
+    Rendering converts each distinct placeholder value once and joins the
+    segments in a single pass. Placeholders without a matching key are
+    left untouched, like the previous str.replace based personalization.
+    """
+
+    __slots__ = ('source', '_literals', '_fields', '_distinct_fields')
+
+    def __init__(self, source: str):
+        self.source = source
+        parts = PLACEHOLDER_PATTERN.split(source)
+        self._literals: List[str] = parts[0::2]
+        self._fields: List[str] = parts[1::2]
+        self._distinct_fields = set(self._fields)
+
+    @property
+    def fields(self) -> List[str]:
+        """Placeholder names used by the template"""
+        return list(self._fields)
+
+    def render(self, data: Dict) -> str:
+        """Render the template for one recipient"""
+        if not self._fields:
+            return self.source
+
+        values = {
+            field: str(data[field]) if field in data else f"{{{field}}}"
+            for field in self._distinct_fields
+        }
+
+        segments = [None] * (len(self._literals) + len(self._fields))
+        segments[0::2] = self._literals
+        segments[1::2] = [values[field] for field in self._fields]
+        return ''.join(segments)
+
+@lru_cache(maxsize=256)
+def compile_template(text: str) -> CompiledTemplate:
+    """Compile template text, reusing the cached result for identical text"""
+    return CompiledTemplate(text or '')
@@ -0,0 +1,63 @@
+"""
+Fixtures for the async transport tests: a scratch database and a
+self-signed certificate for the stand-in servers.
+"""
+
+import datetime
+import ipaddress
+import ssl
+import sys
+from pathlib import Path
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from stand_in_servers import HOST
+
+@pytest.fixture(scope='session')
+def certificate(tmp_path_factory):
+    """Self-signed certificate for HOST, as (cert_file, key_file)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, HOST)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(HOST))]),
+                           critical=False)
+            .sign(key, hashes.SHA256()))
+
+    directory = tmp_path_factory.mktemp('tls')
+    cert_file, key_file = directory / 'cert.pem', directory / 'key.pem'
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(serialization.Encoding.PEM,
+                                           serialization.PrivateFormat.TraditionalOpenSSL,
+                                           serialization.NoEncryption()))
+    return str(cert_file), str(key_file)
+
+@pytest.fixture
+def server_context(certificate):
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(*certificate)
+    return context
+
+@pytest.fixture
+def client_context(certificate):
+    return ssl.create_default_context(cafile=certificate[0])
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Scratch database; the encryption key and attachments land in tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    from database import DatabaseManager
+    manager = DatabaseManager(str(tmp_path / 'test.db'))
+    yield manager
+    manager.close()
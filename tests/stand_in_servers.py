@@ -0,0 +1,260 @@
+"""
+Local stand-in SMTP and IMAP servers for the async transport tests.
+
+Both run on asyncio in the test's event loop. The SMTP server follows
+aiosmtpd's model: every accepted message is stored as an envelope. The
+IMAP server keeps a single INBOX and supports what the clients use:
+LOGIN, CAPABILITY, SELECT, FETCH, UID FETCH, UID SEARCH, IDLE and LOGOUT.
+"""
+
+import asyncio
+import base64
+import re
+import ssl
+
+HOST = '127.0.0.1'
+
+class StandInSMTPServer:
+    """SMTP server with STARTTLS and AUTH PLAIN that stores envelopes.
+
+    ``refuse`` holds recipients rejected at RCPT, ``drop_after`` makes
+    the server answer 421 to the MAIL command after that many messages
+    on one session.
+    """
+
+    def __init__(self, tls_context: ssl.SSLContext):
+        self.tls_context = tls_context
+        self.envelopes = []
+        self.sessions = 0
+        self.refuse = set()
+        self.drop_after = None
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._session, HOST, 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _session(self, reader, writer):
+        self.sessions += 1
+        sent = 0
+        sender, recipients = None, []
+
+        def reply(line):
+            writer.write(line.encode('ascii') + b'\r\n')
+
+        reply('220 stand-in ESMTP')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode('ascii').strip()
+                verb = command.split(' ', 1)[0].upper()
+
+                if verb == 'EHLO':
+                    reply('250-stand-in')
+                    reply('250-STARTTLS')
+                    reply('250 AUTH PLAIN LOGIN')
+                elif verb == 'STARTTLS':
+                    reply('220 Ready to start TLS')
+                    await writer.drain()
+                    await writer.start_tls(self.tls_context)
+                elif verb == 'AUTH':
+                    token = command.split()[2]
+                    _, user, password = base64.b64decode(token).decode().split('\0')
+                    reply('235 Authenticated' if password == 'secret' else '535 Bad credentials')
+                elif verb == 'MAIL':
+                    if self.drop_after is not None and sent >= self.drop_after:
+                        reply('421 Too many messages, closing')
+                        await writer.drain()
+                        return
+                    sender = re.search(r'<(.*)>', command).group(1)
+                    recipients = []
+                    reply('250 OK')
+                elif verb == 'RCPT':
+                    recipient = re.search(r'<(.*)>', command).group(1)
+                    if recipient in self.refuse:
+                        reply('550 No such user')
+                    else:
+                        recipients.append(recipient)
+                        reply('250 OK')
+                elif verb == 'DATA':
+                    reply('354 End data with <CR><LF>.<CR><LF>')
+                    await writer.drain()
+                    lines = []
+                    while True:
+                        data = await reader.readline()
+                        if data == b'.\r\n':
+                            break
+                        lines.append(data[1:] if data.startswith(b'..') else data)
+                    self.envelopes.append((sender, recipients, b''.join(lines)))
+                    sent += 1
+                    reply('250 Queued')
+                elif verb == 'RSET':
+                    sender, recipients = None, []
+                    reply('250 OK')
+                elif verb == 'QUIT':
+                    reply('221 Bye')
+                    await writer.drain()
+                    return
+                else:
+                    reply('502 Command not implemented')
+                await writer.drain()
+        finally:
+            writer.close()
+
+class StandInIMAPServer:
+    """IMAP server over TLS with one INBOX held in memory"""
+
+    def __init__(self, tls_context: ssl.SSLContext, idle: bool = True):
+        self.tls_context = tls_context
+        self.capabilities = 'IMAP4rev1 IDLE' if idle else 'IMAP4rev1'
+        self.uidvalidity = 1000
+        self.messages = []  # dicts with uid, flags and raw bytes
+        self.next_uid = 1
+        self.logins = 0
+        self.changed = asyncio.Event()
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._session, HOST, 0, ssl=self.tls_context)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def add(self, sender: str, subject: str, body: str, seen: bool = False, attachment: bytes = None):
+        """Deliver a message to the INBOX"""
+        headers = (f"From: {sender}\r\nTo: me@example.com\r\nSubject: {subject}\r\n"
+                   f"Date: Sat, 17 Oct 2026 10:00:00 +0000\r\nMessage-ID: <m{self.next_uid}@example.com>\r\n")
+        if attachment is None:
+            raw = headers + f"Content-Type: text/plain\r\n\r\n{body}\r\n"
+        else:
+            raw = (headers + 'Content-Type: multipart/mixed; boundary="b"\r\n\r\n'
+                   f'--b\r\nContent-Type: text/plain\r\n\r\n{body}\r\n'
+                   '--b\r\nContent-Type: application/octet-stream\r\n'
+                   'Content-Disposition: attachment; filename="report.bin"\r\n'
+                   'Content-Transfer-Encoding: base64\r\n\r\n'
+                   f'{base64.b64encode(attachment).decode()}\r\n--b--\r\n')
+        self.messages.append({'uid': self.next_uid, 'flags': ['\\Seen'] if seen else [],
+                              'raw': raw.encode()})
+        self.next_uid += 1
+        self.changed.set()
+
+    def _select(self, spec: str, uid: bool):
+        """Messages matching a sequence or UID set"""
+        numbers = [m['uid'] if uid else i + 1 for i, m in enumerate(self.messages)]
+        highest = numbers[-1] if numbers else 0
+        wanted = set()
+        for part in spec.split(','):
+            first, _, last = part.partition(':')
+            first = highest if first == '*' else int(first)
+            last = first if not last else highest if last == '*' else int(last)
+            wanted.update(range(min(first, last), max(first, last) + 1))
+        return [(numbers[i], i + 1, m) for i, m in enumerate(self.messages) if numbers[i] in wanted]
+
+    def _fetch_item(self, item: str, message) -> bytes:
+        raw = message['raw']
+        headers, _, text = raw.partition(b'\r\n\r\n')
+        if item == 'UID':
+            return f"UID {message['uid']}".encode()
+        if item == 'FLAGS':
+            return f"FLAGS ({' '.join(message['flags'])})".encode()
+        if item == 'RFC822.SIZE':
+            return f"RFC822.SIZE {len(raw)}".encode()
+        if item == 'BODY.PEEK[]':
+            section, data = 'BODY[]', raw
+        elif item.startswith('BODY.PEEK[HEADER.FIELDS'):
+            fields = re.search(r'\((.*)\)', item).group(1).upper().split()
+            kept = [line for line in headers.split(b'\r\n')
+                    if line.split(b':', 1)[0].decode().upper() in fields]
+            section, data = item.replace('.PEEK', ''), b'\r\n'.join(kept) + b'\r\n\r\n'
+        elif item.startswith('BODY.PEEK[TEXT]'):
+            start, length = map(int, re.search(r'<(\d+)\.(\d+)>', item).groups())
+            section, data = f'BODY[TEXT]<{start}>', text[start:start + length]
+        else:
+            raise ValueError(item)
+        return f"{section} {{{len(data)}}}\r\n".encode() + data
+
+    async def _session(self, reader, writer):
+        def send(data):
+            writer.write(data if isinstance(data, bytes) else data.encode() + b'\r\n')
+
+        send('* OK stand-in IMAP ready')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                tag, command, *args = line.decode().strip().split(' ', 2)
+                command = command.upper()
+                rest = args[0] if args else ''
+                uid = command == 'UID'
+                if uid:
+                    command, _, rest = rest.partition(' ')
+                    command = command.upper()
+
+                if command == 'LOGIN':
+                    self.logins += 1
+                    send(f'{tag} OK LOGIN completed')
+                elif command == 'CAPABILITY':
+                    send(f'* CAPABILITY {self.capabilities}')
+                    send(f'{tag} OK CAPABILITY completed')
+                elif command == 'SELECT':
+                    send(f'* {len(self.messages)} EXISTS')
+                    send(f'* OK [UIDVALIDITY {self.uidvalidity}] UIDs valid')
+                    send(f'* OK [UIDNEXT {self.next_uid}] Predicted next UID')
+                    send(f'{tag} OK [READ-WRITE] SELECT completed')
+                elif command == 'SEARCH':
+                    if 'UNSEEN' in rest:
+                        found = [m['uid'] for m in self.messages if '\\Seen' not in m['flags']]
+                    else:
+                        found = [m['uid'] for m in self.messages]
+                    send('* SEARCH' + ''.join(f' {u}' for u in found))
+                    send(f'{tag} OK SEARCH completed')
+                elif command == 'FETCH':
+                    spec, items = rest.split(' ', 1)
+                    items = re.findall(r'BODY\.PEEK\[[^\]]*\](?:<[\d.]+>)?|[\w.]+', items[1:-1])
+                    if uid and 'UID' not in items:
+                        items.insert(0, 'UID')
+                    for _, number, message in self._select(spec, uid):
+                        body = b' '.join(self._fetch_item(item, message) for item in items)
+                        send(f'* {number} FETCH ('.encode() + body + b')\r\n')
+                        if 'BODY.PEEK[]' in items and '\\Seen' not in message['flags']:
+                            message['flags'].append('\\Seen')
+                    send(f'{tag} OK FETCH completed')
+                elif command == 'IDLE':
+                    send('+ idling')
+                    await writer.drain()
+                    self.changed.clear()
+                    known = len(self.messages)
+                    done = asyncio.ensure_future(reader.readline())
+                    changed = asyncio.ensure_future(self.changed.wait())
+                    await asyncio.wait([done, changed], return_when=asyncio.FIRST_COMPLETED)
+                    if changed.done() and len(self.messages) > known:
+                        send(f'* {len(self.messages)} EXISTS')
+                        await writer.drain()
+                    changed.cancel()
+                    await done
+                    send(f'{tag} OK IDLE terminated')
+                elif command == 'LOGOUT':
+                    send('* BYE logging out')
+                    send(f'{tag} OK LOGOUT completed')
+                    await writer.drain()
+                    return
+                else:
+                    send(f'{tag} BAD unknown command')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,155 @@
+import asyncio
+import email
+
+import pytest
+from stand_in_servers import HOST, StandInIMAPServer, StandInSMTPServer
+
+from async_email_handler import AsyncEmailHandler
+
+def account(smtp_port=1, imap_port=1, **extra):
+    config = {'email': 'me@example.com', 'password': 'secret',
+              'smtp_server': HOST, 'smtp_port': smtp_port,
+              'imap_server': HOST, 'imap_port': imap_port}
+    config.update(extra)
+    return config
+
+async def wait_until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+def test_send_email_over_starttls(db, server_context, client_context):
+    async def scenario():
+        smtp = await StandInSMTPServer(server_context).start()
+        handler = AsyncEmailHandler(db, client_context)
+        try:
+            ok, message = await handler.send_email(account(smtp.port), 'you@example.com',
+                                                   'Hello', 'Body text')
+        finally:
+            await handler.close()
+            await smtp.stop()
+        return smtp, ok, message
+
+    smtp, ok, message = asyncio.run(scenario())
+    assert ok, message
+    sender, recipients, data = smtp.envelopes[0]
+    assert (sender, recipients) == ('me@example.com', ['you@example.com'])
+    parsed = email.message_from_bytes(data)
+    assert parsed['Subject'] == 'Hello'
+    assert parsed.get_payload(0).get_payload() == 'Body text'
+
+    assert db.flush_email_logs(5)
+    assert db.get_email_logs()[0]['status'] == 'sent'
+
+def test_refused_recipient_is_logged_as_failure(db, server_context, client_context):
+    async def scenario():
+        smtp = await StandInSMTPServer(server_context).start()
+        smtp.refuse.add('nobody@example.com')
+        handler = AsyncEmailHandler(db, client_context)
+        try:
+            return await handler.send_email(account(smtp.port), 'nobody@example.com', 'Hi', 'x')
+        finally:
+            await handler.close()
+            await smtp.stop()
+
+    ok, message = asyncio.run(scenario())
+    assert not ok and '550' in message
+    assert db.flush_email_logs(5)
+    assert db.get_email_logs()[0]['status'] == 'failed'
+
+def test_batch_shares_sessions_and_reconnects_after_421(db, server_context, client_context, tmp_path):
+    attachment = tmp_path / 'notes.txt'
+    attachment.write_text('attached')
+
+    async def scenario():
+        smtp = await StandInSMTPServer(server_context).start()
+        smtp.drop_after = 4
+        handler = AsyncEmailHandler(db, client_context)
+        recipients = [{'email': f'user{i}@example.com', 'name': f'User {i}'} for i in range(20)]
+        template = {'id': None, 'subject': 'Hi {name}', 'body': 'Dear {name}', 'is_html': False}
+        seen = []
+        try:
+            results = await handler.send_batch_emails(
+                account(smtp.port, max_connections=2), recipients, template,
+                attachments=[str(attachment)], delay=0,
+                on_result=lambda recipient, success, message: seen.append(success))
+        finally:
+            await handler.close()
+            await smtp.stop()
+        return smtp, results, seen
+
+    smtp, results, seen = asyncio.run(scenario())
+    assert results == {'sent': 20, 'failed': 0, 'errors': []}
+    assert len(seen) == 20 and all(seen)
+    # Two sessions to start with, each replaced after every fourth message
+    assert smtp.sessions == 6
+    subjects = sorted(email.message_from_bytes(data)['Subject'] for _, _, data in smtp.envelopes)
+    assert subjects == sorted(f'Hi User {i}' for i in range(20))
+    parsed = email.message_from_bytes(smtp.envelopes[0][2])
+    assert parsed.get_payload(1).get_payload(decode=True) == b'attached'
+
+def test_get_inbox_emails_lists_newest_first(db, server_context, client_context):
+    async def scenario():
+        imap = await StandInIMAPServer(server_context).start()
+        for i in range(5):
+            imap.add(f'sender{i}@example.com', f'Subject {i}', f'Body {i}')
+        handler = AsyncEmailHandler(db, client_context)
+        try:
+            return imap, await handler.get_inbox_emails(account(imap_port=imap.port), limit=3)
+        finally:
+            await handler.close()
+            await imap.stop()
+
+    imap, emails = asyncio.run(scenario())
+    assert [e['subject'] for e in emails] == ['Subject 4', 'Subject 3', 'Subject 2']
+    assert emails[0]['from'] == 'sender4@example.com'
+    assert emails[0]['body'].startswith('Body 4')
+    # Listing only peeks, so nothing is marked read
+    assert all(m['flags'] == [] for m in imap.messages)
+
+@pytest.mark.parametrize('idle', [True, False], ids=['idle', 'polling'])
+def test_monitoring_auto_replies_once_per_message(db, server_context, client_context, idle):
+    template_id = db.add_email_template('Thanks', 'Thanks', 'We got your order', False)
+    db.add_auto_reply_rule('Orders', ['order'], template_id)
+
+    async def scenario():
+        smtp = await StandInSMTPServer(server_context).start()
+        imap = await StandInIMAPServer(server_context, idle=idle).start()
+        imap.add('old@example.com', 'Old order', 'already read', seen=True)
+        imap.add('early@example.com', 'My order', 'order 1')
+        handler = AsyncEmailHandler(db, client_context)
+        try:
+            handler.start_inbox_monitoring(account(smtp.port, imap.port), check_interval=0.2)
+            assert handler.monitoring
+            await wait_until(lambda: len(smtp.envelopes) == 1)
+
+            imap.add('late@example.com', 'Another order', 'order 2', attachment=b'\x00report')
+            imap.add('other@example.com', 'Hello', 'nothing to do')
+            await wait_until(lambda: len(smtp.envelopes) == 2)
+            await wait_until(
+                lambda: db.get_mailbox_sync_state('me@example.com', 'INBOX')['last_uid'] == 4)
+            # Another round finds nothing left to answer
+            await asyncio.sleep(0.5)
+        finally:
+            await handler.close()
+            await smtp.stop()
+            await imap.stop()
+        assert not handler.monitoring
+        return smtp, imap
+
+    smtp, imap = asyncio.run(scenario())
+    assert [recipients for _, recipients, _ in smtp.envelopes] == [['early@example.com'],
+                                                                    ['late@example.com']]
+    assert email.message_from_bytes(smtp.envelopes[0][2])['Subject'] == 'Re: My order'
+    # One session served the whole run
+    assert imap.logins == 1
+
+    cached = {m['id']: m for m in db.get_mailbox_messages('me@example.com')}
+    assert cached[2]['status'] == 'processed' and cached[2]['auto_reply_sent']
+    assert cached[4]['status'] == 'processed' and not cached[4]['auto_reply_sent']
+
+    attachments = db.get_attachments()
+    assert [a['filename'] for a in attachments] == ['report.bin']
+    with open(attachments[0]['file_path'], 'rb') as f:
+        assert f.read() == b'\x00report'
@@ -23,6 +23,11 @@ class DashboardPanel(QWidget):
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self.refresh_data)
         self.refresh_timer.start(30000)  # Refresh every 30 seconds
+        
+        # Monitor status is kept in memory, so it can refresh more often
+        self.monitor_status_timer = QTimer()
+        self.monitor_status_timer.timeout.connect(self.update_monitor_status)
+        self.monitor_status_timer.start(5000)
     
     def init_ui(self):
         """Initialize the dashboard UI"""
@@ -247,6 +252,25 @@ class DashboardPanel(QWidget):
         
         status_layout.addLayout(indicators_layout)
         
+        # Per-account monitor status
+        self.monitor_table = QTableWidget()
+        self.monitor_table.setColumnCount(6)
+        self.monitor_table.setHorizontalHeaderLabels(
+            ["Account", "State", "Last Sync", "Messages", "Failures", "Last Error"])
+        
+        header = self.monitor_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for column in range(1, 5):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Stretch)
+        
+        self.monitor_table.setAlternatingRowColors(True)
+        self.monitor_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.monitor_table.setMaximumHeight(200)
+        self.monitor_table.hide()
+        
+        status_layout.addWidget(self.monitor_table)
+        
         # Control buttons
         controls_layout = QHBoxLayout()
         
@@ -353,37 +377,14 @@ class DashboardPanel(QWidget):
             if not self.db_manager:
                 return
                 
-            # Get email logs
-            logs = self.db_manager.get_email_logs(1000)
-            
-            # Total emails
-            total_emails = len(logs)
-            self.total_emails_card.value_label.setText(str(total_emails))
+            stats = self.db_manager.get_dashboard_stats()
             
-            # Today's stats
-            today = datetime.now().date()
-            sent_today = sum(1 for log in logs if 
-                           datetime.fromisoformat(log['sent_at']).date() == today and 
-                           log['status'] == 'sent')
-            failed_today = sum(1 for log in logs if 
-                             datetime.fromisoformat(log['sent_at']).date() == today and 
-                             log['status'] == 'failed')
-            
-            self.sent_today_card.value_label.setText(str(sent_today))
-            self.failed_today_card.value_label.setText(str(failed_today))
-            
-            # Templates
-            templates = self.db_manager.get_email_templates()
-            self.templates_card.value_label.setText(str(len(templates)))
-            
-            # Active schedules
-            schedules = self.db_manager.get_scheduled_emails()
-            active_schedules = sum(1 for s in schedules if s['is_active'])
-            self.schedules_card.value_label.setText(str(active_schedules))
-            
-            # Contacts
-            contacts = self.db_manager.get_contacts()
-            self.contacts_card.value_label.setText(str(len(contacts)))
+            self.total_emails_card.value_label.setText(str(stats['total_emails']))
+            self.sent_today_card.value_label.setText(str(stats['sent_today']))
+            self.failed_today_card.value_label.setText(str(stats['failed_today']))
+            self.templates_card.value_label.setText(str(stats['templates']))
+            self.schedules_card.value_label.setText(str(stats['active_schedules']))
+            self.contacts_card.value_label.setText(str(stats['contacts']))
             
         except Exception as e:
             self.logger.error(f"Error updating statistics: {e}")
@@ -482,18 +483,56 @@ class DashboardPanel(QWidget):
                 self.email_status_label.setText("📧 Email Account: Not configured")
                 self.email_status_indicator.setText("🔴")
             
-            # Check monitoring status
-            if hasattr(self.email_handler, 'monitoring') and self.email_handler.monitoring:
-                self.monitor_status_label.setText("👁️ Inbox Monitor: Running")
-                self.monitor_status_indicator.setText("🟢")
-                self.start_monitor_btn.setText("Stop Monitoring")
-            else:
+            self.update_monitor_status()
+            
+        except Exception as e:
+            self.logger.error(f"Error updating system status: {e}")
+    
+    def update_monitor_status(self):
+        """Update inbox monitoring status and per-account metrics"""
+        try:
+            if not (hasattr(self.email_handler, 'monitoring') and self.email_handler.monitoring):
                 self.monitor_status_label.setText("👁️ Inbox Monitor: Stopped")
                 self.monitor_status_indicator.setText("🔴")
                 self.start_monitor_btn.setText("Start Monitoring")
+                self.monitor_table.hide()
+                return
+            
+            accounts = self.email_handler.get_monitoring_status()
+            failing = sum(1 for account in accounts if account['state'] == 'backoff')
+            
+            status = f"👁️ Inbox Monitor: Running ({len(accounts)} accounts"
+            status += f", {failing} failing)" if failing else ")"
+            self.monitor_status_label.setText(status)
+            self.monitor_status_indicator.setText("🟡" if failing else "🟢")
+            self.start_monitor_btn.setText("Stop Monitoring")
+            
+            self.monitor_table.setRowCount(len(accounts))
+            for row, account in enumerate(accounts):
+                self.monitor_table.setItem(row, 0, QTableWidgetItem(account['account']))
+                
+                state = account['state'].title()
+                if account['state'] == 'backoff':
+                    state = f"Retry in {account['retry_in']:.0f}s"
+                state_item = QTableWidgetItem(state)
+                if account['state'] == 'backoff':
+                    state_item.setBackground(QColor(231, 76, 60, 50))
+                elif account['state'] in ('idle', 'polling'):
+                    state_item.setBackground(QColor(39, 174, 96, 50))
+                self.monitor_table.setItem(row, 1, state_item)
+                
+                last_sync = "Never"
+                if account['last_sync']:
+                    last_sync = f"{account['last_sync'].strftime('%H:%M:%S')} ({account['last_sync_ms']:.0f} ms)"
+                self.monitor_table.setItem(row, 2, QTableWidgetItem(last_sync))
+                self.monitor_table.setItem(row, 3, QTableWidgetItem(str(account['messages'])))
+                self.monitor_table.setItem(row, 4, QTableWidgetItem(str(account['failures'])))
+                self.monitor_table.setItem(row, 5, QTableWidgetItem(account['last_error'][:100]))
+            
+            self.monitor_table.show()
             
         except Exception as e:
-            self.logger.error(f"Error updating system status: {e}")
+            self.logger.error(f"Error updating monitor status: {e}")
     
     def quick_send_email(self):
         """Quick action: Send email"""
@@ -1,24 +1,204 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QTextEdit, QLineEdit, QComboBox, QCheckBox, QSpinBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox,
+    QTableWidget, QTableWidgetItem, QTableView, QAbstractItemView,
+    QHeaderView, QGroupBox,
     QFileDialog, QMessageBox, QProgressBar, QSplitter,
     QFormLayout, QFrame, QTabWidget, QScrollArea, QDialog,
     QDialogButtonBox, QListWidget, QListWidgetItem
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import (
+    Qt, QThread, pyqtSignal, QTimer, QAbstractTableModel, QModelIndex
+)
 from PyQt6.QtGui import QFont, QColor, QTextCharFormat, QTextCursor
 from datetime import datetime
 import logging
-import csv
 import os
-import json
 import re
 
+from send_engine import ResultBatcher
+from contact_import import ContactImporter, read_preview, scan_contacts_file
+from recipient_source import CSVRecipientSource
+
+class ListTableModel(QAbstractTableModel):
+    """Table model over a list of rows that grows in batches.
+    
+    Rows appended to ``rows`` are announced to the view by ``refresh``,
+    coalesced so a burst of appends inserts once per UI frame.
+    """
+    
+    COLUMNS = []
+    FRAME_INTERVAL = 16  # ms
+    
+    def __init__(self, rows=None, parent=None):
+        super().__init__(parent)
+        self.rows = rows if rows is not None else []
+        self._row_count = len(self.rows)
+        
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.FRAME_INTERVAL)
+        self._refresh_timer.timeout.connect(self.flush)
+    
+    def refresh(self):
+        """Show rows changed since the last refresh"""
+        if len(self.rows) < self._row_count:
+            # Rows were removed, no point in waiting
+            self.flush()
+        elif not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+    
+    def flush(self):
+        """Insert pending rows in the view now"""
+        self._refresh_timer.stop()
+        count = len(self.rows)
+        if count > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+            self._row_count = count
+            self.endInsertRows()
+        elif count < self._row_count:
+            self.beginResetModel()
+            self._row_count = count
+            self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+    
+    def display(self, row, column):
+        """Text shown for a cell, by default the row value keyed by the
+        lowercased column title"""
+        return str(row.get(self.COLUMNS[column].lower(), ''))
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display(self.rows[index.row()], index.column())
+        return None
+
+class RecipientsModel(ListTableModel):
+    """Recipients table backed by the panel's contact list"""
+    
+    COLUMNS = ["Email", "Name", "Custom Fields"]
+    
+    def display(self, contact, column):
+        if column == 0:
+            return contact['email']
+        if column == 1:
+            return contact.get('name', '')
+        
+        # Custom fields
+        custom_fields = [f"{k}: {v}" for k, v in contact.items() 
+                       if k not in ['email', 'name'] and v]
+        custom_text = ", ".join(custom_fields[:3])  # Show first 3 fields
+        if len(custom_fields) > 3:
+            custom_text += "..."
+        return custom_text
+
+class SendResultsModel(ListTableModel):
+    """Send results table, one row per processed recipient"""
+    
+    COLUMNS = ["Email", "Name", "Status", "Time"]
+    
+    SENT_COLOR = QColor(39, 174, 96, 50)
+    FAILED_COLOR = QColor(231, 76, 60, 50)
+    
+    def add_results(self, email_infos):
+        """Queue a batch of results from EmailSendThread.emails_sent"""
+        for email_info in email_infos:
+            timestamp = datetime.fromisoformat(email_info['timestamp'])
+            self.rows.append((
+                email_info['email'], email_info['name'], email_info['status'],
+                timestamp.strftime("%H:%M:%S")
+            ))
+        self.refresh()
+    
+    def clear(self):
+        """Remove all results"""
+        self.rows.clear()
+        self.refresh()
+    
+    def display(self, result, column):
+        return result[column]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.BackgroundRole and index.column() == 2:
+            if index.row() < len(self.rows):
+                return self.SENT_COLOR if 'Sent' in self.rows[index.row()][2] else self.FAILED_COLOR
+            return None
+        return super().data(index, role)
+
+class ContactImportThread(QThread):
+    """Thread streaming a CSV file into the contacts table"""
+    progress_updated = pyqtSignal(int, int, list)  # percent, imported, new row errors
+    contacts_imported = pyqtSignal(list)  # contacts written since the last chunk
+    import_finished = pyqtSignal(int, list)  # imported, errors
+    
+    def __init__(self, db_manager, file_path, email_column, name_column):
+        super().__init__()
+        self.db_manager = db_manager
+        self.file_path = file_path
+        self.email_column = email_column
+        self.name_column = name_column
+        self.should_stop = False
+    
+    def stop(self):
+        self.should_stop = True
+    
+    def run(self):
+        def on_progress(bytes_read, total_bytes, imported, new_errors):
+            percent = int(bytes_read * 100 / total_bytes) if total_bytes else 100
+            self.progress_updated.emit(percent, imported, new_errors)
+        
+        importer = ContactImporter(self.db_manager)
+        imported, errors = importer.import_file(
+            self.file_path, email_column=self.email_column, name_column=self.name_column,
+            on_progress=on_progress, on_contacts=self.contacts_imported.emit,
+            should_stop=lambda: self.should_stop
+        )
+        self.import_finished.emit(imported, errors)
+
+class ContactScanThread(QThread):
+    """Thread counting rows, duplicates and invalid addresses in a CSV file"""
+    scan_updated = pyqtSignal(dict, list)  # running stats, new row problems
+    scan_failed = pyqtSignal(str)
+    
+    def __init__(self, file_path, email_column):
+        super().__init__()
+        self.file_path = file_path
+        self.email_column = email_column
+        self.should_stop = False
+    
+    def stop(self):
+        self.should_stop = True
+    
+    def run(self):
+        try:
+            scan_contacts_file(
+                self.file_path, self.email_column,
+                on_progress=self.scan_updated.emit,
+                should_stop=lambda: self.should_stop
+            )
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error scanning {self.file_path}: {e}")
+            self.scan_failed.emit(str(e))
+
 class ContactImportDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, db_manager=None):
         super().__init__(parent)
+        self.db_manager = db_manager
         self.contacts = []
+        self.headers = []
+        self.import_thread = None
+        self.scan_thread = None
         self.init_ui()
     
     def init_ui(self):
@@ -67,6 +247,7 @@ class ContactImportDialog(QDialog):
         mapping_layout = QFormLayout(mapping_group)
         
         self.email_column_combo = QComboBox()
+        self.email_column_combo.currentIndexChanged.connect(lambda: self.start_scan())
         mapping_layout.addRow("Email Column:", self.email_column_combo)
         
         self.name_column_combo = QComboBox()
@@ -74,13 +255,32 @@ class ContactImportDialog(QDialog):
         
         layout.addWidget(mapping_group)
         
+        # Full file scan, filled in as the scan thread reads the file
+        self.scan_label = QLabel()
+        self.scan_label.setVisible(False)
+        layout.addWidget(self.scan_label)
+        
+        # Import progress
+        self.import_progress = QProgressBar()
+        self.import_progress.setVisible(False)
+        layout.addWidget(self.import_progress)
+        
+        self.import_status_label = QLabel()
+        self.import_status_label.setVisible(False)
+        layout.addWidget(self.import_status_label)
+        
+        self.import_errors_list = QListWidget()
+        self.import_errors_list.setMaximumHeight(100)
+        self.import_errors_list.setVisible(False)
+        layout.addWidget(self.import_errors_list)
+        
         # Buttons
-        button_box = QDialogButtonBox(
+        self.button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
         )
-        button_box.accepted.connect(self.import_contacts)
-        button_box.rejected.connect(self.reject)
-        layout.addWidget(button_box)
+        self.button_box.accepted.connect(self.import_contacts)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
     
     def browse_file(self):
         """Browse for CSV file"""
@@ -93,116 +293,187 @@ class ContactImportDialog(QDialog):
             self.load_preview(file_path)
     
     def load_preview(self, file_path):
-        """Load CSV preview"""
+        """Load CSV preview from the start of the file"""
+        self.stop_scan()
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                # Detect delimiter
-                sample = file.read(1024)
-                file.seek(0)
-                
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-                
-                reader = csv.reader(file, delimiter=delimiter)
-                rows = list(reader)
-                
-                if not rows:
-                    QMessageBox.warning(self, "Error", "CSV file is empty.")
-                    return
-                
-                # Setup preview table
-                headers = rows[0]
-                self.preview_table.setColumnCount(len(headers))
-                self.preview_table.setHorizontalHeaderLabels(headers)
-                
-                # Show first 5 rows
-                preview_rows = rows[1:6] if len(rows) > 1 else []
-                self.preview_table.setRowCount(len(preview_rows))
-                
-                for row_idx, row in enumerate(preview_rows):
-                    for col_idx, cell in enumerate(row):
-                        if col_idx < len(headers):
-                            self.preview_table.setItem(row_idx, col_idx, QTableWidgetItem(str(cell)))
-                
-                # Update column combos
-                self.email_column_combo.clear()
-                self.name_column_combo.clear()
-                
-                self.email_column_combo.addItem("Select column...", -1)
-                self.name_column_combo.addItem("Select column...", -1)
-                
-                for idx, header in enumerate(headers):
-                    self.email_column_combo.addItem(header, idx)
-                    self.name_column_combo.addItem(header, idx)
-                
-                # Auto-detect email column
-                for idx, header in enumerate(headers):
-                    if 'email' in header.lower() or 'mail' in header.lower():
-                        self.email_column_combo.setCurrentIndex(idx + 1)
-                        break
-                
-                # Auto-detect name column
-                for idx, header in enumerate(headers):
-                    if 'name' in header.lower() or 'first' in header.lower():
-                        self.name_column_combo.setCurrentIndex(idx + 1)
-                        break
-                
-                # Store data for import
-                self.csv_data = rows
-                
+            headers, preview_rows = read_preview(file_path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load CSV file: {str(e)}")
+            return
+        
+        if not headers:
+            QMessageBox.warning(self, "Error", "CSV file is empty.")
+            return
+        
+        # Setup preview table
+        self.preview_table.setColumnCount(len(headers))
+        self.preview_table.setHorizontalHeaderLabels(headers)
+        self.preview_table.setRowCount(len(preview_rows))
+        
+        for row_idx, row in enumerate(preview_rows):
+            for col_idx, cell in enumerate(row):
+                if col_idx < len(headers):
+                    self.preview_table.setItem(row_idx, col_idx, QTableWidgetItem(str(cell)))
+        
+        # Update column combos without rescanning for every item
+        self.email_column_combo.blockSignals(True)
+        self.email_column_combo.clear()
+        self.name_column_combo.clear()
+        
+        self.email_column_combo.addItem("Select column...", -1)
+        self.name_column_combo.addItem("Select column...", -1)
+        
+        for idx, header in enumerate(headers):
+            self.email_column_combo.addItem(header, idx)
+            self.name_column_combo.addItem(header, idx)
+        
+        # Auto-detect email column
+        for idx, header in enumerate(headers):
+            if 'email' in header.lower() or 'mail' in header.lower():
+                self.email_column_combo.setCurrentIndex(idx + 1)
+                break
+        
+        # Auto-detect name column
+        for idx, header in enumerate(headers):
+            if 'name' in header.lower() or 'first' in header.lower():
+                self.name_column_combo.setCurrentIndex(idx + 1)
+                break
+        
+        self.email_column_combo.blockSignals(False)
+        
+        self.headers = headers
+        self.start_scan()
+    
+    def start_scan(self):
+        """Scan the whole file in the background for the selected email column"""
+        self.stop_scan()
+        
+        email_col = self.email_column_combo.currentData()
+        if email_col is None or email_col == -1:
+            self.scan_label.setVisible(False)
+            return
+        
+        self.scan_label.setText("Scanning file...")
+        self.scan_label.setVisible(True)
+        self.import_errors_list.clear()
+        self.import_errors_list.setVisible(False)
+        
+        self.scan_thread = ContactScanThread(self.file_path_edit.text(), email_col)
+        self.scan_thread.scan_updated.connect(self.update_scan)
+        self.scan_thread.scan_failed.connect(self.on_scan_failed)
+        self.scan_thread.start()
+    
+    def stop_scan(self):
+        """Stop a running scan"""
+        if self.scan_thread is not None:
+            self.scan_thread.scan_updated.disconnect(self.update_scan)
+            self.scan_thread.scan_failed.disconnect(self.on_scan_failed)
+            self.scan_thread.stop()
+            self.scan_thread.wait()
+            self.scan_thread = None
+    
+    def update_scan(self, stats, new_errors):
+        """Show scan totals and stream problem rows into the list"""
+        text = (f"{stats['rows']:,} rows, {stats['valid']:,} valid, "
+                f"{stats['duplicates']:,} duplicates, "
+                f"{stats['invalid'] + stats['missing']:,} invalid or missing")
+        if not stats['complete'] and stats['total_bytes']:
+            percent = int(stats['bytes_read'] * 100 / stats['total_bytes'])
+            text = f"Scanning ({percent}%): {text}"
+        self.scan_label.setText(text)
+        
+        if new_errors:
+            self.import_errors_list.addItems(new_errors)
+            self.import_errors_list.setVisible(True)
+    
+    def on_scan_failed(self, error):
+        """Replace the scanning message with the error"""
+        self.scan_label.setText(f"Could not scan file: {error}")
+        self.scan_label.setVisible(True)
     
     def import_contacts(self):
-        """Import contacts from CSV"""
-        try:
-            if not hasattr(self, 'csv_data'):
-                QMessageBox.warning(self, "Error", "Please select a CSV file first.")
-                return
-            
-            email_col = self.email_column_combo.currentData()
-            name_col = self.name_column_combo.currentData()
-            
-            if email_col == -1:
-                QMessageBox.warning(self, "Error", "Please select the email column.")
-                return
-            
-            headers = self.csv_data[0]
-            data_rows = self.csv_data[1:]
-            
-            self.contacts = []
-            
-            for row in data_rows:
-                if len(row) > email_col and row[email_col].strip():
-                    contact = {
-                        'email': row[email_col].strip(),
-                        'name': row[name_col].strip() if name_col != -1 and len(row) > name_col else '',
-                    }
-                    
-                    # Add all columns as custom fields
-                    for idx, header in enumerate(headers):
-                        if idx < len(row) and row[idx].strip():
-                            contact[header.lower().replace(' ', '_')] = row[idx].strip()
-                    
-                    self.contacts.append(contact)
-            
-            if not self.contacts:
-                QMessageBox.warning(self, "Error", "No valid contacts found in the CSV file.")
-                return
-            
-            QMessageBox.information(
-                self, "Success", 
-                f"Successfully imported {len(self.contacts)} contacts."
-            )
-            
-            self.accept()
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to import contacts: {str(e)}")
+        """Import contacts from CSV in a background thread"""
+        if not self.headers:
+            QMessageBox.warning(self, "Error", "Please select a CSV file first.")
+            return
+        
+        email_col = self.email_column_combo.currentData()
+        name_col = self.name_column_combo.currentData()
+        
+        if email_col == -1:
+            QMessageBox.warning(self, "Error", "Please select the email column.")
+            return
+        
+        # The import reports its own errors
+        self.stop_scan()
+        self.scan_label.setVisible(False)
+        
+        self.contacts = []
+        self.import_errors_list.clear()
+        self.import_progress.setValue(0)
+        self.import_progress.setVisible(True)
+        self.import_status_label.setText("Importing contacts...")
+        self.import_status_label.setVisible(True)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        
+        self.import_thread = ContactImportThread(
+            self.db_manager, self.file_path_edit.text(), email_col,
+            name_col if name_col != -1 else None
+        )
+        self.import_thread.progress_updated.connect(self.update_import_progress)
+        self.import_thread.contacts_imported.connect(self.add_imported_contacts)
+        self.import_thread.import_finished.connect(self.import_finished)
+        self.import_thread.start()
+    
+    def update_import_progress(self, percent, imported, new_errors):
+        """Show import progress and stream row errors into the list"""
+        self.import_progress.setValue(percent)
+        self.import_status_label.setText(f"Imported {imported} contacts...")
+        if new_errors:
+            self.import_errors_list.addItems(new_errors)
+            self.import_errors_list.setVisible(True)
+    
+    def add_imported_contacts(self, contacts):
+        """Collect contacts written by the import thread"""
+        self.contacts.extend(contacts)
+    
+    def import_finished(self, imported, errors):
+        """Handle import completion"""
+        stopped = self.import_thread.should_stop
+        self.import_thread = None
+        
+        if stopped:
+            return
+        
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(True)
+        self.import_progress.setVisible(False)
+        
+        if not imported:
+            self.import_status_label.setText("No contacts imported")
+            message = "No valid contacts found in the CSV file."
+            if errors:
+                message += "\n\n" + "\n".join(errors[:10])
+            QMessageBox.warning(self, "Error", message)
+            return
+        
+        message = f"Successfully imported {imported} contacts."
+        if errors:
+            message += f"\n\n{len(errors)} rows were skipped:\n" + "\n".join(errors[:10])
+        QMessageBox.information(self, "Success", message)
+        
+        self.accept()
+    
+    def reject(self):
+        """Stop a running import, keeping the contacts written so far"""
+        self.stop_scan()
+        if self.import_thread is not None:
+            self.import_thread.stop()
+            self.import_thread.wait()
+        super().reject()
 
 class EmailSendThread(QThread):
     progress_updated = pyqtSignal(int, int, str)  # current, total, status
-    email_sent = pyqtSignal(dict)  # email info
+    emails_sent = pyqtSignal(list)  # email info for each recipient since the last batch
     finished_sending = pyqtSignal(int, int)  # sent, failed
     
     def __init__(self, email_handler, db_manager, email_data, contacts):
@@ -217,77 +488,59 @@ class EmailSendThread(QThread):
         self.should_stop = True
     
     def run(self):
-        sent_count = 0
-        failed_count = 0
+        # A CSVRecipientSource counts its rows with one pass over the file
+        self.progress_updated.emit(0, 0, "Counting recipients...")
         total = len(self.contacts)
+        processed = 0
+        
+        invalid = getattr(self.contacts, 'invalid_count', None)
+        if invalid:
+            self.progress_updated.emit(0, total, f"Skipping {invalid} row(s) without a valid email")
         
         account = self.db_manager.get_active_email_account()
         if not account:
             self.progress_updated.emit(0, total, "No email account configured")
             return
         
-        for i, contact in enumerate(self.contacts):
-            if self.should_stop:
-                break
-            
-            try:
-                # Personalize email
-                subject = self.personalize_text(self.email_data['subject'], contact)
-                body = self.personalize_text(self.email_data['body'], contact)
-                
-                # Send email
-                success, message = self.email_handler.send_email(
-                    account,
-                    contact['email'],
-                    subject,
-                    body,
-                    self.email_data.get('attachments', []),
-                    self.email_data.get('is_html', False)
-                )
-                
-                if success:
-                    sent_count += 1
-                    status = "Sent"
-                else:
-                    failed_count += 1
-                    status = f"Failed: {message}"
-                
-                # Emit progress
-                self.progress_updated.emit(i + 1, total, f"Processing {contact['email']}...")
-                
-                # Emit email info
-                self.email_sent.emit({
-                    'email': contact['email'],
-                    'name': contact.get('name', ''),
-                    'status': status,
-                    'timestamp': datetime.now().isoformat()
-                })
-                
-                # Small delay to prevent overwhelming the server
-                self.msleep(100)
-                
-            except Exception as e:
-                failed_count += 1
-                self.email_sent.emit({
-                    'email': contact['email'],
-                    'name': contact.get('name', ''),
-                    'status': f"Error: {str(e)}",
-                    'timestamp': datetime.now().isoformat()
-                })
-        
-        self.finished_sending.emit(sent_count, failed_count)
-    
-    def personalize_text(self, text, contact):
-        """Replace placeholders with contact data"""
-        if not text:
-            return text
+        template = {
+            'id': self.email_data.get('template_id'),
+            'subject': self.email_data['subject'],
+            'body': self.email_data['body'],
+            'is_html': self.email_data.get('is_html', False)
+        }
         
-        # Replace common placeholders
-        for key, value in contact.items():
-            placeholder = f"{{{key}}}"
-            text = text.replace(placeholder, str(value))
+        # Called one batch at a time, from this thread or the batcher's timer
+        def emit_results(email_infos):
+            nonlocal processed
+            processed += len(email_infos)
+            
+            # One progress update and one result batch per interval
+            self.progress_updated.emit(processed, total, f"Processing {email_infos[-1]['email']}...")
+            self.emails_sent.emit(email_infos)
+        
+        batcher = ResultBatcher(emit_results, max_rate=10)
+        
+        def on_result(contact, success, message):
+            batcher.add({
+                'email': contact['email'],
+                'name': contact.get('name', ''),
+                'status': "Sent" if success else f"Failed: {message}",
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        # Sends run concurrently, paced by the per-account rate limiter
+        results = self.email_handler.send_batch_emails(
+            sender_config=account,
+            recipients=self.contacts,
+            template=template,
+            attachments=self.email_data.get('attachments', []),
+            on_result=on_result,
+            should_stop=lambda: self.should_stop,
+            delay=self.email_data.get('delay')
+        )
+        batcher.flush()
         
-        return text
+        self.finished_sending.emit(results['sent'], results['failed'])
 
 class EmailSenderPanel(QWidget):
     def __init__(self, db_manager, email_handler):
@@ -297,6 +550,7 @@ class EmailSenderPanel(QWidget):
         self.logger = logging.getLogger(__name__)
         
         self.contacts = []
+        self.recipient_source = None  # CSVRecipientSource used instead of contacts
         self.send_thread = None
         
         self.init_ui()
@@ -441,6 +695,12 @@ class EmailSenderPanel(QWidget):
         import_db_btn.clicked.connect(self.load_contacts_from_db)
         import_layout.addWidget(import_db_btn)
         
+        stream_csv_btn = QPushButton("📄 Send from CSV File")
+        stream_csv_btn.setObjectName("secondaryButton")
+        stream_csv_btn.setToolTip("Stream recipients from a large CSV file without loading it")
+        stream_csv_btn.clicked.connect(self.use_csv_source)
+        import_layout.addWidget(stream_csv_btn)
+        
         import_layout.addStretch()
         
         clear_btn = QPushButton("🗑️ Clear All")
@@ -471,18 +731,19 @@ class EmailSenderPanel(QWidget):
         recipients_layout.addLayout(table_header)
         
         # Recipients table
-        self.recipients_table = QTableWidget()
-        self.recipients_table.setColumnCount(3)
-        self.recipients_table.setHorizontalHeaderLabels(["Email", "Name", "Custom Fields"])
+        self.recipients_model = RecipientsModel(self.contacts, self)
+        self.recipients_table = QTableView()
+        self.recipients_table.setModel(self.recipients_model)
         
         # Configure table
         header = self.recipients_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.recipients_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         
         self.recipients_table.setAlternatingRowColors(True)
-        self.recipients_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.recipients_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         
         recipients_layout.addWidget(self.recipients_table)
         
@@ -549,9 +810,10 @@ class EmailSenderPanel(QWidget):
         results_group = QGroupBox("Send Results")
         results_layout = QVBoxLayout(results_group)
         
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(4)
-        self.results_table.setHorizontalHeaderLabels(["Email", "Name", "Status", "Time"])
+        self.results_model = SendResultsModel(parent=self)
+        self.results_model.rowsInserted.connect(self.on_results_inserted)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
         
         # Configure table
         header = self.results_table.horizontalHeader()
@@ -559,6 +821,9 @@ class EmailSenderPanel(QWidget):
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        # Size columns from visible rows only
+        header.setResizeContentsPrecision(0)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         
         self.results_table.setAlternatingRowColors(True)
         
@@ -815,21 +1080,11 @@ class EmailSenderPanel(QWidget):
     
     def import_contacts(self):
         """Import contacts from CSV"""
-        dialog = ContactImportDialog(self)
+        # The dialog saves contacts to the database as it imports them
+        dialog = ContactImportDialog(self, self.db_manager)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             self.contacts.extend(dialog.contacts)
             self.update_recipients_table()
-            
-            # Save contacts to database
-            try:
-                for contact in dialog.contacts:
-                    self.db_manager.add_contact(
-                        contact['email'],
-                        contact.get('name', ''),
-                        json.dumps({k: v for k, v in contact.items() if k not in ['email', 'name']})
-                    )
-            except Exception as e:
-                self.logger.error(f"Error saving contacts: {e}")
     
     def load_contacts_from_db(self):
         """Load contacts from database"""
@@ -842,13 +1097,9 @@ class EmailSenderPanel(QWidget):
                     'name': contact['name']
                 }
                 
-                # Add custom fields
-                if contact['custom_fields']:
-                    try:
-                        custom_fields = json.loads(contact['custom_fields'])
-                        contact_data.update(custom_fields)
-                    except:
-                        pass
+                # Add custom fields, decoded by get_contacts
+                if isinstance(contact.get('additional_data'), dict):
+                    contact_data.update(contact['additional_data'])
                 
                 self.contacts.append(contact_data)
             
@@ -889,31 +1140,61 @@ class EmailSenderPanel(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             self.contacts.clear()
+            self.set_recipient_source(None)
             self.update_recipients_table()
     
+    def use_csv_source(self):
+        """Send to recipients streamed from a CSV file instead of the list"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Select CSV File", "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            headers, _ = read_preview(file_path)
+            email_col = next((idx for idx, header in enumerate(headers)
+                              if 'mail' in header.lower()), 'email')
+            name_col = next((idx for idx, header in enumerate(headers)
+                             if 'name' in header.lower()), None)
+            source = CSVRecipientSource(file_path, email_column=email_col, name_column=name_col)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to open CSV file: {str(e)}")
+            return
+        
+        # The file replaces any recipients in the list
+        self.contacts.clear()
+        self.set_recipient_source(source)
+        self.update_recipients_table()
+    
+    def set_recipient_source(self, source):
+        """Stream recipients from a source, closing the one it replaces.
+        
+        A source a running send still reads from is closed when the send
+        finishes instead.
+        """
+        previous = self.recipient_source
+        self.recipient_source = source
+        if previous is not None and previous is not source and not (
+                self.send_thread is not None and self.send_thread.contacts is previous):
+            previous.close()
+    
     def update_recipients_table(self):
         """Update recipients table"""
-        self.recipients_table.setRowCount(len(self.contacts))
-        self.recipients_count_label.setText(f"Recipients: {len(self.contacts)}")
+        if self.contacts:
+            self.set_recipient_source(None)
         
-        for row, contact in enumerate(self.contacts):
-            # Email
-            self.recipients_table.setItem(row, 0, QTableWidgetItem(contact['email']))
-            
-            # Name
-            self.recipients_table.setItem(row, 1, QTableWidgetItem(contact.get('name', '')))
-            
-            # Custom fields
-            custom_fields = [f"{k}: {v}" for k, v in contact.items() 
-                           if k not in ['email', 'name'] and v]
-            custom_text = ", ".join(custom_fields[:3])  # Show first 3 fields
-            if len(custom_fields) > 3:
-                custom_text += "..."
-            self.recipients_table.setItem(row, 2, QTableWidgetItem(custom_text))
+        self.recipients_model.refresh()
+        if self.recipient_source is not None:
+            self.recipients_count_label.setText(
+                f"Recipients: streamed from {os.path.basename(self.recipient_source.file_path)}"
+            )
+        else:
+            self.recipients_count_label.setText(f"Recipients: {len(self.contacts)}")
     
     def send_emails(self):
         """Send emails to all recipients"""
-        if not self.contacts:
+        if not self.contacts and self.recipient_source is None:
             QMessageBox.warning(self, "Warning", "No recipients added.")
             return
         
@@ -930,7 +1211,9 @@ class EmailSenderPanel(QWidget):
             'subject': self.subject_edit.text().strip(),
             'body': self.body_edit.toHtml() if self.html_checkbox.isChecked() else self.body_edit.toPlainText(),
             'is_html': self.html_checkbox.isChecked(),
-            'attachments': []
+            'attachments': [],
+            'template_id': self.template_combo.currentData(),
+            'delay': self.delay_spin.value()
         }
         
         # Get attachments
@@ -940,11 +1223,17 @@ class EmailSenderPanel(QWidget):
             email_data['attachments'].append(file_path)
         
         # Test mode check
-        contacts = self.contacts.copy()
+        if self.recipient_source is not None:
+            contacts = self.recipient_source
+            recipients_text = f"every recipient in {os.path.basename(contacts.file_path)}"
+        else:
+            contacts = self.contacts.copy()
+            recipients_text = f"{len(contacts)} recipient(s)"
         if self.test_mode_check.isChecked():
             account = self.db_manager.get_active_email_account()
             if account:
                 contacts = [{'email': account['email'], 'name': 'Test User'}]
+                recipients_text = "1 recipient(s)"
             else:
                 QMessageBox.warning(self, "Error", "No email account configured for test mode.")
                 return
@@ -952,7 +1241,7 @@ class EmailSenderPanel(QWidget):
         # Confirm sending
         reply = QMessageBox.question(
             self, "Confirm Send",
-            f"Send email to {len(contacts)} recipient(s)?",
+            f"Send email to {recipients_text}?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         
@@ -966,11 +1255,12 @@ class EmailSenderPanel(QWidget):
         self.stop_btn.setEnabled(True)
         self.progress_bar.setVisible(True)
         self.progress_label.setVisible(True)
-        self.progress_bar.setMaximum(len(contacts))
+        # Busy indicator until the send thread reports the total
+        self.progress_bar.setMaximum(0)
         self.progress_bar.setValue(0)
         
         # Clear results table
-        self.results_table.setRowCount(0)
+        self.results_model.clear()
         
         # Start sending thread
         self.send_thread = EmailSendThread(
@@ -978,7 +1268,7 @@ class EmailSenderPanel(QWidget):
         )
         
         self.send_thread.progress_updated.connect(self.update_progress)
-        self.send_thread.email_sent.connect(self.add_result)
+        self.send_thread.emails_sent.connect(self.add_results)
         self.send_thread.finished_sending.connect(self.sending_finished)
         
         self.send_thread.start()
@@ -991,34 +1281,16 @@ class EmailSenderPanel(QWidget):
     
     def update_progress(self, current, total, status):
         """Update sending progress"""
+        self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(current)
         self.progress_label.setText(f"{status} ({current}/{total})")
     
-    def add_result(self, email_info):
-        """Add email result to table"""
-        row = self.results_table.rowCount()
-        self.results_table.insertRow(row)
-        
-        # Email
-        self.results_table.setItem(row, 0, QTableWidgetItem(email_info['email']))
-        
-        # Name
-        self.results_table.setItem(row, 1, QTableWidgetItem(email_info['name']))
-        
-        # Status
-        status_item = QTableWidgetItem(email_info['status'])
-        if 'Sent' in email_info['status']:
-            status_item.setBackground(QColor(39, 174, 96, 50))
-        else:
-            status_item.setBackground(QColor(231, 76, 60, 50))
-        self.results_table.setItem(row, 2, status_item)
-        
-        # Time
-        timestamp = datetime.fromisoformat(email_info['timestamp'])
-        time_str = timestamp.strftime("%H:%M:%S")
-        self.results_table.setItem(row, 3, QTableWidgetItem(time_str))
-        
-        # Scroll to bottom
+    def add_results(self, email_infos):
+        """Add a batch of email results, inserted with the next frame's batch"""
+        self.results_model.add_results(email_infos)
+    
+    def on_results_inserted(self):
+        """Keep the latest results in view"""
         self.results_table.scrollToBottom()
     
     def sending_finished(self, sent_count, failed_count):
@@ -1038,4 +1310,8 @@ class EmailSenderPanel(QWidget):
             f"Total: {sent_count + failed_count}"
         )
         
+        # Close a streamed source that was replaced while it was being sent
+        contacts = self.send_thread.contacts
+        if isinstance(contacts, CSVRecipientSource) and contacts is not self.recipient_source:
+            contacts.close()
         self.send_thread = None
\ No newline at end of file
@@ -196,6 +196,7 @@ class InboxMonitorPanel(QWidget):
         self.db_manager = db_manager
         self.email_handler = email_handler
         self.logger = logging.getLogger(__name__)
+        self.loaded_emails = None
         
         self.init_ui()
         self.load_rules()
@@ -204,7 +205,7 @@ class InboxMonitorPanel(QWidget):
         # Setup refresh timer
         self.refresh_timer = QTimer()
         self.refresh_timer.timeout.connect(self.load_recent_emails)
-        self.refresh_timer.start(30000)  # Refresh every 30 seconds
+        self.refresh_timer.start(5000)  # Refresh every 5 seconds from the local cache
     
     def init_ui(self):
         """Initialize the inbox monitor UI"""
@@ -516,14 +517,20 @@ class InboxMonitorPanel(QWidget):
             QMessageBox.critical(self, "Error", f"Failed to load rules: {str(e)}")
     
     def load_recent_emails(self):
-        """Load recent emails"""
+        """Load recent emails from the local mailbox cache.
+        
+        The cache is filled by the monitor's background sync, so this is
+        a local query and never touches the IMAP server.
+        """
         try:
-            # Get recent emails from email handler
             account = self.db_manager.get_active_email_account()
             if not account:
                 return
             
-            emails = self.email_handler.get_recent_emails(account, limit=50)
+            emails = self.db_manager.get_mailbox_messages(account['email'], 'INBOX', limit=50)
+            if emails == self.loaded_emails:
+                return  # Unchanged, keep the selection
+            self.loaded_emails = emails
             
             self.emails_table.setRowCount(len(emails))
             
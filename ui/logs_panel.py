@@ -1,18 +1,22 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox,
+    QTableView, QAbstractItemView, QHeaderView, QGroupBox,
     QLineEdit, QComboBox, QDateEdit, QCheckBox, QSpinBox,
     QDialog, QDialogButtonBox, QFormLayout, QMessageBox,
     QSplitter, QFrame, QTabWidget, QTextEdit, QProgressBar,
     QFileDialog, QApplication
 )
-from PyQt6.QtCore import Qt, QDate, QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import (
+    Qt, QDate, QThread, pyqtSignal, QTimer, QAbstractTableModel, QModelIndex
+)
 from PyQt6.QtGui import QFont, QColor, QPixmap, QIcon
 import logging
 import json
 import csv
 import os
-from datetime import datetime, timedelta
+import textwrap
+from collections import OrderedDict
+from datetime import datetime, timedelta, time
 
 class ExportThread(QThread):
     """Thread for exporting logs to avoid UI blocking"""
@@ -20,16 +24,36 @@ class ExportThread(QThread):
     export_completed = pyqtSignal(str)
     export_failed = pyqtSignal(str)
     
-    def __init__(self, logs, file_path, export_format):
+    PAGE_SIZE = 1000
+    
+    def __init__(self, db_manager, filters, file_path, export_format):
         super().__init__()
-        self.logs = logs
+        self.db_manager = db_manager
+        self.filters = filters
         self.file_path = file_path
         self.export_format = export_format
     
+    def iter_logs(self):
+        """Yield matching logs page by page, reporting progress"""
+        total_logs = sum(self.db_manager.count_email_logs(self.filters).values())
+        exported = 0
+        cursor = None
+        
+        while True:
+            logs, cursor = self.db_manager.query_email_logs(
+                self.filters, cursor, self.PAGE_SIZE, include_body=True
+            )
+            for log in logs:
+                yield log
+            
+            exported += len(logs)
+            if total_logs:
+                self.progress_updated.emit(min(100, int(exported / total_logs * 100)))
+            if cursor is None:
+                break
+    
     def run(self):
         try:
-            total_logs = len(self.logs)
-            
             if self.export_format.lower() == 'csv':
                 self.export_to_csv()
             elif self.export_format.lower() == 'json':
@@ -46,28 +70,24 @@ class ExportThread(QThread):
     def export_to_csv(self):
         """Export logs to CSV format"""
         with open(self.file_path, 'w', newline='', encoding='utf-8') as csvfile:
-            if not self.logs:
-                return
-            
-            # Get all unique keys from logs
-            fieldnames = set()
-            for log in self.logs:
-                fieldnames.update(log.keys())
-            
-            fieldnames = sorted(list(fieldnames))
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for i, log in enumerate(self.logs):
+            writer = None
+            for log in self.iter_logs():
+                if writer is None:
+                    # Every row has the same columns
+                    writer = csv.DictWriter(csvfile, fieldnames=sorted(log.keys()))
+                    writer.writeheader()
                 writer.writerow(log)
-                progress = int((i + 1) / len(self.logs) * 100)
-                self.progress_updated.emit(progress)
     
     def export_to_json(self):
         """Export logs to JSON format"""
         with open(self.file_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(self.logs, jsonfile, indent=2, default=str, ensure_ascii=False)
+            # Write the array one entry at a time, formatted like json.dump(indent=2)
+            separator = '[\n'
+            for log in self.iter_logs():
+                entry = json.dumps(log, indent=2, default=str, ensure_ascii=False)
+                jsonfile.write(separator + textwrap.indent(entry, '  '))
+                separator = ',\n'
+            jsonfile.write('[]' if separator == '[\n' else '\n]')
             self.progress_updated.emit(100)
 
 class LogDetailDialog(QDialog):
@@ -179,8 +199,8 @@ class LogDetailDialog(QDialog):
             return
         
         # Basic info
-        self.timestamp_label.setText(str(self.log_data.get('timestamp', 'N/A')))
-        self.recipient_label.setText(self.log_data.get('recipient', 'N/A'))
+        self.timestamp_label.setText(str(self.log_data.get('sent_at', 'N/A')))
+        self.recipient_label.setText(self.log_data.get('recipient_email', 'N/A'))
         self.subject_label.setText(self.log_data.get('subject', 'N/A'))
         
         # Status with color
@@ -193,7 +213,7 @@ class LogDetailDialog(QDialog):
         else:
             self.status_label.setStyleSheet("color: #f39c12; font-weight: bold;")
         
-        self.template_label.setText(self.log_data.get('template_name', 'N/A'))
+        self.template_label.setText(self.log_data.get('template_name') or 'N/A')
         
         # Attachments
         attachments = self.log_data.get('attachments', '')
@@ -203,7 +223,7 @@ class LogDetailDialog(QDialog):
             self.attachments_label.setText("None")
         
         # Content
-        body = self.log_data.get('body', '')
+        body = self.log_data.get('body') or ''
         if body:
             self.body_text.setPlainText(body)
         else:
@@ -211,10 +231,10 @@ class LogDetailDialog(QDialog):
         
         # Technical
         self.message_id_label.setText(self.log_data.get('message_id', 'N/A'))
-        self.sender_label.setText(self.log_data.get('sender', 'N/A'))
+        self.sender_label.setText(self.log_data.get('sender_email', 'N/A'))
         self.reply_to_label.setText(self.log_data.get('reply_to', 'N/A'))
         
-        error_message = self.log_data.get('error_message', '')
+        error_message = self.log_data.get('error_message') or ''
         if error_message:
             self.error_message_label.setText(error_message)
             self.error_message_label.setStyleSheet("color: #e74c3c;")
@@ -224,15 +244,181 @@ class LogDetailDialog(QDialog):
         
         self.retry_count_label.setText(str(self.log_data.get('retry_count', 0)))
 
+class EmailLogsModel(QAbstractTableModel):
+    """Table model loading email logs from the database page by page.
+    
+    Rows are appended through canFetchMore/fetchMore as the view scrolls.
+    Only the first page and the most recently used others are kept in
+    memory; the rest are reloaded from their keyset cursor when they scroll
+    back into view. The first page has no cursor to reload from, since
+    logs sent after the model was filled would shift its rows, so it is
+    never evicted.
+    """
+    
+    COLUMNS = ["Timestamp", "Recipient", "Subject", "Status", "Template", "Attachments", "Retries"]
+    MAX_CACHED_PAGES = 20
+    
+    STATUS_COLORS = {
+        'sent': QColor(39, 174, 96),
+        'failed': QColor(231, 76, 60),
+    }
+    PENDING_COLOR = QColor(243, 156, 18)
+    
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.filters = None
+        self.page_size = 100
+        self.status_font = QFont('Arial', 9, QFont.Weight.Bold)
+        
+        self._row_count = 0
+        self._pages = OrderedDict()
+        # Cursor each loaded page starts after, plus the one for the next page
+        self._page_cursors = [None]
+        self._exhausted = True
+    
+    def set_filters(self, filters, page_size=100):
+        """Show logs matching query_email_logs filters, None for no logs"""
+        self.beginResetModel()
+        self.filters = filters
+        self.page_size = page_size
+        self._row_count = 0
+        self._pages.clear()
+        self._page_cursors = [None]
+        self._exhausted = filters is None
+        self.endResetModel()
+        
+        if self.canFetchMore():
+            self.fetchMore()
+    
+    def _query(self, after_cursor):
+        """Load one page of logs after the cursor"""
+        if self.filters.get('search'):
+            # Best matches first
+            return self.db_manager.search_email_logs(
+                self.filters['search'], self.filters, after_cursor, self.page_size
+            )
+        return self.db_manager.query_email_logs(self.filters, after_cursor, self.page_size)
+    
+    def _cache_page(self, page_index, logs):
+        """Keep a page in memory, evicting the least recently used one"""
+        self._pages[page_index] = logs
+        self._pages.move_to_end(page_index)
+        while len(self._pages) > self.MAX_CACHED_PAGES:
+            del self._pages[next(index for index in self._pages if index != 0)]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return super().headerData(section, orientation, role)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        
+        page_index = len(self._page_cursors) - 1
+        try:
+            logs, next_cursor = self._query(self._page_cursors[page_index])
+        except Exception as e:
+            self.logger.error(f"Error loading logs: {e}")
+            self._exhausted = True
+            return
+        
+        if next_cursor is None:
+            self._exhausted = True
+        else:
+            self._page_cursors.append(next_cursor)
+        
+        if logs:
+            self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(logs) - 1)
+            self._cache_page(page_index, logs)
+            self._row_count += len(logs)
+            self.endInsertRows()
+    
+    def log_at(self, row):
+        """Get the list columns of the log shown in a row"""
+        if row < 0 or row >= self._row_count:
+            return None
+        
+        page_index, offset = divmod(row, self.page_size)
+        logs = self._pages.get(page_index)
+        if logs is None:
+            try:
+                logs, _ = self._query(self._page_cursors[page_index])
+            except Exception as e:
+                self.logger.error(f"Error reloading logs: {e}")
+                return None
+            self._cache_page(page_index, logs)
+        else:
+            self._pages.move_to_end(page_index)
+        
+        return logs[offset] if offset < len(logs) else None
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        log = self.log_at(index.row())
+        if log is None:
+            return None
+        
+        column = index.column()
+        status = log.get('status') or 'Unknown'
+        
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return (log.get('sent_at') or '')[:19]  # Remove microseconds
+            if column == 1:
+                return log.get('recipient_email', '')
+            if column == 2:
+                subject = log.get('subject', '')
+                return subject[:47] + "..." if len(subject) > 50 else subject
+            if column == 3:
+                return status
+            if column == 4:
+                return log.get('template_name') or 'N/A'
+            if column == 5:
+                # Attachments and retries aren't recorded for sent emails
+                return "-"
+            if column == 6:
+                return "0"
+        elif role == Qt.ItemDataRole.UserRole:
+            return log.get('id')
+        elif column == 3:
+            color = self.STATUS_COLORS.get(status.lower(), self.PENDING_COLOR)
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return color
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return QColor(color.red(), color.green(), color.blue(), 50)
+            if role == Qt.ItemDataRole.FontRole:
+                return self.status_font
+        
+        return None
+
 class LogsPanel(QWidget):
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
         self.logger = logging.getLogger(__name__)
         
-        # Store all logs for filtering
-        self.all_logs = []
-        self.filtered_logs = []
+        # Filters of the logs shown, None when no log can match
+        self.filters = {}
+        
+        # Search runs once typing pauses instead of on every keystroke
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.filter_logs)
         
         self.init_ui()
         self.load_logs()
@@ -304,7 +490,7 @@ class LogsPanel(QWidget):
         
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("🔍 Search logs (recipient, subject, content...)")
-        self.search_edit.textChanged.connect(self.filter_logs)
+        self.search_edit.textChanged.connect(self.search_timer.start)
         search_layout.addWidget(self.search_edit)
         
         layout.addWidget(search_group)
@@ -541,12 +727,13 @@ class LogsPanel(QWidget):
         
         logs_layout.addLayout(logs_header)
         
-        # Logs table
-        self.logs_table = QTableWidget()
-        self.logs_table.setColumnCount(7)
-        self.logs_table.setHorizontalHeaderLabels([
-            "Timestamp", "Recipient", "Subject", "Status", "Template", "Attachments", "Retries"
-        ])
+        # Logs table, filled page by page by the model
+        self.logs_model = EmailLogsModel(self.db_manager, self)
+        self.logs_model.rowsInserted.connect(self.update_status_label)
+        self.logs_model.modelReset.connect(self.update_status_label)
+        
+        self.logs_table = QTableView()
+        self.logs_table.setModel(self.logs_model)
         
         # Configure table
         header = self.logs_table.horizontalHeader()
@@ -557,9 +744,15 @@ class LogsPanel(QWidget):
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents)
         header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents)
+        # Size columns from visible rows only, not every loaded row
+        header.setResizeContentsPrecision(0)
+        
+        vertical_header = self.logs_table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setVisible(False)
         
         self.logs_table.setAlternatingRowColors(True)
-        self.logs_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.logs_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.logs_table.doubleClicked.connect(self.show_log_details)
         
         # Context menu
@@ -659,20 +852,20 @@ class LogsPanel(QWidget):
             font-size: 14px;
         }
         
-        QTableWidget {
+        QTableView {
             border: 1px solid #219ebc;
             border-radius: 6px;
             background-color: #8ecae6;
             gridline-color: #219ebc;
         }
         
-        QTableWidget::item {
+        QTableView::item {
             padding: 8px;
             border-bottom: 1px solid #8ecae6;
             color: #023047;
         }
         
-        QTableWidget::item:selected {
+        QTableView::item:selected {
             background-color: #219ebc;
             color: white;
         }
@@ -732,17 +925,12 @@ class LogsPanel(QWidget):
     def load_logs(self):
         """Load email logs from database"""
         try:
-            self.all_logs = self.db_manager.get_email_logs()
-            
             # Update filter dropdowns
             self.update_filter_dropdowns()
             
             # Apply current filters
             self.filter_logs()
             
-            # Update statistics
-            self.update_statistics()
-            
         except Exception as e:
             self.logger.error(f"Error loading logs: {e}")
             QMessageBox.critical(self, "Error", f"Failed to load logs: {str(e)}")
@@ -751,36 +939,27 @@ class LogsPanel(QWidget):
         """Update filter dropdown options based on available data"""
         # Update template filter
         current_template = self.template_filter.currentText()
-        templates = set()
-        
-        for log in self.all_logs:
-            template_name = log.get('template_name', '').strip()
-            if template_name:
-                templates.add(template_name)
         
+        self.template_filter.blockSignals(True)
         self.template_filter.clear()
         self.template_filter.addItem("All Templates")
-        for template in sorted(templates):
-            self.template_filter.addItem(template)
+        for template in self.db_manager.get_email_templates():
+            self.template_filter.addItem(template['name'], template['id'])
         
         # Restore selection
         if current_template:
             index = self.template_filter.findText(current_template)
             if index >= 0:
                 self.template_filter.setCurrentIndex(index)
+        self.template_filter.blockSignals(False)
         
         # Update sender filter
         current_sender = self.sender_filter.currentText()
-        senders = set()
-        
-        for log in self.all_logs:
-            sender = log.get('sender', '').strip()
-            if sender:
-                senders.add(sender)
         
+        self.sender_filter.blockSignals(True)
         self.sender_filter.clear()
         self.sender_filter.addItem("All Senders")
-        for sender in sorted(senders):
+        for sender in self.db_manager.get_email_log_senders():
             self.sender_filter.addItem(sender)
         
         # Restore selection
@@ -788,156 +967,69 @@ class LogsPanel(QWidget):
             index = self.sender_filter.findText(current_sender)
             if index >= 0:
                 self.sender_filter.setCurrentIndex(index)
+            else:
+                self.sender_filter.setEditText(current_sender)
+        self.sender_filter.blockSignals(False)
     
-    def filter_logs(self):
-        """Apply filters to logs"""
-        if not hasattr(self, 'all_logs'):
-            return
+    def current_filters(self):
+        """Build query_email_logs filters from the filter widgets.
+        
+        Returns None when no log can match, as email logs don't record
+        attachments or retries.
+        """
+        if self.has_attachments_check.isChecked() or self.min_retry_spin.value() > 0:
+            return None
+        
+        filters = {}
         
-        filtered_logs = []
+        search_text = self.search_edit.text().strip()
+        if search_text:
+            filters['search'] = search_text
         
-        # Get filter values
-        search_text = self.search_edit.text().lower()
         status_filter = self.status_filter.currentText()
-        template_filter = self.template_filter.currentText()
-        sender_filter = self.sender_filter.currentText()
-        start_date = self.start_date.date().toPyDate()
-        end_date = self.end_date.date().toPyDate()
-        has_attachments = self.has_attachments_check.isChecked()
-        no_attachments = self.no_attachments_check.isChecked()
-        min_retry = self.min_retry_spin.value()
-        max_retry = self.max_retry_spin.value()
-        
-        for log in self.all_logs:
-            # Search filter
-            if search_text:
-                searchable_text = (
-                    log.get('recipient', '').lower() + " " +
-                    log.get('subject', '').lower() + " " +
-                    log.get('body', '').lower() + " " +
-                    log.get('template_name', '').lower()
-                )
-                
-                if search_text not in searchable_text:
-                    continue
-            
-            # Status filter
-            if status_filter != "All Status":
-                if log.get('status', '').lower() != status_filter.lower():
-                    continue
-            
-            # Template filter
-            if template_filter != "All Templates":
-                if log.get('template_name', '') != template_filter:
-                    continue
-            
-            # Sender filter
-            if sender_filter != "All Senders":
-                if log.get('sender', '') != sender_filter:
-                    continue
-            
-            # Date filter
-            try:
-                log_date = datetime.strptime(log.get('timestamp', ''), '%Y-%m-%d %H:%M:%S').date()
-                if log_date < start_date or log_date > end_date:
-                    continue
-            except (ValueError, TypeError):
-                # Skip logs with invalid dates
-                continue
-            
-            # Attachments filter
-            log_has_attachments = bool(log.get('attachments', '').strip())
-            if has_attachments and not log_has_attachments:
-                continue
-            if no_attachments and log_has_attachments:
-                continue
-            
-            # Retry filter
-            retry_count = log.get('retry_count', 0)
-            if retry_count < min_retry or retry_count > max_retry:
-                continue
-            
-            filtered_logs.append(log)
+        if status_filter != "All Status":
+            filters['status'] = status_filter.lower()
+        
+        if self.template_filter.currentIndex() > 0:
+            filters['template_id'] = self.template_filter.currentData()
         
-        # Store filtered logs
-        self.filtered_logs = filtered_logs
+        sender_filter = self.sender_filter.currentText().strip()
+        if sender_filter and sender_filter != "All Senders":
+            filters['sender_email'] = sender_filter
         
-        # Apply pagination
-        self.display_logs(filtered_logs)
+        # Local calendar days, the end date included
+        start_date = self.start_date.date().toPyDate()
+        end_date = self.end_date.date().toPyDate() + timedelta(days=1)
+        filters['since'] = datetime.combine(start_date, time()).astimezone()
+        filters['until'] = datetime.combine(end_date, time()).astimezone()
         
-        # Update statistics
-        self.update_statistics()
+        return filters
     
-    def display_logs(self, logs):
-        """Display logs in table with pagination"""
-        # Apply pagination
+    def page_size(self):
+        """Number of logs fetched per page"""
         results_per_page = self.results_per_page.currentText()
-        if results_per_page != "All":
-            max_results = int(results_per_page)
-            logs = logs[:max_results]
-        
-        self.logs_table.setRowCount(len(logs))
+        return 500 if results_per_page == "All" else int(results_per_page)
+    
+    def filter_logs(self):
+        """Apply filters to logs, reloading the first page from the database"""
+        self.search_timer.stop()
+        self.filters = self.current_filters()
         
-        for row, log in enumerate(logs):
-            # Timestamp
-            timestamp = log.get('timestamp', '')[:19]  # Remove microseconds
-            self.logs_table.setItem(row, 0, QTableWidgetItem(timestamp))
-            
-            # Recipient
-            recipient = log.get('recipient', '')
-            self.logs_table.setItem(row, 1, QTableWidgetItem(recipient))
-            
-            # Subject (truncated)
-            subject = log.get('subject', '')
-            if len(subject) > 50:
-                subject = subject[:47] + "..."
-            self.logs_table.setItem(row, 2, QTableWidgetItem(subject))
-            
-            # Status with color
-            status = log.get('status', 'Unknown')
-            status_item = QTableWidgetItem(status)
-            if status.lower() == 'sent':
-                status_item.setBackground(QColor(39, 174, 96, 50))
-                status_item.setForeground(QColor(39, 174, 96))
-            elif status.lower() == 'failed':
-                status_item.setBackground(QColor(231, 76, 60, 50))
-                status_item.setForeground(QColor(231, 76, 60))
-            else:
-                status_item.setBackground(QColor(243, 156, 18, 50))
-                status_item.setForeground(QColor(243, 156, 18))
-            
-            status_item.setFont(QFont('Arial', 9, QFont.Weight.Bold))
-            self.logs_table.setItem(row, 3, status_item)
-            
-            # Template
-            template_name = log.get('template_name', 'N/A')
-            self.logs_table.setItem(row, 4, QTableWidgetItem(template_name))
-            
-            # Attachments
-            attachments = log.get('attachments', '')
-            if attachments:
-                attachment_count = len(attachments.split(','))
-                attachments_text = f"📎 {attachment_count}"
-            else:
-                attachments_text = "-"
-            self.logs_table.setItem(row, 5, QTableWidgetItem(attachments_text))
+        try:
+            self.logs_model.set_filters(self.filters, self.page_size())
             
-            # Retry count
-            retry_count = str(log.get('retry_count', 0))
-            retry_item = QTableWidgetItem(retry_count)
-            if int(retry_count) > 0:
-                retry_item.setBackground(QColor(243, 156, 18, 50))
-            self.logs_table.setItem(row, 6, retry_item)
+            # Update statistics
+            self.update_statistics()
             
-            # Store log ID in first column
-            self.logs_table.item(row, 0).setData(Qt.ItemDataRole.UserRole, log.get('id'))
-        
-        # Update status
-        total_filtered = len(self.filtered_logs)
-        displayed = len(logs)
+        except Exception as e:
+            self.logger.error(f"Error filtering logs: {e}")
+    
+    def update_status_label(self):
+        """Update the loaded logs counter"""
+        displayed = self.logs_model.rowCount()
         
-        if displayed < total_filtered:
-            status_text = f"📊 Showing {displayed} of {total_filtered} logs"
+        if self.logs_model.canFetchMore():
+            status_text = f"📊 {displayed} logs loaded, scroll for more"
         else:
             status_text = f"📊 {displayed} logs displayed"
         
@@ -945,16 +1037,13 @@ class LogsPanel(QWidget):
     
     def update_statistics(self):
         """Update statistics in export tab"""
-        total_logs = len(self.all_logs)
-        filtered_logs = len(self.filtered_logs)
-        
-        sent_count = sum(1 for log in self.filtered_logs if log.get('status', '').lower() == 'sent')
-        failed_count = sum(1 for log in self.filtered_logs if log.get('status', '').lower() == 'failed')
+        total_logs = sum(self.db_manager.get_email_stats_totals().values())
+        counts = self.db_manager.count_email_logs(self.filters) if self.filters is not None else {}
         
         self.total_logs_label.setText(str(total_logs))
-        self.filtered_logs_label.setText(str(filtered_logs))
-        self.sent_logs_label.setText(str(sent_count))
-        self.failed_logs_label.setText(str(failed_count))
+        self.filtered_logs_label.setText(str(sum(counts.values())))
+        self.sent_logs_label.setText(str(counts.get('sent', 0)))
+        self.failed_logs_label.setText(str(counts.get('failed', 0)))
         
         # Update label colors
         self.sent_logs_label.setStyleSheet("color: #27ae60; font-weight: bold;")
@@ -996,20 +1085,16 @@ class LogsPanel(QWidget):
     
     def show_log_details(self):
         """Show detailed log information"""
-        current_row = self.logs_table.currentRow()
-        if current_row < 0:
+        current_index = self.logs_table.currentIndex()
+        if not current_index.isValid():
             QMessageBox.warning(self, "Warning", "Please select a log entry to view details.")
             return
         
         try:
-            log_id = self.logs_table.item(current_row, 0).data(Qt.ItemDataRole.UserRole)
+            log_id = self.logs_model.index(current_index.row(), 0).data(Qt.ItemDataRole.UserRole)
             
-            # Find the log in filtered logs
-            log_data = None
-            for log in self.filtered_logs:
-                if log.get('id') == log_id:
-                    log_data = log
-                    break
+            # The table holds list columns only, load the full entry
+            log_data = self.db_manager.get_email_log(log_id)
             
             if not log_data:
                 QMessageBox.warning(self, "Error", "Log entry not found.")
@@ -1029,9 +1114,7 @@ class LogsPanel(QWidget):
     
     def delete_selected_logs(self):
         """Delete selected log entries"""
-        selected_rows = set()
-        for item in self.logs_table.selectedItems():
-            selected_rows.add(item.row())
+        selected_rows = {index.row() for index in self.logs_table.selectionModel().selectedRows()}
         
         if not selected_rows:
             QMessageBox.warning(self, "Warning", "Please select log entries to delete.")
@@ -1047,7 +1130,7 @@ class LogsPanel(QWidget):
             try:
                 log_ids = []
                 for row in selected_rows:
-                    log_id = self.logs_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+                    log_id = self.logs_model.index(row, 0).data(Qt.ItemDataRole.UserRole)
                     if log_id:
                         log_ids.append(log_id)
                 
@@ -1066,13 +1149,13 @@ class LogsPanel(QWidget):
         """Export logs to file"""
         # Determine which logs to export
         if filtered_only:
-            logs_to_export = self.filtered_logs
+            export_filters = self.filters
             default_name = "filtered_email_logs"
         else:
-            logs_to_export = self.all_logs
+            export_filters = {}
             default_name = "all_email_logs"
         
-        if not logs_to_export:
+        if export_filters is None or not sum(self.db_manager.count_email_logs(export_filters).values()):
             QMessageBox.warning(self, "Warning", "No logs to export.")
             return
         
@@ -1094,7 +1177,7 @@ class LogsPanel(QWidget):
         self.export_progress.setVisible(True)
         self.export_progress.setValue(0)
         
-        self.export_thread = ExportThread(logs_to_export, file_path, export_format)
+        self.export_thread = ExportThread(self.db_manager, export_filters, file_path, export_format)
         self.export_thread.progress_updated.connect(self.export_progress.setValue)
         self.export_thread.export_completed.connect(self.on_export_completed)
         self.export_thread.export_failed.connect(self.on_export_failed)
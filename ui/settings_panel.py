@@ -30,9 +30,15 @@ class DatabaseBackupThread(QThread):
             # Create backup directory if it doesn't exist
             os.makedirs(os.path.dirname(self.backup_path), exist_ok=True)
             
-            # Copy database file
+            # Copy database through SQLite so pages still in the WAL are included
             self.progress_updated.emit(25)
-            shutil.copy2(self.source_db, self.backup_path)
+            source = sqlite3.connect(self.source_db)
+            target = sqlite3.connect(self.backup_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
             self.progress_updated.emit(75)
             
             # Verify backup
@@ -1273,8 +1279,12 @@ class SettingsPanel(QWidget):
                     # Close current database connection
                     self.db_manager.close()
                     
-                    # Replace current database with backup
+                    # Replace current database with backup, dropping WAL files
+                    # that belong to the old database
                     shutil.copy2(file_path, self.db_manager.db_path)
+                    for suffix in ('-wal', '-shm'):
+                        if os.path.exists(self.db_manager.db_path + suffix):
+                            os.remove(self.db_manager.db_path + suffix)
                     
                     # Reconnect to database
                     self.db_manager.connect()
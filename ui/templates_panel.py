@@ -515,6 +515,12 @@ class TemplatesPanel(QWidget):
         self.db_manager = db_manager
         self.logger = logging.getLogger(__name__)
         
+        # Search runs once typing pauses instead of on every keystroke
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.filter_templates)
+        
         self.init_ui()
         self.load_templates()
     
@@ -562,7 +568,7 @@ class TemplatesPanel(QWidget):
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("🔍 Search templates...")
         self.search_edit.setMaximumWidth(200)
-        self.search_edit.textChanged.connect(self.filter_templates)
+        self.search_edit.textChanged.connect(self.search_timer.start)
         templates_header.addWidget(self.search_edit)
         
         # Category filter
@@ -897,34 +903,26 @@ class TemplatesPanel(QWidget):
         if not hasattr(self, 'all_templates'):
             return
         
-        search_text = self.search_edit.text().lower()
+        self.search_timer.stop()
+        search_text = self.search_edit.text().strip()
         selected_category = self.category_filter.currentText()
         
-        filtered_templates = []
+        templates = self.all_templates
         
-        for template in self.all_templates:
-            # Category filter
-            if selected_category != "All Categories":
-                template_category = template.get('category', '').strip()
-                if template_category != selected_category:
-                    continue
-            
-            # Search filter
-            if search_text:
-                searchable_text = (
-                    template['name'].lower() + " " +
-                    template['subject'].lower() + " " +
-                    template.get('category', '').lower() + " " +
-                    template['body'].lower()
-                )
-                
-                if search_text not in searchable_text:
-                    continue
-            
-            filtered_templates.append(template)
+        # Search filter, best matches first
+        if search_text:
+            templates_by_id = {template['id']: template for template in templates}
+            templates = [templates_by_id[template_id]
+                         for template_id in self.db_manager.search_email_templates(search_text)
+                         if template_id in templates_by_id]
+        
+        # Category filter
+        if selected_category != "All Categories":
+            templates = [template for template in templates
+                         if template.get('category', '').strip() == selected_category]
         
-        self.display_templates(filtered_templates)
-        self.update_stats(filtered_templates)
+        self.display_templates(templates)
+        self.update_stats(templates)
     
     def update_stats(self, templates):
         """Update templates statistics"""